@@ -0,0 +1,9 @@
+"""
+Code shared by the JOSAA and MHTCET services.
+
+Both services install this package (see their requirements.txt) and import
+its modules by name, e.g. `from nextstep_common.compiled import compile_frame`.
+It holds what does not depend on either service's data or routes.
+"""
+
+__version__ = "1.0.0"
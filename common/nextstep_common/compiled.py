@@ -0,0 +1,396 @@
+"""
+Compiled columnar snapshots of the cutoff CSVs, shared by both services.
+
+A snapshot is a directory next to the CSV (<name>.snapshot/) that holds one
+.npy file per column plus a schema.json sidecar. Numeric columns are stored
+as typed arrays and memory-mapped on load; string columns are stored as
+integer codes with their dictionary in the schema. The schema records the size,
+mtime and SHA-256 of the CSV it was compiled from so a stale snapshot is never
+used.
+
+Every worker process maps the same files read-only, so the column data lives
+once in the page cache however many workers serve the app. A service either
+uses the raw mapped columns (load_compiled_columns; JOSAA builds its encoded
+table from them) or a DataFrame over them (load_compiled; string columns
+become categoricals over the mapped codes and every column stays its own
+block). Compiling with narrow=True stores float columns that only hold
+integers as int32, so a service that keeps the ranks as int32 uses them
+straight from the map. compile_lock() makes sure only one worker parses and
+compiles a missing or stale snapshot while the others wait and then attach
+to it.
+
+Each service compiles its cutoff files at build time with:
+    python -m app.compiled [path/to/cutoff.csv ...]
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; compiles are then not serialised
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+SCHEMA_FILE = 'schema.json'
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> Optional[str]:
+    """
+    Compute the SHA-256 of a file without reading it into memory at once.
+
+    Args:
+        path (Path): File to hash
+        chunk_size (int, optional): Read size in bytes. Defaults to 1 MiB.
+
+    Returns:
+        Optional[str]: Hex digest, or None if the file cannot be read
+    """
+    try:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+def snapshot_path(csv_path: Path) -> Path:
+    """Return the snapshot directory for a CSV file."""
+    return csv_path.with_suffix('.snapshot')
+
+
+def code_dtype(size: int) -> np.dtype:
+    """Smallest signed integer type that can index a dictionary of this size."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if size < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _narrow(values: np.ndarray) -> np.ndarray:
+    """Store float columns holding only int32-range integers as int32."""
+    if values.dtype.kind != 'f' or values.size == 0 or not np.all(np.isfinite(values)):
+        return values
+    if np.all(values == np.floor(values)) and np.abs(values).max() <= np.iinfo(np.int32).max:
+        return values.astype(np.int32)
+    return values
+
+
+def _to_json_value(value):
+    """Convert a NumPy scalar into a JSON-serialisable Python value."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def compile_frame(df: pd.DataFrame, csv_path: Path, revision: str, narrow: bool = False) -> Path:
+    """
+    Write a preprocessed DataFrame as a compiled snapshot of csv_path.
+
+    The snapshot is written to a temporary directory first and then renamed
+    into place, so readers never see a partially written snapshot.
+
+    Args:
+        df (pd.DataFrame): Preprocessed data compiled from csv_path
+        csv_path (Path): Source CSV the data came from
+        revision (str): Preprocessing revision; a change invalidates the snapshot
+        narrow (bool, optional): Store float columns holding only int32-range
+            integers as int32, recording their source dtype. Defaults to False.
+
+    Returns:
+        Path: Snapshot directory
+    """
+    target = snapshot_path(csv_path)
+    staging = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    try:
+        columns = []
+        for position, name in enumerate(df.columns):
+            series = df[name]
+            file_name = f"col_{position:03d}.npy"
+
+            if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+                source = np.ascontiguousarray(series.to_numpy())
+                values = _narrow(source) if narrow else source
+                column = {'name': name, 'kind': 'numeric', 'dtype': values.dtype.str}
+                if values.dtype != source.dtype:
+                    column['source_dtype'] = source.dtype.str
+            else:
+                try:
+                    codes, uniques = pd.factorize(series, sort=True)
+                except TypeError:
+                    # Mixed types cannot be ordered
+                    codes, uniques = pd.factorize(series)
+                values = codes.astype(code_dtype(len(uniques)))
+                column = {
+                    'name': name,
+                    'kind': 'dictionary',
+                    'dtype': values.dtype.str,
+                    'dictionary': [_to_json_value(v) for v in uniques]
+                }
+
+            np.save(staging / file_name, values, allow_pickle=False)
+            column['file'] = file_name
+            columns.append(column)
+
+        stat = csv_path.stat()
+        schema = {
+            'format_version': FORMAT_VERSION,
+            'revision': revision,
+            'rows': len(df),
+            'source': {
+                'name': csv_path.name,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': file_digest(csv_path)
+            },
+            'columns': columns
+        }
+        with open(staging / SCHEMA_FILE, 'w') as f:
+            json.dump(schema, f)
+
+        # Swap the new snapshot into place
+        previous = target.with_name(f"{target.name}.old-{os.getpid()}")
+        if target.exists():
+            target.rename(previous)
+        staging.rename(target)
+        shutil.rmtree(previous, ignore_errors=True)
+
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    logger.info(f"Compiled {len(df)} records from {csv_path.name} into {target}")
+    return target
+
+
+def read_schema(csv_path: Path) -> Optional[dict]:
+    """Read the schema of the snapshot for csv_path, or None if there is none."""
+    try:
+        with open(snapshot_path(csv_path) / SCHEMA_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(csv_path: Path, schema: dict, revision: str) -> bool:
+    """
+    Check whether a snapshot still matches its source CSV.
+
+    Size and mtime are compared first; the CSV is hashed only when they differ.
+    A snapshot without its CSV is considered fresh, which allows deploying the
+    compiled snapshot on its own.
+
+    Args:
+        csv_path (Path): Source CSV
+        schema (dict): Snapshot schema
+        revision (str): Expected preprocessing revision
+
+    Returns:
+        bool: True if the snapshot can be used in place of the CSV
+    """
+    if schema.get('format_version') != FORMAT_VERSION or schema.get('revision') != revision:
+        return False
+
+    try:
+        stat = csv_path.stat()
+    except OSError:
+        return True
+
+    source = schema.get('source', {})
+    if source.get('size') == stat.st_size and source.get('mtime_ns') == stat.st_mtime_ns:
+        return True
+    return source.get('size') == stat.st_size and source.get('sha256') == file_digest(csv_path)
+
+
+def load_compiled_columns(csv_path: Path, revision: str, mmap: bool = True) -> Optional[Dict[str, dict]]:
+    """
+    Load the raw columns of the compiled snapshot of csv_path.
+
+    Numeric columns are returned as {'values': array} in their stored type
+    (narrowed columns also carry 'source_dtype'); string columns as
+    {'codes': array, 'dictionary': list}, where code -1 marks a missing value.
+
+    Args:
+        csv_path (Path): Source CSV
+        revision (str): Expected preprocessing revision
+        mmap (bool, optional): Memory-map the column files. Defaults to True.
+
+    Returns:
+        Optional[Dict[str, dict]]: Columns by name, or None if the CSV must be parsed
+    """
+    schema = read_schema(csv_path)
+    if schema is None:
+        return None
+
+    if not is_fresh(csv_path, schema, revision):
+        logger.info(f"Compiled snapshot for {csv_path.name} is stale")
+        return None
+
+    try:
+        directory = snapshot_path(csv_path)
+        columns = {}
+        for column in schema['columns']:
+            values = np.load(
+                directory / column['file'],
+                mmap_mode='r' if mmap else None,
+                allow_pickle=False
+            )
+            if column['kind'] == 'dictionary':
+                columns[column['name']] = {'codes': values, 'dictionary': column['dictionary']}
+            else:
+                columns[column['name']] = {'values': values}
+                if 'source_dtype' in column:
+                    columns[column['name']]['source_dtype'] = column['source_dtype']
+        return columns
+
+    except Exception as e:
+        logger.error(f"Error loading compiled snapshot: {str(e)}", exc_info=True)
+        return None
+
+
+def load_compiled(csv_path: Path, revision: str, mmap: bool = True) -> Optional[pd.DataFrame]:
+    """
+    Load the compiled snapshot of csv_path as a DataFrame if it exists and is fresh.
+
+    The frame shares the mapped files instead of copying them; only narrowed
+    columns are converted back to their source dtype. Operations that
+    consolidate its blocks (such as boolean indexing of the whole frame) copy
+    the numeric columns into the process, so select rows column by column.
+
+    Args:
+        csv_path (Path): Source CSV
+        revision (str): Expected preprocessing revision
+        mmap (bool, optional): Memory-map the column files. Defaults to True.
+
+    Returns:
+        Optional[pd.DataFrame]: Preprocessed data, or None if the CSV must be parsed
+    """
+    start = time.perf_counter()
+    columns = load_compiled_columns(csv_path, revision, mmap)
+    if columns is None:
+        return None
+
+    series = []
+    for name, column in columns.items():
+        if 'codes' in column:
+            # Code -1 marks a missing value
+            values = pd.Categorical.from_codes(column['codes'], column['dictionary'])
+        elif 'source_dtype' in column:
+            values = column['values'].astype(column['source_dtype'])
+        else:
+            values = column['values']
+        series.append(pd.Series(values, name=name, copy=False))
+
+    # Concatenating keeps one block per column, where the DataFrame
+    # constructor would copy the numeric columns into a single block
+    df = pd.concat(series, axis=1, copy=False)
+    logger.info(
+        f"Loaded {len(df)} records from compiled snapshot of {csv_path.name} "
+        f"in {time.perf_counter() - start:.3f}s"
+    )
+    return df
+
+
+def mapped_nbytes(arrays: Iterable[np.ndarray]) -> int:
+    """Bytes of the arrays that are views of a memory-mapped file."""
+    total = 0
+    for array in arrays:
+        base = array
+        while base is not None and not isinstance(base, np.memmap):
+            base = getattr(base, 'base', None)
+        if base is not None:
+            total += array.nbytes
+    return total
+
+
+@contextmanager
+def compile_lock(csv_path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock for compiling the snapshot of csv_path.
+
+    Worker processes starting together would otherwise all parse the CSV and
+    write the same snapshot. The lock is a file next to the snapshot; where it
+    cannot be created (read-only data directory, no fcntl) nothing is locked.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    target = snapshot_path(csv_path)
+    try:
+        lock_file = open(target.with_name(f"{target.name}.lock"), 'a')
+    except OSError:
+        yield
+        return
+
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_or_compile(
+    csv_path: Path,
+    parse: Callable[[Path], pd.DataFrame],
+    revision: str,
+    load: Callable[[Path, str], Any] = load_compiled,
+    narrow: bool = False
+) -> Any:
+    """
+    Load the compiled snapshot, falling back to parsing the CSV.
+
+    After a fallback the parsed data is compiled and then loaded like any
+    other snapshot; failing to write the snapshot is not an error.
+
+    Args:
+        csv_path (Path): Source CSV
+        parse (Callable): Reads and preprocesses the CSV
+        revision (str): Preprocessing revision
+        load (Callable, optional): Loads a fresh snapshot or returns None;
+            load_compiled (default) or load_compiled_columns
+        narrow (bool, optional): As for compile_frame()
+
+    Returns:
+        What `load` returns; the parsed DataFrame if the snapshot could not be
+        written; None if there is neither a usable snapshot nor a CSV
+    """
+    loaded = load(csv_path, revision)
+    if loaded is not None:
+        return loaded
+    if not csv_path.exists():
+        return None
+
+    with compile_lock(csv_path):
+        # Another process may have compiled it while this one waited
+        loaded = load(csv_path, revision)
+        if loaded is not None:
+            return loaded
+
+        df = parse(csv_path)
+        if df.empty:
+            return df
+        try:
+            compile_frame(df, csv_path, revision, narrow=narrow)
+        except Exception as e:
+            logger.warning(f"Could not write compiled snapshot: {str(e)}")
+            return df
+
+    loaded = load(csv_path, revision)
+    return loaded if loaded is not None else df
@@ -0,0 +1,778 @@
+"""
+Load generation and replay against the JOSAA and MHTCET apps.
+
+Requests are drawn from a weighted mix of endpoints (the home pages,
+/predict and /branches of JOSAA, /search and /export of MHTCET) with form
+values as candidates enter them: ranks from a long-tailed distribution,
+categories by their share of candidates, most filters left at "All".
+Dropdown values are read from each service's home page. Requests arrive
+as a Poisson process at the target rate, optionally ramped up, and are
+sent open-loop: a slow server does not slow the arrivals down, so queueing
+shows up in the latencies, and requests beyond --max-in-flight are counted
+as dropped.
+
+The services are reached over HTTP (--josaa/--mhtcet base URLs, e.g. a
+local uvicorn or a Render instance) or, without URLs, the app of the
+current service directory is run in this process through its ASGI
+interface. The request plan can be recorded and replayed, optionally
+faster, to compare instance sizes under the same traffic.
+
+The report gives throughput, error rate and latency percentiles overall,
+per endpoint and per time window, as text, JSON and a self-contained HTML
+page. Run from a service directory with:
+    python -m nextstep_common.loadgen --rps 20 --duration 60
+    python -m nextstep_common.loadgen --josaa http://localhost:8000 --mhtcet http://localhost:8001 \\
+        --rps 100 --ramp 30 --duration 300 --record peak.jsonl --html peak.html
+    python -m nextstep_common.loadgen --josaa ... --mhtcet ... --replay peak.jsonl --speed 2
+"""
+
+import argparse
+import asyncio
+import html
+import importlib
+import json
+import math
+import random
+import re
+import ssl
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode, urlsplit
+
+# Seconds a pooled connection may stay idle before it is dropped, below the
+# 5 s after which uvicorn closes idle keep-alive connections
+IDLE_TIMEOUT = 4.0
+
+# Mix entry "<service>:<path>" -> (HTTP method, default weight)
+ENDPOINTS = {
+    'josaa:/': ('GET', 2),
+    'josaa:/predict': ('POST', 6),
+    'josaa:/branches': ('GET', 1),
+    'mhtcet:/': ('GET', 2),
+    'mhtcet:/search': ('POST', 6),
+    'mhtcet:/export': ('POST', 1)
+}
+
+# Ranks: (median, sigma of the log, lowest, highest); most candidates are far from the top
+RANK_DISTRIBUTIONS = {
+    'josaa': (40000, 1.1, 1, 1000000),
+    'mhtcet': (30000, 1.0, 1, 200000)
+}
+
+# Dropdown value -> share of searches; other values share what is left equally
+FIELD_SHARES = {
+    'josaa': {
+        'category': {'OPEN': 0.43, 'OBC-NCL': 0.28, 'SC': 0.13, 'EWS': 0.1, 'ST': 0.06},
+        'college_type': {'ALL': 0.45, 'NIT': 0.25, 'IIIT': 0.13, 'IIT': 0.12, 'GFTI': 0.05},
+        'preferred_branch': {'All': 0.7},
+        'round_no': {}
+    },
+    'mhtcet': {
+        'category': {'All': 0.25, 'GOPENS': 0.25, 'GOBCS': 0.12, 'LOPENS': 0.08, 'EWS': 0.06, 'TFWS': 0.05},
+        'quota': {'All': 0.6},
+        'branch': {'All': 0.6}
+    }
+}
+
+# Requests still running after this many seconds are counted as timed out
+DEFAULT_TIMEOUT = 30.0
+
+_SELECT = re.compile(r'<select[^>]*\bname="([^"]+)"[^>]*>(.*?)</select>', re.S)
+_OPTION = re.compile(r'<option value="([^"]*)"')
+
+
+class Sample:
+    """Outcome of one request; status 0 when no response was received."""
+
+    __slots__ = ('start', 'latency', 'name', 'status', 'error', 'nbytes')
+
+    def __init__(self, start: float, latency: float, name: str, status: int, error: Optional[str], nbytes: int = 0):
+        self.start = start
+        self.latency = latency
+        self.name = name
+        self.status = status
+        self.error = error
+        self.nbytes = nbytes
+
+    @property
+    def failed(self) -> bool:
+        """Server errors and requests without a response count as errors."""
+        return self.status == 0 or self.status >= 500
+
+
+class ASGITarget:
+    """An app run in this process, called through its ASGI interface."""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan: Optional[asyncio.Task] = None
+        self._lifespan_queue: Optional[asyncio.Queue] = None
+
+    async def start(self) -> None:
+        """Run the app's startup handlers."""
+        self._lifespan_queue = asyncio.Queue()
+        started = asyncio.get_running_loop().create_future()
+
+        async def receive():
+            return await self._lifespan_queue.get()
+
+        async def send(message):
+            if message['type'].startswith('lifespan.startup') and not started.done():
+                started.set_result(message)
+
+        self._lifespan = asyncio.ensure_future(self.app({'type': 'lifespan', 'asgi': {'version': '3.0'}}, receive, send))
+        await self._lifespan_queue.put({'type': 'lifespan.startup'})
+        message = await started
+        if message['type'] != 'lifespan.startup.complete':
+            raise RuntimeError(f"App startup failed: {message.get('message', '')}")
+
+    async def request(self, method: str, path: str, body: bytes, headers: List[Tuple[bytes, bytes]]) -> Tuple[int, bytes]:
+        """Send one request; returns the status and the response body."""
+        done = asyncio.Event()
+        sent = [False]
+        status = [0]
+        chunks: List[bytes] = []
+
+        async def receive():
+            if not sent[0]:
+                sent[0] = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            # Disconnect only once the response is complete, as a patient client would
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'root_path': '', 'query_string': b'', 'server': ('loadgen', 80), 'client': ('127.0.0.1', 0),
+            'headers': [(b'host', b'loadgen')] + headers
+        }
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            done.set()
+        return status[0], b''.join(chunks)
+
+    async def close(self) -> None:
+        """Run the app's shutdown handlers."""
+        if self._lifespan is not None:
+            await self._lifespan_queue.put({'type': 'lifespan.shutdown'})
+            try:
+                await asyncio.wait_for(self._lifespan, 10)
+            except asyncio.TimeoutError:
+                self._lifespan.cancel()
+
+
+class HTTPTarget:
+    """A service reached over HTTP/1.1 with a pool of keep-alive connections."""
+
+    def __init__(self, base_url: str, max_connections: int = 100):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Not an http(s) URL: {base_url}")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.prefix = parts.path.rstrip('/')
+        self.host_header = parts.netloc.encode('latin-1')
+        # Idle connections with the time they were returned, oldest first
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter, float]] = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def start(self) -> None:
+        pass
+
+    async def _read_response(self, status_line: bytes, reader: asyncio.StreamReader) -> Tuple[int, bytes, bool]:
+        """Read the rest of a response; returns status, body and whether the connection can be reused."""
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        chunks = []
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    # Trailers end with an empty line
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+        elif 'content-length' in headers:
+            chunks.append(await reader.readexactly(int(headers['content-length'])))
+        else:
+            chunks.append(await reader.read())
+            keep_alive = False
+        return status, b''.join(chunks), keep_alive
+
+    def _take_idle(self) -> Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        """The most recently used pooled connection, dropping those idle too long."""
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][2] >= IDLE_TIMEOUT:
+            self._idle.pop(0)[1].close()
+        while self._idle:
+            reader, writer, _ = self._idle.pop()
+            if not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    async def _send(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        message: bytes,
+        reused: bool
+    ) -> Optional[Tuple[int, bytes]]:
+        """
+        Send a request on a connection and read the response.
+
+        Returns None if a reused connection failed before the status line:
+        the server closed it while it was idle, so the request can be sent
+        again on a new connection.
+        """
+        try:
+            writer.write(message)
+            await writer.drain()
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionError("Connection closed by the server")
+        except OSError:
+            writer.close()
+            if reused:
+                return None
+            raise
+        except BaseException:
+            writer.close()
+            raise
+
+        try:
+            status, content, keep_alive = await self._read_response(status_line, reader)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self._idle.append((reader, writer, time.monotonic()))
+        else:
+            writer.close()
+        return status, content
+
+    async def request(self, method: str, path: str, body: bytes, headers: List[Tuple[bytes, bytes]]) -> Tuple[int, bytes]:
+        """Send one request; returns the status and the response body."""
+        head = [f'{method} {self.prefix}{path} HTTP/1.1'.encode('latin-1'), b'Host: ' + self.host_header]
+        head += [name + b': ' + value for name, value in headers]
+        head.append(b'Content-Length: ' + str(len(body)).encode())
+        message = b'\r\n'.join(head) + b'\r\n\r\n' + body
+
+        async with self._slots:
+            connection = self._take_idle()
+            if connection is not None:
+                response = await self._send(*connection, message, reused=True)
+                if response is not None:
+                    return response
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+            return await self._send(reader, writer, message, reused=False)
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer, _ = self._idle.pop()
+            writer.close()
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Parse a mix such as "josaa:/predict=6,mhtcet:/search=4".
+
+    Args:
+        spec (str, optional): Comma-separated endpoint=weight pairs; None for the default mix
+
+    Returns:
+        Dict[str, float]: Weight per endpoint
+    """
+    if not spec:
+        return {name: weight for name, (_, weight) in ENDPOINTS.items()}
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.strip().partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_options(page: str) -> Dict[str, List[str]]:
+    """The values of every <select> of a form page, by field name."""
+    return {name: _OPTION.findall(body) for name, body in _SELECT.findall(page)}
+
+
+def _choose(rng: random.Random, values: Sequence[str], shares: Dict[str, float]) -> str:
+    """Pick a value; listed values by their share, the others equally from the rest."""
+    listed = sum(shares.get(value, 0) for value in values)
+    unlisted = [value for value in values if value not in shares]
+    rest = max(0.0, 1 - listed) / len(unlisted) if unlisted else 0
+    weights = [shares.get(value, rest) for value in values]
+    if not any(weights):
+        weights = None
+    return rng.choices(values, weights)[0]
+
+
+def _rank(rng: random.Random, service: str) -> int:
+    median, sigma, low, high = RANK_DISTRIBUTIONS[service]
+    return int(min(high, max(low, rng.lognormvariate(math.log(median), sigma))))
+
+
+def make_request(rng: random.Random, name: str, options: Dict[str, List[str]]) -> dict:
+    """
+    Draw one request for an endpoint of the mix.
+
+    Args:
+        rng (random.Random): Random source
+        name (str): Mix entry, e.g. "josaa:/predict"
+        options (Dict[str, List[str]]): Dropdown values of the endpoint's service
+
+    Returns:
+        dict: {"name", "method", "path", "form"}
+    """
+    service, path = name.split(':', 1)
+    method = ENDPOINTS[name][0]
+    form = None
+    if method == 'POST':
+        form = {
+            field: _choose(rng, options.get(field) or ['All'], shares)
+            for field, shares in FIELD_SHARES[service].items()
+        }
+        if service == 'josaa':
+            form.update(jee_rank=_rank(rng, service), min_probability=30)
+        else:
+            form['rank'] = _rank(rng, service)
+    return {'name': name, 'method': method, 'path': path, 'form': form}
+
+
+def build_plan(
+    mix: Dict[str, float],
+    options: Dict[str, Dict[str, List[str]]],
+    rps: float,
+    duration: float,
+    ramp: float = 0,
+    seed: int = 0
+) -> List[dict]:
+    """
+    Draw the requests of a run and their start offsets.
+
+    Arrivals are a Poisson process whose rate rises linearly to rps over the
+    first ramp seconds and then stays there.
+
+    Args:
+        mix (Dict[str, float]): Weight per endpoint
+        options (Dict[str, Dict[str, List[str]]]): Dropdown values per service
+        rps (float): Target requests per second
+        duration (float): Length of the run in seconds
+        ramp (float, optional): Seconds to reach the target rate. Defaults to 0.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        List[dict]: make_request() dicts with an "at" offset in seconds, in order
+    """
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    plan = []
+    at = 0.0
+    while True:
+        at += rng.expovariate(rps)
+        if at >= duration:
+            return plan
+        # Thinning: during the ramp an arrival is kept with the current share of the rate
+        if ramp and at < ramp and rng.random() > at / ramp:
+            continue
+        name = rng.choices(names, weights)[0]
+        plan.append({'at': round(at, 6), **make_request(rng, name, options[name.split(':')[0]])})
+
+
+async def _send(target, request: dict, start: float, timeout: float) -> Sample:
+    headers = []
+    body = b''
+    if request['form'] is not None:
+        body = urlencode(request['form']).encode()
+        headers.append((b'content-type', b'application/x-www-form-urlencoded'))
+    began = time.perf_counter()
+    try:
+        status, content = await asyncio.wait_for(
+            target.request(request['method'], request['path'], body, headers), timeout
+        )
+        return Sample(began - start, time.perf_counter() - began, request['name'], status, None, len(content))
+    except asyncio.TimeoutError:
+        return Sample(began - start, time.perf_counter() - began, request['name'], 0, 'timeout')
+    except Exception as e:
+        return Sample(began - start, time.perf_counter() - began, request['name'], 0, type(e).__name__)
+
+
+async def run_plan(
+    plan: List[dict],
+    targets: Dict[str, object],
+    max_in_flight: int = 256,
+    timeout: float = DEFAULT_TIMEOUT,
+    speed: float = 1.0
+) -> Tuple[List[Sample], float]:
+    """
+    Send the planned requests at their offsets, without waiting for earlier responses.
+
+    Args:
+        plan (List[dict]): Output of build_plan() or a recorded plan
+        targets (Dict[str, object]): Target per service
+        max_in_flight (int, optional): Requests beyond this many outstanding are dropped
+        timeout (float, optional): Seconds before a request counts as timed out
+        speed (float, optional): Replay speed; 2 sends the plan in half the time
+
+    Returns:
+        Tuple[List[Sample], float]: One sample per request, and the wall time of the run
+    """
+    samples: List[Sample] = []
+    in_flight = set()
+    start = time.perf_counter()
+
+    def finished(task: asyncio.Task) -> None:
+        in_flight.discard(task)
+        samples.append(task.result())
+
+    for request in plan:
+        delay = request['at'] / speed - (time.perf_counter() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            samples.append(Sample(time.perf_counter() - start, 0.0, request['name'], 0, 'dropped'))
+            continue
+        target = targets[request['name'].split(':')[0]]
+        task = asyncio.ensure_future(_send(target, request, start, timeout))
+        in_flight.add(task)
+        task.add_done_callback(finished)
+
+    if in_flight:
+        await asyncio.wait(list(in_flight))
+    return samples, time.perf_counter() - start
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """The q-th percentile (0-100) of sorted values, interpolating between samples."""
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    low = math.floor(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def summarise(samples: Sequence[Sample], seconds: float) -> dict:
+    """Throughput, error rate, status counts and latency percentiles (ms) of samples."""
+    answered = sorted(s.latency for s in samples if s.status)
+    statuses: Dict[str, int] = {}
+    for s in samples:
+        key = str(s.status) if s.status else s.error
+        statuses[key] = statuses.get(key, 0) + 1
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        'requests': len(samples),
+        'throughput': round(len(answered) / seconds, 2) if seconds else None,
+        'error_rate': round(sum(s.failed for s in samples) / len(samples), 4) if samples else 0,
+        'statuses': dict(sorted(statuses.items())),
+        'p50_ms': ms(percentile(answered, 50)),
+        'p95_ms': ms(percentile(answered, 95)),
+        'p99_ms': ms(percentile(answered, 99)),
+        'max_ms': ms(answered[-1] if answered else None),
+        'mb_received': round(sum(s.nbytes for s in samples) / 1e6, 2)
+    }
+
+
+def build_report(samples: List[Sample], wall: float, interval: float, settings: dict) -> dict:
+    """
+    Summarise a run overall, per endpoint and per time window.
+
+    Args:
+        samples (List[Sample]): Outcomes of the run's requests
+        wall (float): Wall time of the run in seconds
+        interval (float): Window length in seconds for the timeline
+        settings (dict): Run settings, included in the report
+
+    Returns:
+        dict: {"settings", "overall", "endpoints", "timeline"}
+    """
+    # The last window takes the remainder of the run, rather than a sliver of its own
+    count = max(1, round(wall / interval))
+    endpoints: Dict[str, List[Sample]] = {}
+    windows: Dict[int, List[Sample]] = {}
+    for s in samples:
+        endpoints.setdefault(s.name, []).append(s)
+        windows.setdefault(min(int(s.start // interval), count - 1), []).append(s)
+
+    timeline = []
+    for index in range(count):
+        length = interval if index < count - 1 else max(interval, wall - index * interval)
+        timeline.append({'start': round(index * interval, 3), **summarise(windows.get(index, []), length)})
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'settings': settings,
+        'duration': round(wall, 3),
+        'overall': summarise(samples, wall),
+        'endpoints': {name: summarise(group, wall) for name, group in sorted(endpoints.items())},
+        'timeline': timeline
+    }
+
+
+def _value(value, digits: int = 1) -> str:
+    return '-' if value is None else f'{value:.{digits}f}'
+
+
+def format_report(report: dict) -> str:
+    """Render a report as text."""
+    settings = report['settings']
+    lines = [
+        f"Load run {report['created']}: {settings['source']}, {report['duration']:.1f}s, targets {settings['targets']}",
+        f"  {'endpoint':<18} {'requests':>9} {'req/s':>8} {'errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses"
+    ]
+    rows = list(report['endpoints'].items()) + [('all', report['overall'])]
+    for name, s in rows:
+        lines.append(
+            f"  {name:<18} {s['requests']:>9} {_value(s['throughput']):>8} {s['error_rate']:>8.1%} "
+            f"{_value(s['p50_ms']):>9} {_value(s['p95_ms']):>9} {_value(s['p99_ms']):>9} {_value(s['max_ms']):>9}  "
+            + ' '.join(f'{k}:{v}' for k, v in s['statuses'].items())
+        )
+    lines += ['', f"  {'window s':>9} {'requests':>9} {'req/s':>8} {'errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    for w in report['timeline']:
+        lines.append(
+            f"  {w['start']:>9.0f} {w['requests']:>9} {_value(w['throughput']):>8} {w['error_rate']:>8.1%} "
+            f"{_value(w['p50_ms']):>9} {_value(w['p95_ms']):>9} {_value(w['p99_ms']):>9}"
+        )
+    return '\n'.join(lines)
+
+
+def _svg_chart(title: str, unit: str, series: Dict[str, List[Tuple[float, Optional[float]]]]) -> str:
+    """A line chart of series of (x, y) points as inline SVG."""
+    width, height, left, bottom = 720, 240, 60, 30
+    colors = ['#1f77b4', '#ff7f0e', '#d62728', '#2ca02c']
+    points = [(x, y) for values in series.values() for x, y in values if y is not None]
+    if not points:
+        return f'<h3>{html.escape(title)}</h3><p>No data</p>'
+    max_x = max(x for x, _ in points) or 1
+    max_y = max(y for _, y in points) or 1
+
+    def position(x: float, y: float) -> str:
+        return f'{left + x / max_x * (width - left - 10):.1f},{height - bottom - y / max_y * (height - bottom - 10):.1f}'
+
+    parts = [
+        f'<h3>{html.escape(title)}</h3>',
+        f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg" font-size="11">',
+        f'<line x1="{left}" y1="{height - bottom}" x2="{width - 10}" y2="{height - bottom}" stroke="#999"/>',
+        f'<line x1="{left}" y1="10" x2="{left}" y2="{height - bottom}" stroke="#999"/>',
+        f'<text x="{left - 5}" y="14" text-anchor="end">{max_y:.4g}</text>',
+        f'<text x="{left - 5}" y="{height - bottom}" text-anchor="end">0</text>',
+        f'<text x="{width - 10}" y="{height - 8}" text-anchor="end">{max_x:.0f} s</text>',
+        f'<text x="12" y="{height // 2}" transform="rotate(-90 12 {height // 2})" text-anchor="middle">{html.escape(unit)}</text>'
+    ]
+    for i, (name, values) in enumerate(series.items()):
+        color = colors[i % len(colors)]
+        line = ' '.join(position(x, y) for x, y in values if y is not None)
+        parts.append(f'<polyline fill="none" stroke="{color}" stroke-width="1.5" points="{line}"/>')
+        parts.append(f'<text x="{left + 10 + 90 * i}" y="24" fill="{color}">{html.escape(name)}</text>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+def format_html(report: dict) -> str:
+    """Render a report as a self-contained HTML page with tables and charts."""
+    timeline = report['timeline']
+
+    def table(rows: List[Tuple[str, dict]]) -> str:
+        head = ''.join(f'<th>{h}</th>' for h in (
+            'endpoint', 'requests', 'req/s', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms', 'statuses'
+        ))
+        body = ''.join(
+            f"<tr><td>{html.escape(name)}</td><td>{s['requests']}</td><td>{_value(s['throughput'])}</td>"
+            f"<td>{s['error_rate']:.1%}</td><td>{_value(s['p50_ms'])}</td><td>{_value(s['p95_ms'])}</td>"
+            f"<td>{_value(s['p99_ms'])}</td><td>{_value(s['max_ms'])}</td>"
+            f"<td>{html.escape(' '.join(f'{k}:{v}' for k, v in s['statuses'].items()))}</td></tr>"
+            for name, s in rows
+        )
+        return f'<table><tr>{head}</tr>{body}</table>'
+
+    charts = [
+        _svg_chart('Latency', 'ms', {
+            q: [(w['start'], w[f'{q}_ms']) for w in timeline] for q in ('p50', 'p95', 'p99')
+        }),
+        _svg_chart('Throughput', 'responses/s', {'responses/s': [(w['start'], w['throughput']) for w in timeline]}),
+        _svg_chart('Error rate', '%', {'errors': [(w['start'], 100 * w['error_rate']) for w in timeline]})
+    ]
+    settings = ''.join(
+        f'<tr><th>{html.escape(str(k))}</th><td>{html.escape(str(v))}</td></tr>' for k, v in report['settings'].items()
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Load run {html.escape(report['created'])}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; color: #222; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5em; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: right; }}
+th:first-child, td:first-child {{ text-align: left; }}
+</style>
+</head>
+<body>
+<h1>Load run {html.escape(report['created'])}</h1>
+<p>{report['duration']:.1f} s, {report['overall']['requests']} requests,
+{_value(report['overall']['throughput'])} responses/s, {report['overall']['error_rate']:.1%} errors</p>
+<h2>Endpoints</h2>
+{table(list(report['endpoints'].items()) + [('all', report['overall'])])}
+<h2>Over time ({report['settings']['interval']} s windows)</h2>
+{''.join(charts)}
+<h2>Settings</h2>
+<table>{settings}</table>
+</body>
+</html>
+"""
+
+
+async def _wait_ready(target, timeout: float) -> None:
+    """Wait until the service answers /ready with 200."""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            status, _ = await target.request('GET', '/ready', b'', [])
+            if status == 200:
+                return
+        except (OSError, ConnectionError):
+            pass
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"Service not ready after {timeout:.0f}s")
+        await asyncio.sleep(0.5)
+
+
+async def _discover(target) -> Dict[str, List[str]]:
+    """Dropdown values from the service's home page."""
+    status, page = await target.request('GET', '/', b'', [])
+    if status != 200:
+        return {}
+    return parse_options(page.decode('utf-8', 'replace'))
+
+
+def _in_process_targets(services: Sequence[str]) -> Dict[str, ASGITarget]:
+    """The app of the current service directory, for the services whose endpoints it serves."""
+    app = importlib.import_module('app.main').app
+
+    paths = {getattr(route, 'path', None) for route in app.routes}
+    target = ASGITarget(app)
+    return {
+        service: target for service in services
+        if all(name.split(':', 1)[1] in paths for name in ENDPOINTS if name.startswith(f'{service}:'))
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Set up the targets, build or load the plan, run it and build the report."""
+    urls = {'josaa': args.josaa, 'mhtcet': args.mhtcet}
+    if any(urls.values()):
+        targets = {
+            service: HTTPTarget(url, args.max_in_flight) for service, url in urls.items() if url
+        }
+    else:
+        targets = _in_process_targets(list(urls))
+
+    # One target may serve several services; each is started and closed once
+    unique = list({id(t): t for t in targets.values()}.values())
+    for target in unique:
+        await target.start()
+    try:
+        for target in unique:
+            await _wait_ready(target, args.ready_timeout)
+
+        if args.replay:
+            plan = [json.loads(line) for line in args.replay.read_text().splitlines() if line.strip()]
+            plan = [request for request in plan if request['name'].split(':')[0] in targets]
+            source = f"replay of {args.replay} at {args.speed:g}x"
+        else:
+            mix = {name: w for name, w in parse_mix(args.mix).items() if name.split(':')[0] in targets}
+            if not mix:
+                raise ValueError("No endpoint of the mix belongs to a target service")
+            options = {service: await _discover(target) for service, target in targets.items()}
+            plan = build_plan(mix, options, args.rps, args.duration, args.ramp, args.seed)
+            source = f"{args.rps:g} req/s" + (f" after a {args.ramp:g}s ramp" if args.ramp else "")
+        if args.record:
+            args.record.write_text(''.join(json.dumps(request) + '\n' for request in plan))
+
+        samples, wall = await run_plan(plan, targets, args.max_in_flight, args.timeout, args.speed)
+    finally:
+        for target in unique:
+            await target.close()
+
+    settings = {
+        'source': source,
+        'targets': ', '.join(
+            f"{service}={urls[service] or 'in-process'}" for service in targets
+        ),
+        'planned_requests': len(plan),
+        'max_in_flight': args.max_in_flight,
+        'timeout': args.timeout,
+        'interval': args.interval,
+        'seed': args.seed
+    }
+    return build_report(samples, wall, args.interval, settings)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Send a realistic request mix to the JOSAA and MHTCET services")
+    parser.add_argument('--josaa', help="Base URL of the JOSAA service")
+    parser.add_argument('--mhtcet', help="Base URL of the MHTCET service")
+    parser.add_argument('--rps', type=float, default=20.0, help="Target requests per second (default 20)")
+    parser.add_argument('--duration', type=float, default=60.0, help="Seconds of traffic (default 60)")
+    parser.add_argument('--ramp', type=float, default=0.0, help="Seconds to ramp up to the target rate")
+    parser.add_argument('--mix', help="Endpoint weights, e.g. \"josaa:/predict=6,mhtcet:/search=4\" "
+                                      f"(default {','.join(f'{n}={w}' for n, (_, w) in ENDPOINTS.items())})")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the arrivals and the form values")
+    parser.add_argument('--max-in-flight', type=int, default=256, help="Outstanding requests before new ones are dropped")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Seconds before a request times out")
+    parser.add_argument('--ready-timeout', type=float, default=300.0, help="Seconds to wait for /ready")
+    parser.add_argument('--interval', type=float, default=5.0, help="Seconds per window of the timeline")
+    parser.add_argument('--record', type=Path, help="Save the request plan as JSON lines")
+    parser.add_argument('--replay', type=Path, help="Send a recorded plan instead of drawing one")
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed factor (default 1)")
+    parser.add_argument('--json', type=Path, help="Save the report as JSON")
+    parser.add_argument('--html', type=Path, help="Save the report as an HTML page")
+    args = parser.parse_args(argv)
+
+    if args.rps <= 0 or args.duration <= 0 or args.speed <= 0 or args.interval <= 0:
+        parser.error("--rps, --duration, --speed and --interval must be positive")
+
+    try:
+        report = asyncio.run(run(args))
+    except (ValueError, RuntimeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    if args.html:
+        args.html.write_text(format_html(report), encoding='utf-8')
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
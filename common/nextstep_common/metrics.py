@@ -0,0 +1,319 @@
+"""
+Prometheus metrics in the text exposition format.
+
+A small registry of counters, histograms and callback metrics (read when
+scraped) so the service needs no client library. Each worker process keeps
+its own registry and answers /metrics for itself; per-process samples such
+as the resident memory carry the worker's pid.
+
+Pipeline stages are timed with timed_stage(), requests by MetricsMiddleware.
+Stage timings are also collected per request while request_timings is set
+(see profiling.ServerTimingMiddleware).
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Media type of the text exposition format; the response adds the charset
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+# Upper bounds in seconds, from sub-millisecond lookups to slow exports
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (metric name suffix, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class Metric:
+    """Base class: a named metric with a fixed set of label names."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """Lines of the exposition format for this metric."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, labels, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    """A monotonically increasing count per label combination."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield '', dict(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets per label combination."""
+
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: [count per bucket (+ overflow), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][position] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of a block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield '_bucket', dict(labels, le=_format_value(bound)), cumulative
+            yield '_sum', labels, total
+            yield '_count', labels, cumulative
+
+
+class Callback(Metric):
+    """
+    A metric read when scraped.
+
+    fn returns a number, or (labels, value) pairs for labelled samples. A
+    failing or None-returning fn leaves the metric without samples.
+    """
+
+    def __init__(self, name: str, documentation: str, kind: str, fn: Callable[[], Any]):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self) -> Iterable[Sample]:
+        try:
+            result = self.fn()
+        except Exception:
+            return
+        if result is None:
+            return
+        if isinstance(result, (int, float)):
+            yield '', {}, result
+            return
+        for labels, value in result:
+            if value is not None:
+                yield '', {name: str(v) for name, v in labels.items()}, value
+
+
+class Registry:
+    """Metrics of this process, rendered in registration order."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric; registering a name again returns the existing metric."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, fn: Callable[[], Any]) -> Callback:
+        return self.register(Callback(name, documentation, 'gauge', fn))
+
+    def counter_callback(self, name: str, documentation: str, fn: Callable[[], Any]) -> Callback:
+        return self.register(Callback(name, documentation, 'counter', fn))
+
+    def render(self) -> str:
+        """All metrics in the text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident memory of this process in bytes, if the platform exposes it."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return None
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    'stage_duration_seconds',
+    'Time spent in each pipeline stage',
+    ['stage']
+)
+
+http_requests = registry.counter(
+    'http_requests_total',
+    'HTTP requests by route, method and response status',
+    ['endpoint', 'method', 'status']
+)
+
+http_request_seconds = registry.histogram(
+    'http_request_duration_seconds',
+    'Time from receiving a request to sending the end of its response',
+    ['endpoint', 'method']
+)
+
+registry.gauge_callback(
+    'process_resident_memory_bytes',
+    'Resident memory of the worker process',
+    lambda: [({'pid': os.getpid()}, process_rss_bytes())]
+)
+
+
+# Stage durations of the request being handled, when they are being collected
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('request_timings', default=None)
+
+
+def record_request_timing(stage: str, seconds: float) -> None:
+    """Add time spent in a stage to the current request's timings, if collected."""
+    timings = request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Time a block as a pipeline stage, for the histogram and the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stage_seconds.observe(seconds, stage=stage)
+        record_request_timing(stage, seconds)
+
+
+class MetricsMiddleware:
+    """
+    Count and time every HTTP request.
+
+    Requests are labelled with the path template of the route that served
+    them (e.g. /predict), or "unmatched", to keep the label set bounded.
+    Streaming responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._paths: Dict[int, str] = {}
+
+    def _endpoint(self, scope: dict) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        path = self._paths.get(id(endpoint))
+        if path is None:
+            router = scope['app'].router
+            for route in router.routes:
+                target = getattr(route, 'endpoint', None) or getattr(route, 'app', None)
+                self._paths[id(target)] = route.path
+            path = self._paths.get(id(endpoint), 'unmatched')
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            endpoint = self._endpoint(scope)
+            method = scope.get('method', '')
+            http_requests.inc(endpoint=endpoint, method=method, status=status[0])
+            http_request_seconds.observe(time.perf_counter() - start, endpoint=endpoint, method=method)
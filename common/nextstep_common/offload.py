@@ -0,0 +1,158 @@
+"""
+Bounded offloading of CPU-bound work from the event loop.
+
+Request handlers are coroutines; running pandas filtering or scoring in
+them directly blocks every other connection of the worker. WorkPool runs
+such calls on a fixed number of threads instead and admits at most
+max_queue more calls waiting for a thread. When the queue is full, or a
+call waited longer than queue_timeout for a thread, the request fails
+fast with PoolSaturated, which is answered as 503 with a Retry-After
+estimate, so latency stays bounded under load spikes instead of growing
+with the backlog.
+"""
+
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+
+class PoolSaturated(Exception):
+    """The work pool cannot take the call now; retry after retry_after seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    def response(self) -> JSONResponse:
+        """503 response telling the client when to retry."""
+        return JSONResponse(
+            content={"error": str(self), "retry_after": self.retry_after},
+            status_code=503,
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+
+class WorkPool:
+    """
+    A thread pool with admission control.
+
+    At most max_workers calls run at once and at most max_queue more wait.
+    Calls abandoned by their request (e.g. the client disconnected) before
+    they start are dropped.
+    """
+
+    # Weight of the latest call in the running average of call durations
+    SMOOTHING = 0.2
+
+    def __init__(self, max_workers: int, max_queue: int, queue_timeout: float = 0, name: str = 'work'):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.name = name
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._average_seconds = 0.1
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so that forked worker processes get their own threads
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog is expected to have drained."""
+        backlog = max(0, self._pending - self.max_workers + 1)
+        seconds = backlog * self._average_seconds / self.max_workers
+        return min(60, max(1, math.ceil(seconds)))
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise PoolSaturated("The server is busy; please retry shortly", self.retry_after())
+            self._pending += 1
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _call(self, submitted: float, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        start = time.perf_counter()
+        if self.queue_timeout and start - submitted > self.queue_timeout:
+            with self._lock:
+                self._timed_out += 1
+            raise PoolSaturated("The server is busy; please retry shortly", self.retry_after())
+
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._average_seconds += self.SMOOTHING * (seconds - self._average_seconds)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on the pool and wait for its result.
+
+        Args:
+            fn (Callable): Blocking function to run
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Any: The return value of fn
+
+        Raises:
+            PoolSaturated: The queue is full, or the call waited too long to start
+        """
+        self._admit()
+        # Run in a copy of the request's context, as asyncio.to_thread does
+        context = contextvars.copy_context()
+        try:
+            future = self._get_executor().submit(
+                context.run, self._call, time.perf_counter(), fn, args, kwargs
+            )
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the configuration, load and counters of the pool."""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'queue_timeout': self.queue_timeout,
+                'running': self._running,
+                'queued': self._pending - self._running,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'timed_out': self._timed_out,
+                'average_seconds': round(self._average_seconds, 4)
+            }
+
+    def shutdown(self) -> None:
+        """Stop the threads once the calls already submitted have finished."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
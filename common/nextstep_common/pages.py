@@ -0,0 +1,193 @@
+"""
+Prerendered HTML for the form page.
+
+Dropdown <option> lists are rendered once per dataset version (OptionList)
+instead of looping over every branch in the template on each request, and
+the complete home page is kept per dataset version and mount path (PageCache)
+and served with a strong ETag, so repeat visits get 304 Not Modified.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from markupsafe import Markup, escape
+
+
+class OptionList:
+    """
+    The values of one dropdown and their prerendered <option> elements.
+
+    render() marks a selected value by splicing one precomputed element into
+    the prerendered HTML, so a sticky form costs a string copy, not a loop.
+    """
+
+    __slots__ = ('values', 'html', '_spans')
+
+    def __init__(self, values: Sequence[str]):
+        self.values = list(values)
+
+        parts = []
+        self._spans: Dict[str, Tuple[int, int]] = {}
+        position = 0
+        for value in self.values:
+            option = f'<option value="{escape(value)}">{escape(value)}</option>'
+            # The first occurrence wins, as with the template loop
+            self._spans.setdefault(str(value), (position, position + len(option)))
+            parts.append(option)
+            position += len(option)
+        self.html = ''.join(parts)
+
+    def render(self, selected: Optional[str] = None) -> Markup:
+        """
+        Return the <option> elements with one value selected.
+
+        Args:
+            selected (str, optional): Value to mark as selected
+
+        Returns:
+            Markup: HTML safe to insert into the template
+        """
+        span = self._spans.get(str(selected)) if selected else None
+        if span is None:
+            return Markup(self.html)
+        start, end = span
+        value = escape(selected)
+        option = f'<option value="{value}" selected>{value}</option>'
+        return Markup(self.html[:start] + option + self.html[end:])
+
+
+def dropdown_context(dropdowns: Dict[str, OptionList], **selected: Optional[str]) -> Dict[str, Markup]:
+    """
+    Template variables for the dropdowns: "<field>_options" for every field.
+
+    Args:
+        dropdowns (Dict[str, OptionList]): Option lists by form field name
+        **selected: Selected value per form field
+
+    Returns:
+        Dict[str, Markup]: Rendered <option> elements per field
+    """
+    return {
+        f"{field}_options": options.render(selected.get(field))
+        for field, options in dropdowns.items()
+    }
+
+
+class RenderedPage:
+    """A rendered page body and its strong ETag."""
+
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+class PageCache:
+    """
+    Rendered pages for the current dataset version.
+
+    Pages are keyed by what else changes their content (e.g. the mount path
+    used for static links). Beyond max_entries the least recently used page
+    is dropped, so new variants are always cached. Seeing a newer dataset
+    version drops every page.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        # Least recently used first
+        self._pages: 'OrderedDict[Hashable, RenderedPage]' = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[RenderedPage]:
+        """Return the page rendered for key from this dataset version, or None."""
+        with self._lock:
+            page = self._pages.get(key) if version == self._version else None
+            if page is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._pages.move_to_end(key)
+        return page
+
+    def peek(self, key: Hashable, version: int) -> Optional[RenderedPage]:
+        """Like get(), but not counted as a hit or miss (for a second look after get())."""
+        with self._lock:
+            return self._pages.get(key) if version == self._version else None
+
+    def put(self, key: Hashable, version: int, body: bytes) -> RenderedPage:
+        """
+        Store a rendered page.
+
+        Args:
+            key (Hashable): Page variant
+            version (int): Dataset version the page was rendered from
+            body (bytes): Rendered HTML
+
+        Returns:
+            RenderedPage: The stored page with its ETag
+        """
+        page = RenderedPage(body)
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._pages = OrderedDict()
+                self._version = version
+            if version == self._version:
+                self._pages[key] = page
+                self._pages.move_to_end(key)
+                while len(self._pages) > self.max_entries:
+                    self._pages.popitem(last=False)
+        return page
+
+
+# Seconds a client is asked to wait while the data is still being loaded
+WARMING_UP_RETRY_AFTER = 5
+
+WARMING_UP_PAGE = (
+    '<!DOCTYPE html><html><head><meta charset="utf-8">'
+    f'<meta http-equiv="refresh" content="{WARMING_UP_RETRY_AFTER}">'
+    '<title>Loading</title></head>'
+    '<body><p>The service is starting up; this page reloads in a few seconds.</p></body></html>'
+)
+
+
+def warming_up_response() -> Response:
+    """503 loading page served until the data of a page is loaded."""
+    return Response(
+        content=WARMING_UP_PAGE,
+        status_code=503,
+        media_type='text/html; charset=utf-8',
+        headers={'Retry-After': str(WARMING_UP_RETRY_AFTER)}
+    )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+def page_response(request: Request, page: RenderedPage) -> Response:
+    """
+    Serve a rendered page, or 304 Not Modified if the client already has it.
+
+    Args:
+        request (Request): Incoming request
+        page (RenderedPage): Page to serve
+
+    Returns:
+        Response: HTML response with ETag and revalidation headers
+    """
+    headers = {'ETag': page.etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request.headers.get('if-none-match'), page.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type='text/html; charset=utf-8', headers=headers)
@@ -0,0 +1,251 @@
+"""
+Per-request stage timings and opt-in sampling profiles.
+
+ServerTimingMiddleware adds a Server-Timing header to every response with
+the time spent in each pipeline stage (see metrics.timed_stage) and the
+total time until the response started. Collecting it costs a context
+variable and a small dict per request.
+
+When PROFILE_TOKEN is set, a request to one of the profiled paths with
+?profile=tree (or ?profile=folded) and the token in the X-Profile-Token
+header is run under SamplingProfiler, and the call tree is returned as a
+downloadable text report instead of the normal response. Without the
+token nothing is sampled.
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs
+
+from .metrics import request_timings
+
+# (function name, file name, first line) of one frame
+FrameKey = Tuple[str, str, int]
+
+# Leaf frames of threads that are idle rather than working for a request
+IDLE_FRAMES = {
+    ('wait', 'threading.py'),
+    ('select', 'selectors.py'),
+    ('_worker', 'thread.py'),
+    ('get', 'queue.py'),
+}
+
+
+def _short_path(path: str) -> str:
+    """The last two components of a source path."""
+    parts = path.replace('\\', '/').split('/')
+    return '/'.join(parts[-2:])
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the Python stacks of all threads.
+
+    A background thread records the stack of every other thread each
+    interval; stacks of idle threads (waiting on a lock, queue or selector)
+    are dropped, so the samples show where the request spent its time,
+    whichever thread it ran on.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start = 0.0
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._start
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                code = frame.f_code
+                if (code.co_name, os.path.basename(code.co_filename)) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        """Stacks in the folded format read by flame graph tools."""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            names = ';'.join(f'{name} ({_short_path(path)}:{line})' for name, path, line in stack)
+            lines.append(f'{names} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def tree(self, min_share: float = 0.005) -> str:
+        """
+        The samples as an indented call tree.
+
+        Args:
+            min_share (float, optional): Hide calls with a smaller share of the samples
+
+        Returns:
+            str: One line per call: share, samples, function and location
+        """
+        total = sum(self.stacks.values())
+        if not total:
+            return 'No samples were taken while the request was running.\n'
+
+        root: Dict = {'count': 0, 'children': {}}
+        for stack, count in self.stacks.items():
+            node = root
+            for key in stack:
+                node = node['children'].setdefault(key, {'count': 0, 'children': {}})
+                node['count'] += count
+
+        lines: List[str] = []
+
+        def walk(node: Dict, depth: int) -> None:
+            children = sorted(node['children'].items(), key=lambda item: -item[1]['count'])
+            for (name, path, line), child in children:
+                if child['count'] / total < min_share:
+                    continue
+                lines.append(
+                    f"{100 * child['count'] / total:6.1f}% {child['count']:6d}  "
+                    f"{'  ' * depth}{name}  {_short_path(path)}:{line}"
+                )
+                walk(child, depth + 1)
+
+        walk(root, 0)
+        return '\n'.join(lines) + '\n'
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    """Format stage durations as a Server-Timing header value (milliseconds)."""
+    entries = [f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in timings.items()]
+    entries.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    Add Server-Timing headers, and profile single requests on demand.
+
+    Args:
+        app: The ASGI application
+        profile_paths (Sequence[str]): Paths that can be profiled
+        profile_token (str, optional): Token required to profile; None disables profiling
+        interval (float, optional): Seconds between profiler samples
+    """
+
+    def __init__(
+        self,
+        app,
+        profile_paths: Sequence[str] = (),
+        profile_token: Optional[str] = None,
+        interval: float = 0.001
+    ):
+        self.app = app
+        self.profile_paths = set(profile_paths)
+        self.profile_token = profile_token
+        self.interval = interval
+
+    def _profile_format(self, scope: dict) -> Optional[str]:
+        """The requested report format, if this request may be profiled."""
+        if not self.profile_token or b'profile=' not in scope.get('query_string', b''):
+            return None
+        if scope.get('path') not in self.profile_paths:
+            return None
+        # Compared as bytes: compare_digest rejects non-ASCII str
+        token = dict(scope.get('headers', [])).get(b'x-profile-token', b'')
+        if not hmac.compare_digest(token, self.profile_token.encode()):
+            return None
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        report = query.get('profile', ['tree'])[0]
+        return report if report in ('tree', 'folded') else 'tree'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        report = self._profile_format(scope)
+        if report is not None:
+            await self._profile(scope, receive, send, report)
+            return
+
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        token = request_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                header = server_timing(timings, time.perf_counter() - start)
+                message = dict(message, headers=list(message.get('headers', [])) + [
+                    (b'server-timing', header.encode('latin-1'))
+                ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
+
+    async def _profile(self, scope, receive, send, report: str) -> None:
+        """Run the request under the profiler and answer with the report."""
+        status = [None]
+        timings: Dict[str, float] = {}
+        token = request_timings.set(timings)
+
+        async def discard(message):
+            # The report replaces the response; only its status is kept
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+
+        profiler = SamplingProfiler(self.interval)
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+            request_timings.reset(token)
+
+        if report == 'folded':
+            body = profiler.folded()
+        else:
+            body = (
+                f"Profile of {scope.get('method')} {scope.get('path')} -> {status[0]}\n"
+                f"Duration: {profiler.duration * 1000:.1f} ms, {profiler.samples} samples "
+                f"every {self.interval * 1000:.1f} ms\n"
+                f"Server-Timing: {server_timing(timings, profiler.duration)}\n\n"
+                + profiler.tree()
+            )
+        name = scope.get('path', '').strip('/').replace('/', '-') or 'root'
+        filename = f"profile-{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt"
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/plain; charset=utf-8'),
+                (b'content-disposition', f'attachment; filename="{filename}"'.encode('latin-1')),
+                (b'server-timing', server_timing(timings, profiler.duration).encode('latin-1'))
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body.encode('utf-8')})
@@ -0,0 +1,119 @@
+"""
+Startup state and background warm-up.
+
+The server binds its port before the data is loaded: warm-up steps run in a
+background thread and StartupState records how long each one took. Liveness
+(/health) answers immediately; readiness (/ready) turns 200 once warm-up is
+done. See startup_profile for measuring a cold start.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+# Set when the service first imports this module, before anything else of
+# its app; the reference point for the phases
+IMPORTED_AT = time.perf_counter()
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, if the platform exposes it."""
+    try:
+        with open('/proc/self/stat') as f:
+            # The command name may contain spaces; fields resume after ')'
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except Exception:
+        return None
+
+
+class StartupState:
+    """
+    Readiness of the service and the duration of each startup phase.
+
+    The state moves from "starting" to "warming" when warm-up begins and to
+    "ready" or "failed" when it ends.
+    """
+
+    def __init__(self):
+        self.state = 'starting'
+        self.error: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.import_seconds: Optional[float] = None
+        self.process_age_at_import = process_age()
+        self.ready_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == 'ready'
+
+    @property
+    def warming(self) -> bool:
+        """Whether warm-up has not finished yet."""
+        return self.state in ('starting', 'warming')
+
+    def mark_imported(self) -> None:
+        """Record the time taken to import the application."""
+        self.import_seconds = time.perf_counter() - IMPORTED_AT
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record the duration of a phase measured elsewhere."""
+        with self._lock:
+            self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block as a named phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def run(self, warm_up: Callable[[], None]) -> None:
+        """Run the warm-up and record whether it succeeded."""
+        self.state = 'warming'
+        try:
+            warm_up()
+        except Exception as e:
+            self.error = str(e)
+            self.state = 'failed'
+            raise
+        self.ready_seconds = time.perf_counter() - IMPORTED_AT
+        self.state = 'ready'
+
+    def start(self, warm_up: Callable[[], None]) -> threading.Thread:
+        """Run the warm-up in a background thread."""
+        def target():
+            try:
+                self.run(warm_up)
+            except Exception:
+                # Logged by the caller's warm-up; the state carries the error
+                pass
+
+        thread = threading.Thread(target=target, name='warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def describe(self) -> dict:
+        """Return a JSON-serialisable summary of the startup."""
+        with self._lock:
+            phases = {name: round(seconds, 4) for name, seconds in self.phases.items()}
+        return {
+            'state': self.state,
+            'error': self.error,
+            'process_age_at_import': (
+                round(self.process_age_at_import, 3) if self.process_age_at_import is not None else None
+            ),
+            'import_seconds': round(self.import_seconds, 4) if self.import_seconds is not None else None,
+            'phases': phases,
+            'ready_seconds': round(self.ready_seconds, 4) if self.ready_seconds is not None else None
+        }
+
+
+startup_state = StartupState()
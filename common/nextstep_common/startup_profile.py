@@ -0,0 +1,130 @@
+"""
+Reproducible cold-start profile.
+
+Starts a fresh interpreter with -X importtime, imports the app, runs its
+warm-up synchronously and reports import time per module next to the
+warm-up phases (data load, index build, ...). Run from the service
+directory with:
+    python -m nextstep_common.startup_profile [--top 25] [--json]
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+PROFILE_MARKER = '--startup-profile--'
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def parse_import_times(stderr: str) -> List[dict]:
+    """
+    Parse the output of python -X importtime.
+
+    Returns:
+        List[dict]: {"module", "self_ms", "cumulative_ms", "depth"} per import
+    """
+    modules = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.append({
+                'module': module,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+                'depth': (len(indent) - 1) // 2
+            })
+    return modules
+
+
+def profile_cold_start(
+    module: str = 'app.main',
+    warm_up: str = 'warm_up',
+    service_dir: Optional[Path] = None
+) -> dict:
+    """
+    Start a fresh interpreter, import the app and run its warm-up synchronously.
+
+    Args:
+        module (str, optional): Module to import. Defaults to app.main.
+        warm_up (str, optional): Function in module that runs the warm-up
+        service_dir (Path, optional): Service directory to run in. Defaults to
+            the current directory.
+
+    Returns:
+        dict: {"wall_seconds", "imports": [...], "startup": StartupState.describe()}
+    """
+    code = (
+        "import json\n"
+        f"import {module} as m\n"
+        "from nextstep_common.startup import startup_state\n"
+        f"startup_state.run(m.{warm_up})\n"
+        f"print({PROFILE_MARKER!r} + json.dumps(startup_state.describe()))\n"
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=service_dir or Path.cwd(),
+        capture_output=True,
+        text=True
+    )
+    wall = time.perf_counter() - start
+
+    startup = None
+    for line in result.stdout.splitlines():
+        if line.startswith(PROFILE_MARKER):
+            startup = json.loads(line[len(PROFILE_MARKER):])
+    if result.returncode != 0 or startup is None:
+        raise RuntimeError(f"Profiling run failed:\n{result.stderr[-2000:]}")
+
+    return {
+        'python': sys.version.split()[0],
+        'wall_seconds': round(wall, 4),
+        'imports': parse_import_times(result.stderr),
+        'startup': startup
+    }
+
+
+def format_report(profile: dict, top: int = 25) -> str:
+    """Render a cold-start profile as text."""
+    imports = profile['imports']
+    total_ms = sum(m['self_ms'] for m in imports)
+    startup = profile['startup']
+    lines = [
+        f"Cold start profile (Python {profile['python']})",
+        f"  wall time (interpreter start to ready): {profile['wall_seconds']:.3f}s",
+        f"  interpreter start to app import: {startup['process_age_at_import']}s",
+        f"  app import: {startup['import_seconds']}s",
+        f"  imports: {len(imports)} modules, {total_ms / 1000:.3f}s",
+        "",
+        f"  {'cumulative ms':>14} {'self ms':>10}  module (top {top} by cumulative time)"
+    ]
+    for m in sorted(imports, key=lambda m: m['cumulative_ms'], reverse=True)[:top]:
+        lines.append(f"  {m['cumulative_ms']:>14.1f} {m['self_ms']:>10.1f}  {'  ' * m['depth']}{m['module']}")
+
+    lines += ["", "  warm-up phases:"]
+    for name, seconds in startup['phases'].items():
+        lines.append(f"  {seconds * 1000:>14.1f} ms  {name}")
+    lines.append(f"  ready {startup['ready_seconds']:.3f}s after the app package was imported")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile a cold start of the service")
+    parser.add_argument('--top', type=int, default=25, help="Number of imports to list")
+    parser.add_argument('--json', action='store_true', help="Print the raw profile as JSON")
+    args = parser.parse_args(argv)
+
+    profile = profile_cold_start()
+    print(json.dumps(profile, indent=2) if args.json else format_report(profile, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
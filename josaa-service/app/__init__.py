@@ -5,47 +5,60 @@ This package provides functionality for generating college preference lists
 based on JEE ranks and other criteria for JOSAA counselling.
 """
 
+import importlib
 import logging
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),  # Log to console
-        logging.FileHandler(  # Log to file
-            filename=Path(__file__).parent.parent / 'logs' / 'josaa_service.log',
-            mode='a'
-        )
-    ]
-)
+# Imported first so the startup profile measures from package import
+from nextstep_common import startup  # noqa: F401
 
 # Create logger for this package
 logger = logging.getLogger(__name__)
 
+LOG_FILE = Path(__file__).parent.parent / 'logs' / 'josaa_service.log'
+
+def configure_logging() -> None:
+    """Also log to logs/josaa_service.log; called when the server starts rather than on import."""
+    root = logging.getLogger()
+    if any(isinstance(h, logging.FileHandler) and Path(h.baseFilename) == LOG_FILE for h in root.handlers):
+        return
+    try:
+        LOG_FILE.parent.mkdir(exist_ok=True)
+        handler = logging.FileHandler(filename=LOG_FILE, mode='a')
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        root.addHandler(handler)
+    except Exception as e:
+        logger.warning(f"Could not set up file logging: {str(e)}")
+
 # Version info
 __version__ = "1.0.0"
 __author__ = "JARAWA"
 __email__ = "49.jayesh@gmail.com"
 
-# Import main components
-try:
-    from .main import app
-    from .models import PredictionInput, PredictionOutput
-    from .services import predict_preferences
-    from .utils import (
-        load_data,
-        get_unique_branches,
-        calculate_admission_probability,
-        get_admission_chances,
-        create_probability_plot
-    )
+# Main components, imported on first access so that importing the package
+# (e.g. for python -m app.compiled) does not start the app or load the data
+_EXPORTS = {
+    'app': '.main',
+    'PredictionInput': '.models',
+    'PredictionOutput': '.models',
+    'predict_preferences': '.services',
+    'load_data': '.utils',
+    'get_dataset': '.utils',
+    'get_unique_branches': '.utils',
+    'calculate_admission_probability': '.utils',
+    'calculate_admission_probability_batch': '.utils',
+    'get_admission_chances': '.utils',
+    'get_admission_chances_batch': '.utils',
+    'create_probability_plot': '.utils'
+}
 
-    logger.info(f"JOSAA Service initialized successfully (version {__version__})")
-except Exception as e:
-    logger.error(f"Error initializing JOSAA Service: {str(e)}", exc_info=True)
-    raise
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
 
 # Define what should be imported with "from app import *"
 __all__ = [
@@ -54,19 +67,15 @@ __all__ = [
     'PredictionOutput',
     'predict_preferences',
     'load_data',
+    'get_dataset',
     'get_unique_branches',
     'calculate_admission_probability',
+    'calculate_admission_probability_batch',
     'get_admission_chances',
+    'get_admission_chances_batch',
     'create_probability_plot'
 ]
 
-# Create necessary directories
-try:
-    log_dir = Path(__file__).parent.parent / 'logs'
-    log_dir.mkdir(exist_ok=True)
-except Exception as e:
-    logger.warning(f"Could not create log directory: {str(e)}")
-
 # Package metadata
 metadata = {
     'name': 'josaa_service',
@@ -111,17 +120,3 @@ def check_dependencies():
         logger.warning(f"Missing dependencies: {', '.join(missing)}")
         return False
     return True
-
-# Run dependency check on import
-if not check_dependencies():
-    logger.warning("Some dependencies are missing. Please install all required packages.")
-
-# Initialize data loading
-try:
-    initial_data = load_data()
-    if initial_data.empty:
-        logger.warning("Initial data loading failed or returned empty dataset")
-    else:
-        logger.info(f"Successfully loaded initial dataset with {len(initial_data)} records")
-except Exception as e:
-    logger.error(f"Error during initial data loading: {str(e)}", exc_info=True)
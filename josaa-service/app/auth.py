@@ -1,7 +1,9 @@
 import json
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional
 import os
+import sqlite3
+import threading
 import jwt
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
@@ -28,45 +30,136 @@ class User(BaseModel):
     full_name: str
     hashed_password: str
 
+# Users are kept in SQLite; users.json is the format they were kept in before
+USERS_DB = Path(os.getenv("JOSAA_USERS_DB") or Path(__file__).parent.parent / 'data' / 'users.db')
+LEGACY_USERS_FILE = Path(__file__).parent.parent / 'data' / 'users.json'
+
 class UserStorage:
-    def __init__(self):
-        self.file_path = Path(__file__).parent.parent / 'data' / 'users.json'
-        self.users: Dict[str, dict] = self._load_users()
+    """
+    Users in a SQLite database, shared safely by threads and worker processes.
+
+    The database runs in WAL mode, so readers never wait for a writer. Every
+    write is a single statement in its own transaction, keyed by the email
+    primary key: a lookup is one index probe, and two registrations of the
+    same email cannot both succeed. Each thread uses its own connection.
+
+    On first use, the users of the old users.json file are copied into the
+    database once and the file is renamed to users.json.migrated.
+    """
+
+    def __init__(self, db_path: Path = USERS_DB, legacy_path: Optional[Path] = LEGACY_USERS_FILE, timeout: float = 30.0):
+        """
+        Args:
+            db_path (Path, optional): SQLite database file
+            legacy_path (Path, optional): users.json to migrate from, if it exists
+            timeout (float, optional): Seconds to wait for another process's write
+        """
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._initialise()
+        if legacy_path is not None and Path(legacy_path).exists():
+            self.migrate_json(Path(legacy_path))
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit: single statements commit on their own, and
+            # migrate_json opens its transaction explicitly
+            connection = sqlite3.connect(str(self.db_path), timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _initialise(self) -> None:
+        """Create the database and its table if they do not exist."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = self._connect()
+        # Persistent setting of the database file; later connections inherit it
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            " email TEXT PRIMARY KEY,"
+            " full_name TEXT NOT NULL,"
+            " hashed_password TEXT NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    def migrate_json(self, path: Path) -> int:
+        """
+        Copy the users of a users.json file into the database, once.
+
+        Users already in the database are kept. The copy is one transaction;
+        after it the file is renamed so that later starts (and the other
+        workers) skip it.
 
-    def _load_users(self) -> Dict[str, dict]:
-        """Load users from JSON file."""
+        Args:
+            path (Path): users.json file ({email: {email, full_name, hashed_password}})
+
+        Returns:
+            int: Number of users added
+        """
         try:
-            if self.file_path.exists():
-                with open(self.file_path, 'r') as f:
-                    return json.load(f)
-            return {}
+            with open(path, 'r') as f:
+                users = json.load(f)
+            rows = [
+                (email, data['full_name'], data['hashed_password'])
+                for email, data in users.items()
+            ]
+        except FileNotFoundError:
+            # Another worker migrated it first
+            return 0
         except Exception as e:
-            logger.error(f"Error loading users: {str(e)}")
-            return {}
+            logger.error(f"Error reading {path} for migration: {str(e)}")
+            return 0
 
-    def _save_users(self) -> bool:
-        """Save users to JSON file."""
+        connection = self._connect()
         try:
-            self.file_path.parent.mkdir(exist_ok=True)
-            with open(self.file_path, 'w') as f:
-                json.dump(self.users, f)
-            return True
+            connection.execute("BEGIN IMMEDIATE")
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO users (email, full_name, hashed_password) VALUES (?, ?, ?)",
+                rows
+            )
+            added = connection.total_changes - before
+            connection.execute("COMMIT")
         except Exception as e:
-            logger.error(f"Error saving users: {str(e)}")
-            return False
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            logger.error(f"Error migrating users from {path}: {str(e)}")
+            return 0
+
+        try:
+            path.replace(path.with_name(f"{path.name}.migrated"))
+        except OSError:
+            pass
+        logger.info(f"Migrated {added} of {len(rows)} users from {path} to {self.db_path}")
+        return added
 
     def get_user(self, email: str) -> Optional[User]:
         """Get user by email."""
-        user_data = self.users.get(email)
-        if user_data:
-            return User(**user_data)
+        try:
+            row = self._connect().execute(
+                "SELECT email, full_name, hashed_password FROM users WHERE email = ?", (email,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error loading user: {str(e)}")
+            return None
+        if row:
+            return User(email=row[0], full_name=row[1], hashed_password=row[2])
         return None
 
     def add_user(self, user: User) -> bool:
-        """Add new user."""
+        """Add new user; False if the email is already registered."""
         try:
-            self.users[user.email] = user.dict()
-            return self._save_users()
+            self._connect().execute(
+                "INSERT INTO users (email, full_name, hashed_password) VALUES (?, ?, ?)",
+                (user.email, user.full_name, user.hashed_password)
+            )
+            return True
+        except sqlite3.IntegrityError:
+            return False
         except Exception as e:
             logger.error(f"Error adding user: {str(e)}")
             return False
@@ -74,10 +167,11 @@ class UserStorage:
     def update_user(self, user: User) -> bool:
         """Update existing user."""
         try:
-            if user.email not in self.users:
-                return False
-            self.users[user.email] = user.dict()
-            return self._save_users()
+            cursor = self._connect().execute(
+                "UPDATE users SET full_name = ?, hashed_password = ? WHERE email = ?",
+                (user.full_name, user.hashed_password, user.email)
+            )
+            return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Error updating user: {str(e)}")
             return False
@@ -85,14 +179,16 @@ class UserStorage:
     def delete_user(self, email: str) -> bool:
         """Delete user."""
         try:
-            if email not in self.users:
-                return False
-            del self.users[email]
-            return self._save_users()
+            cursor = self._connect().execute("DELETE FROM users WHERE email = ?", (email,))
+            return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Error deleting user: {str(e)}")
             return False
 
+    def count(self) -> int:
+        """Number of registered users."""
+        return self._connect().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
 # Initialize user storage
 user_storage = UserStorage()
 
@@ -134,7 +230,7 @@ async def register_user(email: str, password: str, full_name: str) -> bool:
             hashed_password=hashed_password
         )
         
-        # Save user
+        # Save user; fails if the same email registered in the meantime
         return user_storage.add_user(user)
     except Exception as e:
         logger.error(f"Error registering user: {str(e)}")
@@ -0,0 +1,389 @@
+"""
+Benchmarks of the prediction hot paths on synthetic cutoff data.
+
+For every scale two synthetic years of cutoffs (see app.synthetic) are
+written to the data directory, or reused if they are already there, and
+the service is pointed at them. Each case is then run for a number of iterations and its
+throughput and p50/p95/p99 latency are reported. Prediction inputs vary
+from one iteration to the next and the prediction cache is cleared
+before each call, so every call does the full work.
+
+Results can be saved as JSON and compared with a saved baseline; a case
+whose p95 latency grew by more than the threshold is reported as a
+regression and the run exits with status 1. Run from the service
+directory with:
+    python -m app.benchmark --scale 1 10 --output bench.json
+    python -m app.benchmark --scale 1 10 --baseline bench.json
+"""
+
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+SERVICE_DIR = Path(__file__).parent.parent
+DATA_DIR = SERVICE_DIR / 'data' / 'benchmark'
+
+# A case whose p95 latency grew by more than this share is a regression
+DEFAULT_THRESHOLD = 0.2
+
+# Synthetic years per scale; the last one is the default year
+YEARS = (2023, 2024)
+
+
+class Case:
+    """
+    One benchmarked operation.
+
+    Args:
+        name (str): Case name, unique within a scale
+        fn (Callable[[int], object]): The timed call, given the iteration number
+        iterations (int): Iterations to run
+        before (Callable[[int], object], optional): Untimed preparation before each call
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[int], object],
+        iterations: int,
+        before: Optional[Callable[[int], object]] = None
+    ):
+        self.name = name
+        self.fn = fn
+        self.iterations = iterations
+        self.before = before
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """The q-th percentile (0-100) of values, interpolating between samples."""
+    return float(np.percentile(np.asarray(values, dtype=float), q))
+
+
+def measure(case: Case, warmup: int = 1, max_seconds: float = 30.0) -> dict:
+    """
+    Run a case and summarise its latencies.
+
+    Args:
+        case (Case): Case to run
+        warmup (int, optional): Untimed calls before measuring. Defaults to 1.
+        max_seconds (float, optional): Stop early once the timed calls took this long
+
+    Returns:
+        dict: Iterations, throughput (calls per second) and latencies in milliseconds
+    """
+    for i in range(warmup):
+        if case.before:
+            case.before(i)
+        case.fn(i)
+
+    latencies = []
+    for i in range(case.iterations):
+        if case.before:
+            case.before(i)
+        start = time.perf_counter()
+        case.fn(i)
+        latencies.append(time.perf_counter() - start)
+        if sum(latencies) > max_seconds:
+            break
+
+    total = sum(latencies)
+    return {
+        'iterations': len(latencies),
+        'throughput': round(len(latencies) / total, 3) if total else None,
+        'mean_ms': round(1000 * total / len(latencies), 4),
+        'p50_ms': round(1000 * percentile(latencies, 50), 4),
+        'p95_ms': round(1000 * percentile(latencies, 95), 4),
+        'p99_ms': round(1000 * percentile(latencies, 99), 4),
+        'max_ms': round(1000 * max(latencies), 4)
+    }
+
+
+def dataset_dir(data_dir: Path, scale: float, seed: int) -> Path:
+    """Directory of the synthetic cutoff files of a scale, written if they do not exist yet."""
+    from .synthetic import write_cutoffs
+    from .utils import DATA_FILE_PATTERN
+
+    path = data_dir / f"josaa_synthetic_x{scale:g}_seed{seed}"
+    for n, year in enumerate(YEARS):
+        year_path = path / DATA_FILE_PATTERN.format(year=year)
+        if not year_path.exists():
+            write_cutoffs(year_path, scale, seed + len(YEARS) - 1 - n)
+    return path
+
+
+def build_cases(data_dir: Path, iterations: int, seed: int) -> List[Case]:
+    """
+    Point the service at a directory of cutoff files and build the cases for it.
+
+    Args:
+        data_dir (Path): Directory of synthetic cutoff files, one per year
+        iterations (int): Iterations per prediction case
+        seed (int): Seed for the prediction inputs
+
+    Returns:
+        List[Case]: Cases in the order they are run
+    """
+    from starlette.requests import Request
+
+    from . import main, utils
+    from .models import PredictionInput
+    from nextstep_common.pages import dropdown_context
+    from .services import predict_preferences as service_predict_preferences
+    from .services import predict_preferences_batch
+
+    # The benchmark's own registry replaces the one for the deployed data files
+    utils.registry.stop_watchers()
+    utils.registry = utils.create_registry(data_dir, default_year=YEARS[-1], poll_interval=0)
+    utils.data_store = utils.registry.store()
+    utils.prediction_cache.clear()
+    # Compile the snapshots now rather than in the first timed call
+    snapshot = utils.get_view(YEARS).snapshots[-1]
+    table = snapshot.data
+
+    rng = np.random.default_rng(seed)
+    programs = [p for p in table["Academic Program Name"].values if p != "Unknown"]
+    inputs = [
+        {
+            "jee_rank": int(rng.integers(100, 200000)),
+            "category": str(rng.choice(utils.CATEGORIES)),
+            "college_type": str(rng.choice(utils.COLLEGE_TYPES)),
+            # Most candidates keep the default of all programs
+            "preferred_branch": str(rng.choice(programs)) if rng.random() < 0.3 else "All",
+            "round_no": str(rng.choice(utils.ROUNDS))
+        }
+        for _ in range(max(iterations, 100))
+    ]
+
+    def clear_cache(i: int) -> None:
+        utils.prediction_cache.clear()
+
+    def predict(i: int) -> dict:
+        return utils.predict_preferences(**inputs[i % len(inputs)], max_results=main.PAGE_SIZE)
+
+    def predict_years(i: int) -> dict:
+        return utils.predict_preferences(**inputs[i % len(inputs)], max_results=main.PAGE_SIZE, years=YEARS)
+
+    def predict_all_rounds(i: int) -> dict:
+        values = {**inputs[i % len(inputs)], "round_no": utils.ALL_ROUNDS}
+        return utils.predict_preferences(**values, max_results=main.PAGE_SIZE)
+
+    def predict_page(i: int) -> dict:
+        return utils.predict_preferences_page(**inputs[i % len(inputs)], page_size=main.PAGE_SIZE)
+
+    def service_predict(i: int):
+        return service_predict_preferences(**inputs[i % len(inputs)], min_probability=30.0)
+
+    batch = [PredictionInput(**values, min_probability=30.0) for values in inputs[:100]]
+
+    def predict_batch(i: int) -> list:
+        return list(predict_preferences_batch(batch))
+
+    # Scalar probability of 1000 (rank, program) pairs per call, for programs with known ranks
+    ranked = np.flatnonzero(np.asarray(table.closing_rank) < 9999999)
+    sample = rng.choice(ranked, 1000)
+    pairs = list(zip(
+        rng.integers(100, 200000, 1000).tolist(),
+        table.opening_rank[sample].astype(float).tolist(),
+        table.closing_rank[sample].astype(float).tolist()
+    ))
+
+    # Ranks far past a narrow program's closing rank overflow math.exp, which
+    # utils logs as an error with a traceback; those are kept out of the output
+    utils_logger = logging.getLogger(utils.__name__)
+
+    def probability(i: int) -> None:
+        level = utils_logger.level
+        utils_logger.setLevel(logging.CRITICAL)
+        try:
+            for rank, opening, closing in pairs:
+                utils.calculate_admission_probability(rank, opening, closing)
+        finally:
+            utils_logger.setLevel(level)
+
+    opening_ranks = np.asarray(table.opening_rank, dtype=float)
+    closing_ranks = np.asarray(table.closing_rank, dtype=float)
+
+    def probability_batch(i: int) -> np.ndarray:
+        return utils.calculate_admission_probability_batch(inputs[i % len(inputs)]["jee_rank"], opening_ranks, closing_ranks)
+
+    request = Request({
+        "type": "http", "app": main.app, "router": main.app.router, "method": "POST",
+        "path": "/predict", "root_path": "", "scheme": "http", "server": ("localhost", 8000),
+        "headers": [], "query_string": b""
+    })
+    template = main.templates.get_template("index.html")
+    dropdowns = utils.get_dropdowns(snapshot)
+
+    def page_context(values: dict) -> dict:
+        results = utils.predict_preferences(**values, max_results=main.PAGE_SIZE)
+        return {
+            "request": request,
+            "predictions": results["predictions"],
+            "plot_data": results["plot_data"],
+            **dropdown_context(
+                dropdowns,
+                category=values["category"],
+                college_type=values["college_type"],
+                preferred_branch=values["preferred_branch"],
+                round_no=values["round_no"]
+            ),
+            **values,
+            "min_probability": 30.0
+        }
+
+    # Only the rendering is timed
+    contexts = [page_context(values) for values in inputs[:100]]
+
+    def render_page(i: int) -> str:
+        return template.render(contexts[i % len(contexts)])
+
+    return [
+        Case("load_data.csv", lambda i: utils.parse_dataset(utils.data_store.path), max(3, iterations // 20)),
+        Case("load_data", lambda i: utils.load_data(force_reload=True), max(3, iterations // 10)),
+        Case("predict_preferences", predict, iterations, clear_cache),
+        Case(f"predict_preferences[{len(YEARS)} years]", predict_years, iterations, clear_cache),
+        Case("predict_preferences[all rounds]", predict_all_rounds, iterations, clear_cache),
+        Case("predict_preferences_page", predict_page, iterations, clear_cache),
+        Case("services.predict_preferences", service_predict, iterations, clear_cache),
+        Case("services.predict_preferences_batch[100]", predict_batch, max(3, iterations // 20), clear_cache),
+        Case("calculate_admission_probability[1000]", probability, max(3, iterations // 10)),
+        Case("calculate_admission_probability_batch", probability_batch, iterations),
+        Case("template_render", render_page, iterations)
+    ]
+
+
+def run_benchmarks(
+    scales: Sequence[float],
+    data_dir: Path = DATA_DIR,
+    iterations: int = 200,
+    seed: int = 0,
+    max_seconds: float = 30.0,
+    only: Optional[Sequence[str]] = None
+) -> dict:
+    """
+    Run every case at every scale.
+
+    Args:
+        scales (Sequence[float]): Dataset sizes relative to one year's file
+        data_dir (Path, optional): Where the synthetic datasets are kept
+        iterations (int, optional): Iterations per prediction case. Defaults to 200.
+        seed (int, optional): Seed for the data and the inputs. Defaults to 0.
+        max_seconds (float, optional): Time limit per case
+        only (Sequence[str], optional): Run only cases whose name contains one of these
+
+    Returns:
+        dict: Environment and {"<case>@x<scale>": measurement} results
+    """
+    from .utils import get_dataset
+
+    results = {}
+    for scale in scales:
+        path = dataset_dir(data_dir, scale, seed)
+        cases = build_cases(path, iterations, seed)
+        rows = len(get_dataset())
+        for case in cases:
+            if only and not any(name in case.name for name in only):
+                continue
+            result = measure(case, max_seconds=max_seconds)
+            result['rows'] = rows
+            results[f"{case.name}@x{scale:g}"] = result
+            print(f"  {case.name}@x{scale:g}: p50 {result['p50_ms']:.2f} ms", file=sys.stderr)
+
+    return {
+        'service': 'josaa',
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'seed': seed,
+        'results': results
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """
+    Compare results with a baseline run.
+
+    Args:
+        current (dict): Output of run_benchmarks()
+        baseline (dict): An earlier output of run_benchmarks()
+        threshold (float, optional): Allowed relative growth of the p95 latency
+
+    Returns:
+        List[dict]: {"case", "baseline_p95_ms", "p95_ms", "change", "regression"} per common case
+    """
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or not before.get('p95_ms'):
+            continue
+        change = result['p95_ms'] / before['p95_ms'] - 1
+        rows.append({
+            'case': name,
+            'baseline_p95_ms': before['p95_ms'],
+            'p95_ms': result['p95_ms'],
+            'change': round(change, 4),
+            'regression': change > threshold
+        })
+    return rows
+
+
+def format_report(report: dict, comparison: Optional[List[dict]] = None) -> str:
+    """Render results, and their comparison with a baseline, as a text table."""
+    changes = {row['case']: row for row in comparison or []}
+    lines = [
+        f"JOSAA benchmarks (Python {report['python']}, numpy {report['numpy']}, seed {report['seed']})",
+        f"  {'case':<48} {'rows':>9} {'calls/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}  vs baseline"
+    ]
+    for name, result in report['results'].items():
+        row = changes.get(name)
+        change = ''
+        if row:
+            change = f"{row['change']:+.1%}" + ('  REGRESSION' if row['regression'] else '')
+        lines.append(
+            f"  {name:<48} {result['rows']:>9} {result['throughput'] or 0:>10.1f} "
+            f"{result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} {result['p99_ms']:>10.2f}  {change}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the JOSAA hot paths on synthetic data")
+    parser.add_argument('--scale', type=float, nargs='+', default=[1.0],
+                        help="Dataset sizes relative to one year's file, e.g. 1 10 100 (default 1)")
+    parser.add_argument('--iterations', type=int, default=200, help="Iterations per prediction case")
+    parser.add_argument('--max-seconds', type=float, default=30.0, help="Time limit per case")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the data and the inputs")
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR, help="Where synthetic datasets are kept")
+    parser.add_argument('--only', nargs='+', help="Run only cases whose name contains one of these")
+    parser.add_argument('-o', '--output', type=Path, help="Save the results as JSON")
+    parser.add_argument('--baseline', type=Path, help="Compare with results saved by an earlier run")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative growth of p95 latency (default 0.2)")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    # Per-call logging (e.g. of searches without matches) would dominate the timings
+    logging.disable(logging.WARNING)
+
+    report = run_benchmarks(args.scale, args.data_dir, args.iterations, args.seed, args.max_seconds, args.only)
+    comparison = None
+    if args.baseline:
+        comparison = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report, comparison))
+    return 1 if comparison and any(row['regression'] for row in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
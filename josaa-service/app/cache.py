@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def prediction_key(
+    jee_rank: int,
+    category: str,
+    college_type: str,
+    preferred_branch: str,
+    round_no: str,
+    min_probability: float,
+    fold_case: bool = True
+) -> Tuple:
+    """
+    Build the cache key of a prediction request.
+
+    Args:
+        jee_rank (int): Candidate's JEE rank
+        category (str): Reservation category
+        college_type (str): Type of college
+        preferred_branch (str): Preferred academic program
+        round_no (str): Counseling round number
+        min_probability (float): Minimum admission probability
+        fold_case (bool, optional): Case-fold the filter values. Only valid when
+            the prediction itself compares them case-insensitively.
+
+    Returns:
+        Tuple: Hashable key
+    """
+    values = (str(category).strip(), str(college_type).strip(), str(preferred_branch).strip(), str(round_no).strip())
+    if fold_case:
+        values = tuple(v.casefold() for v in values)
+    return (int(jee_rank),) + values + (float(min_probability),)
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'expires')
+
+    def __init__(self, value: Any, size: int, expires: float):
+        self.value = value
+        self.size = size
+        self.expires = expires
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of prediction results for one dataset version.
+
+    Entries expire after `ttl` seconds, and the least recently used entries
+    are evicted once either `max_entries` or the total `max_rows` (the sum of
+    the sizes given to put()) is exceeded. All entries are dropped as soon as
+    a newer dataset version is seen, so results never outlive the snapshot
+    they were computed from. Cached values are shared between callers and
+    must not be mutated.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_rows: int = 200000,
+        ttl: float = 600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            max_entries (int, optional): Maximum number of cached results. 0 disables the cache.
+            max_rows (int, optional): Maximum total size of the cached results
+            ttl (float, optional): Seconds an entry stays valid. 0 means no expiry.
+            clock (Callable, optional): Time source, in seconds
+        """
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.clock = clock
+
+        self._entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._rows = 0
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: int) -> bool:
+        """Drop everything on a newer version; False for a superseded version. Must hold the lock."""
+        if self._version is None or version > self._version:
+            if self._entries:
+                self.invalidations += len(self._entries)
+                logger.info(f"Dataset version {version} active; dropping {len(self._entries)} cached predictions")
+            self._entries.clear()
+            self._rows = 0
+            self._version = version
+        return version == self._version
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        """
+        Return the cached result for key, or None.
+
+        Args:
+            key (Hashable): Request key, e.g. from prediction_key()
+            version (int): Version of the dataset snapshot serving the request
+
+        Returns:
+            Optional[Any]: Cached value, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(version) else None
+            if entry is not None and self.ttl > 0 and entry.expires <= self.clock():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(self, key: Hashable, version: int, value: Any, size: int = 1) -> None:
+        """
+        Store a result computed from the given dataset version.
+
+        Args:
+            key (Hashable): Request key
+            version (int): Version of the snapshot the value was computed from
+            value (Any): Result to cache
+            size (int, optional): Size counted against max_rows, e.g. the number of rows
+        """
+        if not self.enabled or size > self.max_rows:
+            return
+
+        with self._lock:
+            if not self._check_version(version):
+                return
+
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, size, self.clock() + self.ttl)
+            self._rows += size
+
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry. Must hold the lock."""
+        entry = self._entries.pop(key)
+        self._rows -= entry.size
+
+    def clear(self) -> None:
+        """Drop all entries; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable snapshot of the counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'rows': self._rows,
+                'max_entries': self.max_entries,
+                'max_rows': self.max_rows,
+                'ttl': self.ttl,
+                'dataset_version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
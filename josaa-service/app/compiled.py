@@ -0,0 +1,45 @@
+"""
+Build step: compile the JOSAA cutoff CSVs into memory-mapped snapshots.
+
+The snapshot format lives in nextstep_common.compiled. JOSAA compiles with
+narrow=True, so the ranks are stored as the int32 columns its table keeps
+and are used straight from the map.
+
+Compile from the service directory with:
+    python -m app.compiled [path/to/cutoff.csv ...]
+"""
+
+import logging
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from nextstep_common.compiled import compile_frame
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compile the given CSV files, or the service's cutoff files of every year by default."""
+    from .utils import PREPROCESS_REVISION, parse_dataset, registry
+
+    paths = [Path(p) for p in (argv if argv is not None else sys.argv[1:])] or list(registry.paths.values())
+    status = 0
+    for path in paths:
+        if not path.exists():
+            # Not an error: the service compiles the snapshot on its first
+            # load, once the file is there (or fetches the data instead)
+            logger.warning(f"File not found, not compiled: {path}")
+            continue
+
+        df = parse_dataset(path)
+        if df.empty:
+            logger.error(f"No data parsed from {path}")
+            status = 1
+            continue
+        compile_frame(df, path, PREPROCESS_REVISION, narrow=True)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
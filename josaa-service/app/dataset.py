@@ -0,0 +1,272 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from nextstep_common.compiled import file_digest
+
+logger = logging.getLogger(__name__)
+
+# (mtime_ns, size) of the source file; None when the file does not exist
+FileSignature = Optional[Tuple[int, int]]
+
+
+def file_signature(path: Path) -> FileSignature:
+    """
+    Cheap change detector for a file.
+
+    Args:
+        path (Path): File to inspect
+
+    Returns:
+        FileSignature: (mtime_ns, size) or None if the file is missing
+    """
+    try:
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+class DatasetSnapshot:
+    """
+    Immutable, versioned view of the cutoff data.
+
+    A snapshot is built once and then shared by every request. It must never
+    be mutated in place; callers that need to modify the data work on a copy.
+    Values derived from the data (lookup lists, decoded frames) are memoised
+    on the snapshot with derive(), so they are dropped with it on reload.
+    """
+
+    __slots__ = ('data', 'version', 'digest', 'source', 'loaded_at', 'load_seconds', '_derived', '_derive_lock')
+
+    def __init__(
+        self,
+        data: Any,
+        version: int,
+        digest: Optional[str],
+        source: Optional[Path],
+        load_seconds: float
+    ):
+        self.data = data
+        self.version = version
+        self.digest = digest
+        self.source = source
+        self.loaded_at = datetime.now()
+        self.load_seconds = load_seconds
+        self._derived: Dict[str, Any] = {}
+        self._derive_lock = threading.Lock()
+
+    def derive(self, name: str, builder: Callable[[Any], Any]) -> Any:
+        """
+        Return a value computed from the data, building it once per snapshot.
+
+        Args:
+            name (str): Cache key for the derived value
+            builder (Callable): Computes the value from the snapshot data
+
+        Returns:
+            Any: The derived value
+        """
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+
+        with self._derive_lock:
+            if name not in self._derived:
+                self._derived[name] = builder(self.data)
+            return self._derived[name]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def describe(self) -> dict:
+        """Return a JSON-serialisable summary of the snapshot."""
+        return {
+            'version': self.version,
+            'digest': self.digest,
+            'source': str(self.source) if self.source else None,
+            'records': len(self.data),
+            'loaded_at': self.loaded_at.isoformat(),
+            'load_seconds': round(self.load_seconds, 4)
+        }
+
+
+class DatasetStore:
+    """
+    Holds the current DatasetSnapshot for a source file.
+
+    The first call to get() builds the snapshot; afterwards readers only
+    dereference the current snapshot and never wait. refresh() builds a new
+    snapshot off to the side and swaps it in with a single reference
+    assignment, so requests in flight keep using the snapshot they started
+    with.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        loader: Callable[[Path], Any],
+        poll_interval: float = 30.0,
+        prepare: Optional[Callable[[DatasetSnapshot], None]] = None,
+        on_swap: Optional[Callable[[DatasetSnapshot, Optional[DatasetSnapshot]], None]] = None
+    ):
+        """
+        Args:
+            path (Path): Source file to watch
+            loader (Callable): Reads the source into the snapshot data; must
+                return an object supporting len()
+            poll_interval (float, optional): Seconds between change checks made
+                by the background watcher. 0 disables the watcher.
+            prepare (Callable, optional): Called with each new snapshot before
+                it is published, e.g. to build indexes with derive()
+            on_swap (Callable, optional): Called with each new snapshot and the
+                one it replaced (None on the first load) after it is published
+        """
+        self.path = path
+        self.loader = loader
+        self.poll_interval = poll_interval
+        self.prepare = prepare
+        self.on_swap = on_swap
+
+        self._snapshot: Optional[DatasetSnapshot] = None
+        self._signature: FileSignature = None
+        self._version = 0
+        # Serialises builds only; readers never take this lock once loaded
+        self._build_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether a snapshot has been built."""
+        return self._snapshot is not None
+
+    def peek(self) -> Optional[DatasetSnapshot]:
+        """Return the current snapshot without triggering a load."""
+        return self._snapshot
+
+    def get(self) -> DatasetSnapshot:
+        """
+        Return the current snapshot, building it on first use.
+
+        Returns:
+            DatasetSnapshot: Current snapshot
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with self._build_lock:
+            if self._snapshot is None:
+                self._swap(self._build(file_signature(self.path), file_digest(self.path)))
+            return self._snapshot
+
+    def unload(self) -> None:
+        """
+        Drop the current snapshot; the next get() loads the file again.
+
+        Requests holding the snapshot keep using it. Versions continue from
+        the dropped snapshot's, so a reloaded snapshot is never mistaken for it.
+        """
+        with self._build_lock:
+            self._snapshot = None
+            self._signature = None
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Rebuild the snapshot if the source file changed.
+
+        The (mtime, size) signature is checked first; the file is only hashed
+        when it differs, and the data is only reloaded when the hash differs.
+
+        Args:
+            force (bool, optional): Reload even if the file is unchanged
+
+        Returns:
+            bool: True if a new snapshot was swapped in
+        """
+        with self._build_lock:
+            current = self._snapshot
+            # An empty snapshot means the last load failed, so always retry it
+            settled = current is not None and len(current) > 0
+
+            signature = file_signature(self.path)
+            if not force and settled and signature == self._signature:
+                return False
+
+            digest = file_digest(self.path)
+            if not force and settled and digest is not None and digest == current.digest:
+                # Touched but not modified
+                self._signature = signature
+                return False
+
+            snapshot = self._build(signature, digest)
+            if current is not None and len(snapshot) == 0 and len(current) > 0:
+                logger.error(f"Reload of {self.path} produced no data; keeping version {current.version}")
+                self._signature = signature
+                return False
+
+            self._swap(snapshot)
+            return True
+
+    def _build(self, signature: FileSignature, digest: Optional[str]) -> DatasetSnapshot:
+        """Load the source into a new snapshot. Must hold the build lock."""
+        start = time.perf_counter()
+        data = self.loader(self.path)
+        elapsed = time.perf_counter() - start
+
+        self._signature = signature
+        snapshot = DatasetSnapshot(
+            data=data,
+            version=self._version + 1,
+            digest=digest,
+            source=self.path if signature is not None else None,
+            load_seconds=elapsed
+        )
+        if self.prepare and len(snapshot):
+            self.prepare(snapshot)
+        return snapshot
+
+    def _swap(self, snapshot: DatasetSnapshot) -> None:
+        """Publish a new snapshot. Must hold the build lock."""
+        previous = self._snapshot
+        self._version = snapshot.version
+        self._snapshot = snapshot
+        logger.info(
+            f"Dataset version {snapshot.version} active: {len(snapshot)} records "
+            f"loaded in {snapshot.load_seconds:.3f}s"
+        )
+        if self.on_swap:
+            self.on_swap(snapshot, previous)
+
+    def start_watcher(self) -> None:
+        """Start the background thread that hot-swaps the snapshot on file changes."""
+        if self.poll_interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            name='dataset-watcher',
+            daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"Watching {self.path} for changes every {self.poll_interval}s")
+
+    def stop_watcher(self) -> None:
+        """Stop the background watcher thread."""
+        self._stop_event.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Dataset refresh error: {str(e)}", exc_info=True)
@@ -0,0 +1,357 @@
+"""
+Offline preference list generation for a file of candidates.
+
+Reads candidates from a CSV or Parquet file (columns jee_rank, category,
+college_type, preferred_branch, round_no and optionally min_probability and
+year; rank, branch and round are accepted as aliases), fans chunks of rows out to a pool
+of worker processes and appends the results to an NDJSON or CSV file in input
+order.
+
+The default year's dataset is loaded once in the parent before the pool
+starts; other years are loaded by each worker on first use. With the
+fork start method the workers share the default year copy-on-write;
+otherwise each worker maps the compiled snapshots, whose column files are
+shared through the page cache.
+
+After every chunk the number of rows written is recorded in
+<output>.progress, so an interrupted run continues where it stopped with
+--resume. Run from the service directory with:
+    python -m app.generate candidates.csv -o preferences.ndjson --workers 4
+"""
+
+import argparse
+import collections
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from pydantic import ValidationError
+
+from .models import PredictionInput
+from .services import predict_preferences_batch
+from .utils import get_dataset, get_index
+
+logger = logging.getLogger(__name__)
+
+INPUT_COLUMNS = ['jee_rank', 'category', 'college_type', 'preferred_branch', 'round_no']
+COLUMN_ALIASES = {'rank': 'jee_rank', 'branch': 'preferred_branch', 'round': 'round_no'}
+
+CSV_FIELDS = [
+    'row', 'Preference', 'Institute', 'College_Type', 'Location', 'Branch',
+    'Opening_Rank', 'Closing_Rank', 'Admission_Probability', 'Admission_Chances', 'error'
+]
+
+# Settings shared with the workers, set by _init_worker
+_worker_settings: Dict = {}
+
+
+def progress_path(output: Path) -> Path:
+    """Return the progress file of an output file."""
+    return output.with_name(f"{output.name}.progress")
+
+
+def _normalise_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Map header variants (case, spaces, aliases) to the input field names."""
+    renamed = {}
+    for name in df.columns:
+        key = str(name).strip().lower().replace(' ', '_')
+        renamed[name] = COLUMN_ALIASES.get(key, key)
+    df = df.rename(columns=renamed)
+
+    missing = [c for c in INPUT_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Candidates file is missing columns: {missing}")
+    return df
+
+
+def count_rows(path: Path) -> Optional[int]:
+    """Number of candidates in the input file, or None if unknown."""
+    try:
+        if path.suffix.lower() == '.parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(path).metadata.num_rows
+        with open(path, 'rb') as f:
+            return max(sum(1 for _ in f) - 1, 0)
+    except Exception:
+        return None
+
+
+def read_chunks(path: Path, chunk_size: int, start: int = 0) -> Iterator[Tuple[int, List[Dict]]]:
+    """
+    Read candidates in chunks without loading the whole file.
+
+    Args:
+        path (Path): CSV or Parquet file
+        chunk_size (int): Rows per chunk
+        start (int, optional): Number of leading rows to skip
+
+    Yields:
+        Tuple[int, List[Dict]]: Offset of the first row and the chunk's records
+    """
+    if path.suffix.lower() == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+
+        offset = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            df = batch.to_pandas()
+            if offset + len(df) > start:
+                skip = max(start - offset, 0)
+                yield offset + skip, _normalise_columns(df.iloc[skip:]).to_dict('records')
+            offset += len(df)
+        return
+
+    reader = pd.read_csv(
+        path,
+        chunksize=chunk_size,
+        skiprows=range(1, start + 1) if start else None,
+        dtype={'round_no': str, 'round': str}
+    )
+    offset = start
+    for df in reader:
+        yield offset, _normalise_columns(df).to_dict('records')
+        offset += len(df)
+
+
+def _init_worker(output_format: str, min_probability: float) -> None:
+    """Make the dataset and index available in a worker process."""
+    _worker_settings['format'] = output_format
+    _worker_settings['min_probability'] = min_probability
+    # Already loaded when the worker was forked from the parent
+    snapshot = get_dataset()
+    get_index(snapshot)
+
+
+def _candidate(record: Dict, min_probability: float) -> PredictionInput:
+    values = {name: record[name] for name in INPUT_COLUMNS}
+    value = record.get('min_probability')
+    values['min_probability'] = min_probability if value is None or pd.isna(value) else value
+    year = record.get('year')
+    if year is not None and not pd.isna(year):
+        values['year'] = year
+    return PredictionInput(**values)
+
+
+def predict_chunk(offset: int, records: List[Dict]) -> Tuple[str, int]:
+    """
+    Generate preferences for one chunk of candidates.
+
+    Args:
+        offset (int): Row number of the first record in the input file
+        records (List[Dict]): Candidate records
+
+    Returns:
+        Tuple[str, int]: Formatted output for the chunk and the number of errors
+    """
+    min_probability = _worker_settings.get('min_probability', 0)
+    results: Dict[int, Dict] = {}
+
+    inputs = []
+    positions = []
+    for i, record in enumerate(records):
+        try:
+            inputs.append(_candidate(record, min_probability))
+            positions.append(i)
+        except ValidationError as e:
+            fields = ', '.join(f"{error['loc'][0]}: {error['msg']}" for error in e.errors())
+            results[i] = {'error': f"Invalid candidate ({fields})"}
+
+    for record in predict_preferences_batch(inputs):
+        if 'index' in record:
+            results[positions[record.pop('index')]] = record
+
+    errors = sum(1 for r in results.values() if 'error' in r)
+    ordered = [(offset + i, results[i]) for i in range(len(records))]
+    if _worker_settings.get('format') == 'csv':
+        return _format_csv(ordered), errors
+    return _format_ndjson(ordered), errors
+
+
+def _format_ndjson(results: List[Tuple[int, Dict]]) -> str:
+    lines = []
+    for row, result in results:
+        if 'error' in result:
+            lines.append(json.dumps({'row': row, 'error': result['error']}))
+        else:
+            lines.append(json.dumps({'row': row, 'preferences': result['preferences']}))
+    return ''.join(line + '\n' for line in lines)
+
+
+def _format_csv(results: List[Tuple[int, Dict]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, lineterminator='\n')
+    for row, result in results:
+        if 'error' in result:
+            writer.writerow({'row': row, 'error': result['error']})
+        for preference in result.get('preferences', []):
+            writer.writerow(dict(preference, row=row))
+    return buffer.getvalue()
+
+
+def _read_progress(output: Path, input_path: Path) -> Optional[dict]:
+    try:
+        with open(progress_path(output)) as f:
+            progress = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if progress.get('input') != str(input_path.resolve()):
+        raise ValueError(f"{progress_path(output)} belongs to a different input file")
+    return progress
+
+
+def _write_progress(output: Path, input_path: Path, rows: int, output_bytes: int) -> None:
+    target = progress_path(output)
+    staging = target.with_name(f"{target.name}.tmp")
+    with open(staging, 'w') as f:
+        json.dump({'input': str(input_path.resolve()), 'rows': rows, 'output_bytes': output_bytes}, f)
+    os.replace(staging, target)
+
+
+def generate(
+    input_path: Path,
+    output: Path,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    output_format: Optional[str] = None,
+    min_probability: float = 30.0,
+    start_offset: Optional[int] = None,
+    resume: bool = False
+) -> dict:
+    """
+    Generate preference lists for every candidate in a file.
+
+    Args:
+        input_path (Path): CSV or Parquet file of candidates
+        output (Path): NDJSON or CSV output file
+        workers (int, optional): Worker processes. Defaults to 1.
+        chunk_size (int, optional): Candidates per task. Defaults to 1000.
+        output_format (str, optional): 'ndjson' or 'csv'. Defaults to the output suffix.
+        min_probability (float, optional): Default minimum probability for
+            candidates without one. Defaults to 30.
+        start_offset (int, optional): Skip this many candidates and append to output
+        resume (bool, optional): Continue from the output's progress file
+
+    Returns:
+        dict: Run summary
+    """
+    output_format = output_format or ('csv' if output.suffix.lower() == '.csv' else 'ndjson')
+    start = start_offset or 0
+    truncate_to = None
+    if resume:
+        progress = _read_progress(output, input_path)
+        if progress:
+            start = progress['rows']
+            # Drop a chunk that was written after the last progress record
+            truncate_to = progress['output_bytes']
+            logger.info(f"Resuming at row {start}")
+
+    append = start > 0 and output.exists()
+    if append and truncate_to is not None:
+        with open(output, 'r+b') as f:
+            f.truncate(truncate_to)
+
+    # Load before starting the pool so forked workers inherit the data
+    snapshot = get_dataset()
+    if not len(snapshot):
+        raise RuntimeError("No JOSAA data available")
+    get_index(snapshot)
+
+    total = count_rows(input_path)
+    started = time.perf_counter()
+    done = start
+    errors = 0
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    with open(output, 'a' if append else 'w', newline='') as out, \
+            context.Pool(workers, initializer=_init_worker, initargs=(output_format, min_probability)) as pool:
+        if not append and output_format == 'csv':
+            csv.DictWriter(out, fieldnames=CSV_FIELDS, lineterminator='\n').writeheader()
+
+        # Bounded window of tasks in flight keeps memory flat and output ordered
+        pending = collections.deque()
+
+        def drain_one():
+            nonlocal done, errors
+            count, result = pending.popleft()
+            text, chunk_errors = result.get()
+            out.write(text)
+            out.flush()
+            done += count
+            errors += chunk_errors
+            _write_progress(output, input_path, done, out.tell())
+
+            elapsed = time.perf_counter() - started
+            rate = (done - start) / elapsed if elapsed else 0
+            remaining = f", ~{(total - done) / rate:.0f}s left" if total and rate else ""
+            logger.info(
+                f"Processed {done}{f'/{total}' if total else ''} candidates "
+                f"({rate:.0f}/s{remaining})"
+            )
+
+        for offset, records in read_chunks(input_path, chunk_size, start):
+            pending.append((len(records), pool.apply_async(predict_chunk, (offset, records))))
+            if len(pending) >= workers * 2:
+                drain_one()
+        while pending:
+            drain_one()
+
+    progress_path(output).unlink(missing_ok=True)
+    summary = {
+        'rows': done - start,
+        'errors': errors,
+        'seconds': round(time.perf_counter() - started, 3),
+        'output': str(output),
+        'dataset_version': snapshot.version
+    }
+    logger.info(f"Finished: {summary}")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate JOSAA preference lists for a file of candidates")
+    parser.add_argument('input', type=Path, help="CSV or Parquet file of candidates")
+    parser.add_argument('-o', '--output', type=Path, required=True, help="Output file (.ndjson or .csv)")
+    parser.add_argument('--format', choices=['ndjson', 'csv'], help="Output format (default: from the output suffix)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Candidates per task")
+    parser.add_argument('--min-probability', type=float, default=30.0,
+                        help="Minimum probability for candidates without a min_probability column")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--resume', action='store_true', help="Continue from the output's progress file")
+    group.add_argument('--start-offset', type=int, help="Skip this many candidates and append to the output")
+    args = parser.parse_args(argv)
+
+    if not args.input.exists():
+        logger.error(f"File not found: {args.input}")
+        return 1
+
+    try:
+        generate(
+            args.input,
+            args.output,
+            workers=max(args.workers, 1),
+            chunk_size=max(args.chunk_size, 1),
+            output_format=args.format,
+            min_probability=args.min_probability,
+            start_offset=args.start_offset,
+            resume=args.resume
+        )
+    except Exception as e:
+        logger.error(f"Generation failed: {str(e)}", exc_info=True)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .table import JosaaTable
+
+logger = logging.getLogger(__name__)
+
+# Filter dimensions of a prediction, in key order
+DIMENSIONS = ['Round', 'Category', 'College Type', 'Academic Program Name']
+
+
+class RankIntervals:
+    """
+    Rows of one partition, ordered three ways for band queries.
+
+    `rows` is in ascending row order; `open_rows`/`close_rows` hold the same
+    rows sorted by opening/closing rank (ties in row order) next to the
+    sorted rank values, so rank windows are found by binary search.
+    """
+
+    __slots__ = ('rows', 'open_rows', 'open_ranks', 'close_rows', 'close_ranks')
+
+    def __init__(
+        self,
+        rows: np.ndarray,
+        open_rows: np.ndarray,
+        open_ranks: np.ndarray,
+        close_rows: np.ndarray,
+        close_ranks: np.ndarray
+    ):
+        self.rows = rows
+        self.open_rows = open_rows
+        self.open_ranks = open_ranks
+        self.close_rows = close_rows
+        self.close_ranks = close_ranks
+
+    @classmethod
+    def from_rows(cls, table: JosaaTable, rows: np.ndarray) -> 'RankIntervals':
+        """Sort an ascending row id array by opening and closing rank."""
+        open_ranks = table.opening_rank[rows]
+        close_ranks = table.closing_rank[rows]
+        by_open = np.argsort(open_ranks, kind='stable')
+        by_close = np.argsort(close_ranks, kind='stable')
+        return cls(rows, rows[by_open], open_ranks[by_open], rows[by_close], close_ranks[by_close])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def opening_between(self, low: float, high: float) -> np.ndarray:
+        """Rows with low <= opening rank <= high, in opening rank order."""
+        start = np.searchsorted(self.open_ranks, low, side='left')
+        end = np.searchsorted(self.open_ranks, high, side='right')
+        return self.open_rows[start:end]
+
+    def closing_between(self, low: float, high: float) -> np.ndarray:
+        """Rows with low <= closing rank <= high, in closing rank order."""
+        start = np.searchsorted(self.close_ranks, low, side='left')
+        end = np.searchsorted(self.close_ranks, high, side='right')
+        return self.close_rows[start:end]
+
+    def covering(self, table: JosaaTable, rank: float) -> np.ndarray:
+        """
+        Rows whose [opening, closing] interval contains rank.
+
+        Both sides are found by binary search; only the smaller side is
+        checked against the other bound.
+        """
+        opened = self.open_rows[:np.searchsorted(self.open_ranks, rank, side='right')]
+        not_closed = self.close_rows[np.searchsorted(self.close_ranks, rank, side='left'):]
+        if len(opened) <= len(not_closed):
+            return opened[table.closing_rank[opened] >= rank]
+        return not_closed[table.opening_rank[not_closed] <= rank]
+
+    @staticmethod
+    def first(rows: np.ndarray, n: int) -> np.ndarray:
+        """The n lowest row ids in ascending order, i.e. DataFrame.head(n) order."""
+        if len(rows) > n:
+            rows = np.partition(rows, n - 1)[:n]
+        return np.sort(rows)
+
+
+class _Partitioning:
+    """
+    Rows grouped by the dimensions selected in one wildcard pattern.
+
+    Each group's row ids are a contiguous range of `rows`, in ascending row
+    order, and the same range of `open_rows`/`close_rows` holds them sorted by
+    opening/closing rank. Groups are identified by a combined integer key and
+    found with a binary search over the sorted `keys`.
+    """
+
+    __slots__ = ('dims', 'keys', 'starts', 'rows', 'open_rows', 'open_ranks', 'close_rows', 'close_ranks')
+
+    def __init__(self, dims: Sequence[int], combined: np.ndarray, table: JosaaTable, row_dtype: np.dtype):
+        self.dims = dims
+
+        order = np.argsort(combined, kind='stable')
+        sorted_keys = combined[order]
+        boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+        self.starts = np.concatenate(([0], boundaries, [len(order)])).astype(np.int64)
+        self.keys = sorted_keys[self.starts[:-1]] if len(order) else sorted_keys
+        self.rows = order.astype(row_dtype)
+
+        # lexsort is stable, so equal ranks stay in row order
+        by_open = np.lexsort((table.opening_rank, combined))
+        by_close = np.lexsort((table.closing_rank, combined))
+        self.open_rows = by_open.astype(row_dtype)
+        self.open_ranks = table.opening_rank[by_open]
+        self.close_rows = by_close.astype(row_dtype)
+        self.close_ranks = table.closing_rank[by_close]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.__slots__[1:])
+
+    def find(self, key: int) -> Optional[int]:
+        """Return the position of a group key, or None if it does not occur."""
+        i = int(np.searchsorted(self.keys, key))
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        return i
+
+    def group(self, i: int) -> np.ndarray:
+        """Row ids of group i in ascending order."""
+        return self.rows[self.starts[i]:self.starts[i + 1]]
+
+    def intervals(self, i: int) -> RankIntervals:
+        """Rank-sorted views of group i."""
+        start, end = self.starts[i], self.starts[i + 1]
+        return RankIntervals(
+            self.rows[start:end],
+            self.open_rows[start:end],
+            self.open_ranks[start:end],
+            self.close_rows[start:end],
+            self.close_ranks[start:end]
+        )
+
+
+class PartitionIndex:
+    """
+    Index from (Round, Category, College Type, Program) filters to rows.
+
+    Every combination of concrete values and "ALL" wildcards is covered by
+    one partitioning per wildcard pattern (2^4), so a prediction only touches
+    the rows of its own partition instead of masking the whole table. Each
+    partition also keeps its rows sorted by opening and closing rank for the
+    binary-searched rank bands (RankIntervals).
+
+    A partitioning holds five row-length arrays, several times the size of
+    the mapped columns, and is private to the worker process. So each one is
+    built on the first query that needs it: memory grows with the wildcard
+    patterns that are actually queried, not with all sixteen.
+    """
+
+    def __init__(self, table: JosaaTable):
+        self.table = table
+        self._radix = [len(table[name].dictionary) for name in DIMENSIONS]
+        self._multipliers = []
+        multiplier = 1
+        for radix in reversed(self._radix):
+            self._multipliers.insert(0, multiplier)
+            multiplier *= radix
+
+        self._row_dtype = np.int32 if len(table) < np.iinfo(np.int32).max else np.int64
+        self._partitionings: Dict[Tuple[bool, ...], _Partitioning] = {}
+        self._lock = threading.Lock()
+        # Total time spent building partitionings so far
+        self.build_seconds = 0.0
+
+    def _partitioning(self, pattern: Tuple[bool, ...]) -> _Partitioning:
+        """Return the partitioning of a wildcard pattern, building it on first use."""
+        partitioning = self._partitionings.get(pattern)
+        if partitioning is not None:
+            return partitioning
+
+        with self._lock:
+            partitioning = self._partitionings.get(pattern)
+            if partitioning is None:
+                start = time.perf_counter()
+                dims = [d for d, keep in enumerate(pattern) if keep]
+                # Shift codes by one so a missing value (-1) gets its own key
+                combined = np.zeros(len(self.table), dtype=np.int64)
+                for d in dims:
+                    combined += (self.table[DIMENSIONS[d]].codes.astype(np.int64) + 1) * self._multipliers[d]
+                partitioning = _Partitioning(dims, combined, self.table, self._row_dtype)
+                self._partitionings[pattern] = partitioning
+
+                seconds = time.perf_counter() - start
+                self.build_seconds += seconds
+                names = ', '.join(DIMENSIONS[d] for d in dims) or 'nothing'
+                logger.info(
+                    f"Built partitioning by {names} over {len(self.table)} records in {seconds:.3f}s "
+                    f"({partitioning.nbytes / 1e6:.1f} MB)"
+                )
+        return partitioning
+
+    def prepare(self, dimensions: Sequence[str]) -> None:
+        """
+        Build the partitioning by some dimensions ahead of the first query.
+
+        Args:
+            dimensions (Sequence[str]): Names from DIMENSIONS that queries fix;
+                the others are "ALL"
+        """
+        self._partitioning(tuple(name in dimensions for name in DIMENSIONS))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the partitionings built so far."""
+        return sum(p.nbytes for p in list(self._partitionings.values()))
+
+    def describe(self) -> dict:
+        """Return a JSON-serialisable summary of the index."""
+        partitionings = list(self._partitionings.values())
+        return {
+            'partitionings': len(partitionings),
+            'groups': int(sum(len(p.keys) for p in partitionings)),
+            'build_seconds': round(self.build_seconds, 4),
+            'bytes': int(sum(p.nbytes for p in partitionings))
+        }
+
+    def _groups(self, codes: Sequence[Optional[np.ndarray]]) -> Tuple[_Partitioning, List[int]]:
+        """Find the partitioning and group positions matching per-dimension codes."""
+        partitioning = self._partitioning(tuple(c is not None for c in codes))
+        accepted = [codes[d] for d in partitioning.dims]
+
+        groups: List[int] = []
+        for combination in itertools.product(*accepted):
+            key = sum((int(code) + 1) * self._multipliers[d] for d, code in zip(partitioning.dims, combination))
+            i = partitioning.find(key)
+            if i is not None:
+                groups.append(i)
+        return partitioning, groups
+
+    def lookup(self, codes: Sequence[Optional[np.ndarray]]) -> np.ndarray:
+        """
+        Return the rows matching per-dimension code filters.
+
+        Args:
+            codes (Sequence[Optional[np.ndarray]]): For each dimension in
+                DIMENSIONS, the accepted codes, or None for "ALL"
+
+        Returns:
+            np.ndarray: Matching row ids in ascending order
+        """
+        partitioning, groups = self._groups(codes)
+        if not groups:
+            return partitioning.rows[:0]
+        if len(groups) == 1:
+            return partitioning.group(groups[0])
+        return np.sort(np.concatenate([partitioning.group(i) for i in groups]))
+
+    def lookup_intervals(self, codes: Sequence[Optional[np.ndarray]]) -> RankIntervals:
+        """
+        Return the rank-sorted views of the rows matching per-dimension code filters.
+
+        Args:
+            codes (Sequence[Optional[np.ndarray]]): As for lookup()
+
+        Returns:
+            RankIntervals: Matching rows ordered by row id, opening and closing rank
+        """
+        partitioning, groups = self._groups(codes)
+        if len(groups) == 1:
+            return partitioning.intervals(groups[0])
+        # Several codes matched (e.g. case variants): sort their union on the fly
+        return RankIntervals.from_rows(self.table, self.lookup(codes))
+
+    def _codes(self, values: Sequence[Optional[str]], normalise: bool) -> List[Optional[np.ndarray]]:
+        return [
+            None if value is None else self.table[name].lookup(value, normalise)
+            for name, value in zip(DIMENSIONS, values)
+        ]
+
+    def select(
+        self,
+        round_no: Optional[str],
+        category: Optional[str],
+        college_type: Optional[str],
+        program: Optional[str],
+        normalise: bool = False
+    ) -> np.ndarray:
+        """
+        Return the rows matching filter values.
+
+        Args:
+            round_no (Optional[str]): Round, or None for all rounds
+            category (Optional[str]): Category, or None for all categories
+            college_type (Optional[str]): College type, or None for all types
+            program (Optional[str]): Academic program, or None for all programs
+            normalise (bool, optional): Compare case-normalised values
+
+        Returns:
+            np.ndarray: Matching row ids in ascending order
+        """
+        return self.lookup(self._codes([round_no, category, college_type, program], normalise))
+
+    def select_intervals(
+        self,
+        round_no: Optional[str],
+        category: Optional[str],
+        college_type: Optional[str],
+        program: Optional[str],
+        normalise: bool = False
+    ) -> RankIntervals:
+        """
+        Return the rank-sorted views of the rows matching filter values.
+
+        Args:
+            As for select()
+
+        Returns:
+            RankIntervals: Matching rows ordered by row id, opening and closing rank
+        """
+        return self.lookup_intervals(self._codes([round_no, category, college_type, program], normalise))
@@ -1,19 +1,39 @@
 from fastapi import FastAPI, Request, Form, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
+from typing import List, Optional
+import json
 import logging
 import os
 from datetime import datetime
 
+from nextstep_common.metrics import CONTENT_TYPE, MetricsMiddleware, registry, timed_stage
+from nextstep_common.offload import PoolSaturated, WorkPool
+from nextstep_common.pages import WARMING_UP_RETRY_AFTER, PageCache, dropdown_context, page_response, warming_up_response
+from nextstep_common.profiling import ServerTimingMiddleware
+from nextstep_common.startup import startup_state
+
+from . import configure_logging
+from .models import BatchPredictionOutput, PredictionInput, RankSweepOutput
+from .ranking import StaleCursorError
+from .responses import CompactJSONResponse, to_table
+from .services import predict_preferences_batch_groups, sweep_admission_probability
+
 # Import utility functions
 from .utils import (
-    load_data, 
     get_unique_branches, 
-    predict_preferences
+    predict_preferences,
+    predict_preferences_page,
+    get_dropdowns,
+    data_store,
+    get_index,
+    prediction_cache,
+    registry as data_registry
 )
+from .years import parse_years
 
 # Configure logging
 logging.basicConfig(
@@ -38,6 +58,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts and latencies for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Server-Timing headers on every response; with a token set, single requests
+# can be profiled with ?profile=tree|folded and the X-Profile-Token header
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or None
+app.add_middleware(ServerTimingMiddleware, profile_paths=("/predict", "/api/predict"), profile_token=PROFILE_TOKEN)
+
+# "background" binds the port first and loads the data in a warm-up thread;
+# "blocking" loads everything before the server accepts requests
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background")
+
+# Largest number of inputs accepted by one /predict/batch request
+BATCH_MAX_SIZE = int(os.getenv("JOSAA_BATCH_MAX_SIZE", "1000"))
+
+# Rows per page of /api/predict, and rows rendered by /predict
+PAGE_SIZE = int(os.getenv("JOSAA_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = 1000
+
+# Threads running predictions off the event loop, requests allowed to wait
+# for one, and seconds a request may wait before it is turned away with 503
+COMPUTE_THREADS = int(os.getenv("JOSAA_COMPUTE_THREADS", str(min(4, os.cpu_count() or 1))))
+COMPUTE_QUEUE = int(os.getenv("JOSAA_COMPUTE_QUEUE", "32"))
+COMPUTE_QUEUE_TIMEOUT = float(os.getenv("JOSAA_COMPUTE_QUEUE_TIMEOUT", "10"))
+
+# Columns of /api/predict rows -> prediction fields
+API_PREDICTION_FIELDS = {
+    "institute": "institute",
+    "college_type": "college_type",
+    "location": "location",
+    "branch": "academic_program",
+    "quota": "quota",
+    "gender": "gender",
+    "opening_rank": "opening_rank",
+    "closing_rank": "closing_rank",
+    "probability": "admission_probability",
+    "chances": "admission_chances",
+    "year": "year"
+}
+
+# With round_no "ALL": the best round and the probability in every round,
+# in the order of the response's "rounds"
+API_ROUND_FIELDS = {
+    **API_PREDICTION_FIELDS,
+    "round": "round",
+    "round_probabilities": "round_probabilities"
+}
+
 # Path configurations
 BASE_DIR = Path(__file__).parent.parent
 STATIC_DIR = BASE_DIR / "static"
@@ -49,12 +117,79 @@ app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 # Configure templates
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
+# Rendered home page per dataset version and base URL
+home_pages = PageCache()
+
+# Bounded pool for prediction work, so one slow request does not stall the others
+compute_pool = WorkPool(COMPUTE_THREADS, COMPUTE_QUEUE, COMPUTE_QUEUE_TIMEOUT, name="predict")
+
+def _dataset_metric(attribute: str):
+    """Read a property of the current dataset snapshot, None before it is loaded"""
+    snapshot = data_store.peek()
+    if snapshot is None:
+        return None
+    return len(snapshot) if attribute == "rows" else getattr(snapshot, attribute)
+
+def _cache_metric(value):
+    """Samples of a per-cache value for the prediction and home page caches"""
+    return [({"cache": name}, value(cache)) for name, cache in (("prediction", prediction_cache), ("home_page", home_pages))]
+
+# Read when /metrics is scraped
+registry.gauge_callback("dataset_version", "Version of the loaded dataset; increments on reload", lambda: _dataset_metric("version"))
+registry.gauge_callback("dataset_rows", "Rows in the loaded dataset", lambda: _dataset_metric("rows"))
+registry.gauge_callback(
+    "dataset_memory_bytes",
+    "Memory held by the data of each loaded year",
+    lambda: [({"year": str(year)}, nbytes) for year, nbytes in data_registry.memory().items()]
+)
+registry.counter_callback("dataset_evictions_total", "Years unloaded to stay within the memory budget", lambda: data_registry.evictions)
+registry.counter_callback("cache_hits_total", "Cache lookups answered from the cache", lambda: _cache_metric(lambda c: c.hits))
+registry.counter_callback("cache_misses_total", "Cache lookups that missed", lambda: _cache_metric(lambda c: c.misses))
+registry.gauge_callback(
+    "cache_hit_ratio",
+    "Share of cache lookups answered from the cache since the worker started",
+    lambda: _cache_metric(lambda c: c.hits / (c.hits + c.misses) if c.hits + c.misses else None)
+)
+registry.gauge_callback("compute_pool_running", "Calls running on the compute pool", lambda: compute_pool.stats()["running"])
+registry.gauge_callback("compute_pool_queued", "Calls waiting for a compute pool thread", lambda: compute_pool.stats()["queued"])
+registry.counter_callback(
+    "compute_pool_rejected_total",
+    "Requests turned away because the compute pool was saturated",
+    lambda: compute_pool.stats()["rejected"] + compute_pool.stats()["timed_out"]
+)
+
+def warm_up():
+    """
+    Load the data and everything derived from it, then watch the file for changes
+    """
+    try:
+        with startup_state.phase("load_dataset"):
+            snapshot = data_store.get()
+        startup_state.record("read_data", snapshot.load_seconds)
+        
+        if len(snapshot):
+            with startup_state.phase("build_index"):
+                # Partitioning of the form's defaults: every college type and program
+                get_index(snapshot).prepare(["Round", "Category"])
+            with startup_state.phase("render_dropdowns"):
+                get_dropdowns(snapshot)
+        else:
+            logger.warning("Warm-up finished without data")
+        
+        data_registry.start_watchers()
+        logger.info(f"Warm-up completed: {startup_state.phases}")
+    except Exception as e:
+        logger.error(f"Warm-up error: {str(e)}", exc_info=True)
+        raise
+
 @app.on_event("startup")
 async def startup_event():
     """
     Perform startup checks and initializations
     """
     try:
+        configure_logging()
+        
         # Validate directories
         if not STATIC_DIR.exists():
             logger.warning(f"Static directory not found: {STATIC_DIR}")
@@ -62,28 +197,72 @@ async def startup_event():
         if not TEMPLATES_DIR.exists():
             logger.warning(f"Templates directory not found: {TEMPLATES_DIR}")
         
-        # Optional: Preload or warm-up data
-        load_data()
+        # Build the shared dataset snapshot and watch the file for changes
+        if STARTUP_MODE == "blocking":
+            startup_state.run(warm_up)
+        else:
+            startup_state.start(warm_up)
         
         logger.info("Application startup completed successfully")
     except Exception as e:
         logger.error(f"Startup error: {str(e)}", exc_info=True)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Stop background tasks
+    """
+    data_registry.stop_watchers()
+    compute_pool.shutdown()
+
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request: Request, exc: PoolSaturated):
+    """
+    Answer requests turned away by the compute pool with 503 and Retry-After
+    """
+    logger.warning(f"Request rejected by the compute pool: {request.url.path}")
+    return exc.response()
+
+def _render_home(request: Request, key: str):
+    """Render the home page of the current data; runs on the compute pool."""
+    snapshot = data_store.get()
+    # home() already counted the lookup; the page may have been rendered since
+    page = home_pages.peek(key, snapshot.version)
+    if page is None:
+        context = {
+            "request": request,
+            **dropdown_context(get_dropdowns(snapshot))
+        }
+        with timed_stage("template_render"):
+            body = templates.get_template("index.html").render(context).encode("utf-8")
+        page = home_pages.put(key, snapshot.version, body)
+    return page
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """
     Render the home page with dropdown options
+
+    While warm-up is still loading the data, a 503 loading page with
+    Retry-After is served instead of waiting for it.
     """
     try:
-        # Prepare dropdown options
-        context = {
-            "request": request,
-            "categories": ["OPEN", "OBC-NCL", "SC", "ST", "EWS"],
-            "college_types": ["ALL", "IIT", "NIT", "IIIT", "GFTI"],
-            "rounds": ["1", "2", "3", "4", "5", "6"],
-            "branches": get_unique_branches()
-        }
-        return templates.TemplateResponse("index.html", context)
+        snapshot = data_store.peek()
+        if snapshot is None and startup_state.warming:
+            return warming_up_response()
+        
+        # The page only changes with the data, so it is rendered once per
+        # version. Its static links are paths, so apart from that it only
+        # depends on the mount path, not on the client's Host header.
+        key = request.scope.get("root_path", "")
+        page = home_pages.get(key, snapshot.version) if snapshot is not None else None
+        if page is None:
+            page = await compute_pool.run(_render_home, request, key)
+        
+        return page_response(request, page)
+    
+    except PoolSaturated:
+        raise
     
     except Exception as e:
         logger.error(f"Home page rendering error: {str(e)}", exc_info=True)
@@ -97,24 +276,32 @@ async def predict(
     college_type: str = Form(...),
     preferred_branch: str = Form(...),
     round_no: str = Form(...),
-    min_probability: float = Form(30.0)
+    min_probability: float = Form(30.0),
+    years: Optional[str] = Form(None)
 ):
     """
     Generate college predictions based on input parameters
+
+    "years" is a comma-separated list of counselling years or "All";
+    without it the default year is used.
     """
     try:
         # Validate input parameters
         if jee_rank <= 0:
             raise ValueError("JEE Rank must be a positive number")
+        selected_years = parse_years(years)
         
         # Call prediction service
-        prediction_results = predict_preferences(
+        prediction_results = await compute_pool.run(
+            predict_preferences,
             jee_rank=jee_rank,
             category=category,
             college_type=college_type,
             preferred_branch=preferred_branch,
             round_no=round_no,
-            min_probability=min_probability
+            min_probability=min_probability,
+            max_results=PAGE_SIZE,
+            years=selected_years
         )
         
         # Prepare context for template rendering
@@ -122,10 +309,15 @@ async def predict(
             "request": request,
             "predictions": prediction_results.get('predictions', []),
             "plot_data": prediction_results.get('plot_data', {}),
-            "categories": ["OPEN", "OBC-NCL", "SC", "ST", "EWS"],
-            "college_types": ["ALL", "IIT", "NIT", "IIIT", "GFTI"],
-            "rounds": ["1", "2", "3", "4", "5", "6"],
-            "branches": get_unique_branches(),
+            "rounds": prediction_results.get('rounds'),
+            **dropdown_context(
+                get_dropdowns(),
+                category=category,
+                college_type=college_type,
+                preferred_branch=preferred_branch,
+                round_no=round_no,
+                years=years
+            ),
             
             # Preserve form inputs for sticky form
             "jee_rank": jee_rank,
@@ -133,10 +325,15 @@ async def predict(
             "college_type": college_type,
             "preferred_branch": preferred_branch,
             "round_no": round_no,
-            "min_probability": min_probability
+            "min_probability": min_probability,
+            "years": years
         }
         
-        return templates.TemplateResponse("index.html", context)
+        with timed_stage("template_render"):
+            return templates.TemplateResponse("index.html", context)
+    
+    except PoolSaturated:
+        raise
     
     except ValueError as ve:
         logger.warning(f"Validation error: {str(ve)}")
@@ -152,30 +349,255 @@ async def predict(
             status_code=500
         )
 
+@app.post("/api/predict", response_class=CompactJSONResponse)
+async def api_predict(
+    jee_rank: Optional[int] = Form(None),
+    category: Optional[str] = Form(None),
+    college_type: Optional[str] = Form(None),
+    preferred_branch: Optional[str] = Form(None),
+    round_no: Optional[str] = Form(None),
+    min_probability: float = Form(30.0),
+    page_size: int = Form(PAGE_SIZE),
+    cursor: Optional[str] = Form(None),
+    years: Optional[str] = Form(None)
+):
+    """
+    Generate one page of college predictions as compact JSON for the page script
+
+    The first page takes the same form fields as /predict; later pages only
+    need the "next_cursor" of the previous page. Rows are sent as arrays in
+    the order of "columns", most likely first. The plot of all matching
+    colleges comes with the first page. "years" selects the counselling
+    years as for /predict; each row carries its year. With round_no "ALL"
+    each row is one seat with its probability in each of "rounds".
+    """
+    try:
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+        
+        if not cursor:
+            missing = [
+                name for name, value in (
+                    ("jee_rank", jee_rank),
+                    ("category", category),
+                    ("college_type", college_type),
+                    ("preferred_branch", preferred_branch),
+                    ("round_no", round_no)
+                ) if value is None
+            ]
+            if missing:
+                raise ValueError(f"Missing fields: {', '.join(missing)}")
+            if jee_rank <= 0:
+                raise ValueError("JEE Rank must be a positive number")
+        
+        page = await compute_pool.run(
+            predict_preferences_page,
+            jee_rank=jee_rank,
+            category=category,
+            college_type=college_type,
+            preferred_branch=preferred_branch,
+            round_no=round_no,
+            min_probability=min_probability,
+            page_size=page_size,
+            cursor=cursor,
+            years=parse_years(years)
+        )
+        
+        fields = API_ROUND_FIELDS if "rounds" in page else API_PREDICTION_FIELDS
+        return CompactJSONResponse({
+            **to_table(page["predictions"], fields),
+            **({"rounds": page["rounds"]} if "rounds" in page else {}),
+            "offset": page["offset"],
+            "total": page["total"],
+            "next_cursor": page["next_cursor"],
+            "plot": page.get("plot_data") or None
+        })
+    
+    except PoolSaturated:
+        raise
+    
+    except StaleCursorError as se:
+        return CompactJSONResponse({"error": str(se)}, status_code=410)
+    
+    except ValueError as ve:
+        logger.warning(f"Validation error: {str(ve)}")
+        return CompactJSONResponse({"error": str(ve)}, status_code=400)
+    
+    except Exception as e:
+        logger.error(f"Prediction error: {str(e)}", exc_info=True)
+        return CompactJSONResponse(
+            {"error": "An unexpected error occurred during prediction"},
+            status_code=500
+        )
+
+def _next_batch_lines(groups) -> Optional[str]:
+    """Compute the next group of a batch and serialise its records as newline-delimited JSON."""
+    records = next(groups, None)
+    if records is None:
+        return None
+    lines = []
+    for record in records:
+        if "preferences" in record:
+            lines.append(BatchPredictionOutput(**record).json())
+        else:
+            lines.append(json.dumps(record))
+    return "\n".join(lines) + "\n"
+
+async def _ndjson_lines(groups, first: str):
+    """Stream the lines of a batch, computing each later group on the work pool."""
+    yield first
+    try:
+        while True:
+            lines = await compute_pool.run(_next_batch_lines, groups)
+            if lines is None:
+                break
+            yield lines
+    except PoolSaturated as ps:
+        yield json.dumps({"error": str(ps), "retry_after": ps.retry_after}) + "\n"
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}", exc_info=True)
+        yield json.dumps({"error": "An unexpected error occurred during prediction"}) + "\n"
+
+@app.post("/predict/batch")
+async def predict_batch(inputs: List[PredictionInput]):
+    """
+    Generate predictions for many candidates as newline-delimited JSON
+
+    One line is streamed per input (with its position in "index") as soon as
+    it is ready, in partition order rather than input order. The last line is
+    a {"summary": ...} record with per-partition timings. Each partition is
+    computed on the work pool; if the pool is saturated mid-stream, the last
+    line is an {"error", "retry_after"} record.
+    """
+    if len(inputs) > BATCH_MAX_SIZE:
+        return JSONResponse(
+            content={"error": f"Batch size {len(inputs)} exceeds the limit of {BATCH_MAX_SIZE}"},
+            status_code=413
+        )
+    
+    # Each group is computed on the work pool like any other prediction. The
+    # first one is computed before the response starts, so a saturated pool
+    # is still answered with 503.
+    groups = predict_preferences_batch_groups(inputs)
+    try:
+        first = await compute_pool.run(_next_batch_lines, groups)
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}", exc_info=True)
+        return JSONResponse(
+            content={"error": "An unexpected error occurred during prediction"},
+            status_code=500
+        )
+    
+    return StreamingResponse(_ndjson_lines(groups, first), media_type="application/x-ndjson")
+
+@app.get("/probability-curve", response_model=RankSweepOutput)
+async def probability_curve(
+    institute: str,
+    branch: str,
+    category: str,
+    round_no: str,
+    rank_start: int,
+    rank_end: int,
+    step: int = 100,
+    year: Optional[int] = None
+):
+    """
+    Admission probability of one program over a range of ranks, for one counselling year
+    """
+    try:
+        return await compute_pool.run(
+            sweep_admission_probability,
+            institute=institute,
+            preferred_branch=branch,
+            category=category,
+            round_no=round_no,
+            rank_start=rank_start,
+            rank_end=rank_end,
+            step=step,
+            year=year
+        )
+    
+    except PoolSaturated:
+        raise
+    
+    except ValueError as ve:
+        logger.warning(f"Validation error: {str(ve)}")
+        return JSONResponse(
+            content={"error": str(ve)}, 
+            status_code=400
+        )
+    
+    except Exception as e:
+        logger.error(f"Probability curve error: {str(e)}", exc_info=True)
+        return JSONResponse(
+            content={"error": "An unexpected error occurred while computing the curve"}, 
+            status_code=500
+        )
+
 @app.get("/health")
 async def health_check():
     """
-    Provide a simple health check endpoint
+    Liveness check; answers immediately, also while the data is still loading
     """
+    snapshot = data_store.peek()
+    loaded = snapshot is not None and bool(len(snapshot))
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "version": "1.0.0",
-        "data_loaded": bool(load_data().shape[0])
+        "startup": startup_state.state,
+        "data_loaded": loaded,
+        "dataset_version": snapshot.version if snapshot else None,
+        "index": get_index(snapshot).describe() if loaded else None,
+        "years": data_registry.describe(),
+        "prediction_cache": prediction_cache.stats(),
+        "compute_pool": compute_pool.stats()
     }
 
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics of the worker process that answers the scrape
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check; 200 once the data is loaded and indexed, 503 before
+    """
+    snapshot = data_store.peek()
+    ready = startup_state.ready and snapshot is not None and bool(len(snapshot))
+    return JSONResponse(
+        content={"ready": ready, **startup_state.describe()},
+        status_code=200 if ready else 503
+    )
+
 @app.get("/branches")
 async def get_branches():
     """
-    Endpoint to retrieve unique branches
+    Endpoint to retrieve unique branches; 503 with Retry-After during warm-up
     """
+    if data_store.peek() is None and startup_state.warming:
+        return JSONResponse(
+            content={"branches": [], "error": "The service is starting up"},
+            status_code=503,
+            headers={"Retry-After": str(WARMING_UP_RETRY_AFTER)}
+        )
+    
     try:
-        branches = get_unique_branches()
+        branches = await compute_pool.run(get_unique_branches)
         return {"branches": branches}
+    except PoolSaturated:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving branches: {str(e)}")
         return {"branches": []}
 
+startup_state.mark_imported()
+
 # Application entry point
 if __name__ == "__main__":
     import uvicorn
@@ -8,6 +8,7 @@ class PredictionInput(BaseModel):
     preferred_branch: str
     round_no: str
     min_probability: float = 0
+    year: Optional[int] = None
 
 class College(BaseModel):
     Preference: int
@@ -23,3 +24,22 @@ class College(BaseModel):
 class PredictionOutput(BaseModel):
     preferences: List[College]
     plot_data: Optional[dict] = None
+
+class BatchPredictionOutput(PredictionOutput):
+    index: int
+
+class ProbabilityCurve(BaseModel):
+    quota: Optional[str]
+    gender: Optional[str]
+    opening_rank: int
+    closing_rank: int
+    probabilities: List[float]
+
+class RankSweepOutput(BaseModel):
+    institute: str
+    branch: str
+    category: str
+    round_no: str
+    year: int
+    ranks: List[int]
+    curves: List[ProbabilityCurve]
@@ -0,0 +1,204 @@
+"""
+Server-side histogram binning for the probability plot.
+
+Instead of shipping every value and a full plotly.express figure (with its
+template) to the browser, the values are binned here with NumPy and sent as
+a single bar trace of bin counts. Bin sizes and edges follow Plotly.js's
+automatic histogram binning so the chart looks the same as before.
+"""
+
+import math
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Colours and grid of the default "plotly" template used by plotly.express
+PLOT_BACKGROUND = '#E5ECF6'
+FONT_COLOR = '#2a3f5f'
+GRID_COLOR = 'white'
+
+
+def _round_up(value: float, steps: Sequence[float]) -> float:
+    """The first step greater than value, or the largest step (Plotly.js Lib.roundUp)."""
+    for step in steps:
+        if step > value:
+            return step
+    return steps[-1]
+
+
+def _round_down(value: float, steps: Sequence[float]) -> float:
+    """The last step not greater than value, or the smallest step."""
+    for step in reversed(steps):
+        if step <= value:
+            return step
+    return steps[0]
+
+
+def nice_bin_size(values: np.ndarray) -> float:
+    """
+    Bin size Plotly.js would choose for a histogram of values.
+
+    The rough size scales with the standard deviation and shrinks with the
+    number of values (2 * std / n^0.4), but never below the smallest gap
+    between distinct values; it is then rounded up to 2, 5 or 10 times a
+    power of ten like an axis tick spacing.
+
+    Args:
+        values (np.ndarray): Finite values, at least one
+
+    Returns:
+        float: Bin width
+    """
+    distinct = np.unique(values)
+    min_diff = float(np.min(np.diff(distinct))) if len(distinct) > 1 else 1.0
+    exponent = 10 ** math.floor(math.log10(min_diff))
+    min_size = exponent * _round_down(min_diff / exponent, [0.9, 1.9, 4.9, 9.9])
+
+    spread = float(np.std(values, ddof=1)) if len(values) > 1 else 0.0
+    rough = max(min_size, 2 * spread / len(values) ** 0.4)
+    if not math.isfinite(rough) or rough <= 0:
+        rough = 1.0
+
+    base = 10 ** math.floor(math.log10(rough))
+    return base * _round_up(rough / base, [2, 5, 10])
+
+
+def _bin_start(values: np.ndarray, size: float) -> float:
+    """First bin edge, shifted so that values do not sit on bin edges."""
+    data_min, data_max = float(values.min()), float(values.max())
+    # The tick before the first tick at or above the minimum
+    start = math.ceil(data_min / size) * size - size
+
+    def near_edge(v):
+        # fmod keeps the sign like JavaScript's %
+        return np.fmod(1 + (v - start) * 100 / size, 100) < 2
+
+    if np.all(np.fmod(values, 1) == 0):
+        # Integers: centre bins on integers, or start half an integer down
+        if size < 1:
+            start = data_min - 0.5 * size
+        else:
+            start -= 0.5
+            if start + size < data_min:
+                start += size
+    elif np.count_nonzero(near_edge(values + size / 2)) < len(values) * 0.1:
+        if np.count_nonzero(near_edge(values)) > len(values) * 0.3 or near_edge(data_min) or near_edge(data_max):
+            shift = size / 2
+            start = start - shift if start + shift > data_min else start + shift
+    return start
+
+
+def histogram_bins(values: Sequence[float], size: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bin values into equal-width, left-closed bins.
+
+    Args:
+        values (Sequence[float]): Values to bin; NaNs are ignored
+        size (float, optional): Bin width. Defaults to nice_bin_size().
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Bin edges (n + 1) and counts (n)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+
+    size = size or nice_bin_size(values)
+    start = _bin_start(values, size)
+    bins = int(math.floor((values.max() - start) / size)) + 1
+    edges = start + size * np.arange(bins + 1)
+
+    positions = np.clip(np.floor((values - start) / size).astype(np.int64), 0, bins - 1)
+    counts = np.bincount(positions, minlength=bins)
+    return edges, counts
+
+
+def histogram_figure(
+    values: Sequence[float],
+    title: str,
+    x_title: str,
+    y_title: str,
+    color: str = '#3366cc'
+) -> Dict:
+    """
+    Build a Plotly figure spec for a histogram from precomputed bins.
+
+    The result can be passed straight to Plotly.newPlot(). The bins are also
+    included as "bins" for clients that draw the chart themselves.
+
+    Args:
+        values (Sequence[float]): Values to plot
+        title (str): Chart title
+        x_title (str): X axis title
+        y_title (str): Y axis title
+        color (str, optional): Bar colour
+
+    Returns:
+        Dict: {"data": [bar trace], "layout": {...}, "bins": {"edges", "counts"}}
+    """
+    edges, counts = histogram_bins(values)
+    size = float(edges[1] - edges[0]) if len(edges) > 1 else 1.0
+    # Round away floating point noise from the edge arithmetic
+    edges = np.round(edges, 10)
+    centers = (edges[:-1] + edges[1:]) / 2
+    axis = {
+        'gridcolor': GRID_COLOR,
+        'zerolinecolor': GRID_COLOR,
+        'linecolor': GRID_COLOR,
+        'ticks': '',
+        'automargin': True
+    }
+
+    return {
+        'data': [{
+            'type': 'bar',
+            'x': centers.tolist(),
+            'y': counts.tolist(),
+            'width': size,
+            'customdata': np.column_stack([edges[:-1], edges[1:]]).tolist(),
+            'marker': {'color': color},
+            'hovertemplate': f"{x_title}=%{{customdata[0]}} - %{{customdata[1]}}<br>count=%{{y}}<extra></extra>",
+            'showlegend': False
+        }],
+        'layout': {
+            'title': {'text': title, 'x': 0.5},
+            'xaxis': dict(axis, title={'text': x_title}),
+            'yaxis': dict(axis, title={'text': y_title}),
+            'bargap': 0,
+            'showlegend': False,
+            'plot_bgcolor': PLOT_BACKGROUND,
+            'paper_bgcolor': 'white',
+            'font': {'color': FONT_COLOR}
+        },
+        'bins': {'edges': edges.tolist(), 'counts': counts.tolist()}
+    }
+
+
+def plotly_histogram_figure(
+    values: Sequence[float],
+    title: str,
+    x_title: str,
+    y_title: str,
+    color: str = '#3366cc'
+) -> Dict:
+    """
+    Build the full plotly.express histogram figure, binned in the browser.
+
+    Imports plotly on first use; only needed when the complete figure is wanted.
+    """
+    import plotly.express as px
+
+    fig = px.histogram(
+        x=list(values),
+        title=title,
+        labels={'x': x_title},
+        color_discrete_sequence=[color]
+    )
+    fig.update_layout(
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        showlegend=False,
+        title_x=0.5
+    )
+    return fig.to_dict()
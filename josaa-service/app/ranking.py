@@ -0,0 +1,174 @@
+"""
+Top-k ordering and cursor pagination of scored predictions.
+
+A ScoredSet holds the rows of one request that passed the probability
+filter. Pages are cut from it in the order of a stable descending sort by
+probability (ties in row order) using partial selection, so a page of k
+rows costs O(n + k log k) instead of sorting everything. The position
+after the last row served is carried in an opaque cursor; the next page
+is selected from the same cached ScoredSet.
+"""
+
+import base64
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class CursorError(ValueError):
+    """A pagination cursor is malformed."""
+
+
+class StaleCursorError(CursorError):
+    """A pagination cursor refers to a dataset version that is no longer loaded."""
+
+
+def top_k_order(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k largest values, as np.argsort(-values, kind='stable')[:k].
+
+    np.partition finds the k-th largest value; only values at or above it
+    are sorted. Ties keep ascending position order.
+
+    Args:
+        values (np.ndarray): Values to rank
+        k (int): Number of positions to return
+
+    Returns:
+        np.ndarray: Positions in descending value order
+    """
+    n = len(values)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-values, kind='stable')
+
+    threshold = np.partition(values, n - k)[n - k]
+    candidates = np.flatnonzero(values >= threshold)
+    order = np.argsort(-values[candidates], kind='stable')[:k]
+    return candidates[order]
+
+
+class ScoredSet:
+    """
+    Rows that passed the probability filter, with their probabilities.
+
+    `rows` is in ascending row order per year; positions index into `rows`
+    and `probabilities`. With several years, `sources` gives the position in
+    `years` of each row's year (None for a single year). Only row numbers
+    are kept, not the tables, so a cached set does not hold a year in memory.
+
+    When every round was scored, each position is one seat: `by_round` holds
+    its probability in each of `rounds` (NaN where the seat has no cutoff),
+    `probabilities` its best one and `rows` the row of its best round.
+    Shared through the prediction cache, so never mutated.
+    """
+
+    __slots__ = ('version', 'rows', 'probabilities', 'years', 'sources', 'rounds', 'by_round', '_plot')
+
+    def __init__(
+        self,
+        version: int,
+        rows: np.ndarray,
+        probabilities: np.ndarray,
+        years: Tuple[int, ...] = (),
+        sources: Optional[np.ndarray] = None,
+        rounds: Optional[Tuple[str, ...]] = None,
+        by_round: Optional[np.ndarray] = None
+    ):
+        self.version = version
+        self.rows = rows
+        self.probabilities = probabilities
+        self.years = years
+        self.sources = sources
+        self.rounds = rounds
+        self.by_round = by_round
+        self._plot = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def order(self, limit: Optional[int] = None, after: Optional[Tuple[float, int]] = None) -> np.ndarray:
+        """
+        Positions of the next rows in descending probability order.
+
+        Args:
+            limit (int, optional): Maximum number of positions. Defaults to all.
+            after (Tuple[float, int], optional): (probability, position) of the
+                last row already served
+
+        Returns:
+            np.ndarray: Positions into rows/probabilities
+        """
+        values = self.probabilities
+        positions = None
+        if after is not None:
+            probability, position = after
+            index = np.arange(len(values))
+            remaining = (values < probability) | ((values == probability) & (index > position))
+            positions = np.flatnonzero(remaining)
+            values = values[positions]
+
+        limit = len(values) if limit is None else limit
+        order = top_k_order(values, limit)
+        return order if positions is None else positions[order]
+
+    def plot(self, build) -> Any:
+        """Return the plot of all probabilities, built once with build(probabilities)."""
+        if self._plot is None:
+            self._plot = build(self.probabilities)
+        return self._plot
+
+
+def encode_cursor(query: Dict[str, Any], version: int, served: int, probability: float, position: int) -> str:
+    """
+    Build an opaque cursor for the page after a given row.
+
+    Args:
+        query (Dict[str, Any]): Request parameters the cursor continues
+        version (int): Dataset version the results came from
+        served (int): Number of rows served so far
+        probability (float): Probability of the last row served
+        position (int): Position of the last row served
+
+    Returns:
+        str: URL-safe cursor
+    """
+    state = {'q': query, 'v': version, 'n': served, 'p': probability, 'i': position}
+    raw = json.dumps(state, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, version: int) -> Dict[str, Any]:
+    """
+    Decode a cursor made by encode_cursor.
+
+    Args:
+        cursor (str): Cursor from a previous page
+        version (int): Currently loaded dataset version
+
+    Returns:
+        Dict[str, Any]: {"query", "served", "after": (probability, position)}
+
+    Raises:
+        CursorError: The cursor is malformed
+        StaleCursorError: The data changed since the cursor was issued
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        state = json.loads(raw)
+        result = {
+            'query': dict(state['q']),
+            'served': int(state['n']),
+            'after': (float(state['p']), int(state['i']))
+        }
+        cursor_version = int(state['v'])
+    except (ValueError, KeyError, TypeError):
+        raise CursorError("Invalid cursor")
+    if result['served'] < 0:
+        raise CursorError("Invalid cursor")
+
+    if cursor_version != version:
+        raise StaleCursorError("The data has been updated since this page was requested; start again")
+    return result
@@ -0,0 +1,50 @@
+import json
+from typing import Any, Dict, List, Sequence
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the standard library
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialise content to compact JSON bytes.
+
+    Uses orjson when it is installed (several times faster on large row
+    lists), otherwise json.dumps without whitespace.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, separators=(',', ':'), ensure_ascii=False, allow_nan=False).encode('utf-8')
+
+
+class CompactJSONResponse(Response):
+    """JSON response rendered by dumps(); content may also be pre-encoded bytes."""
+
+    media_type = 'application/json'
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def to_table(records: List[Dict], fields: Dict[str, str]) -> Dict[str, List]:
+    """
+    Convert records to a columns-once table layout.
+
+    Args:
+        records (List[Dict]): Records with the same keys
+        fields (Dict[str, str]): Output column name -> record key, in output order
+
+    Returns:
+        Dict[str, List]: {"columns": [names], "rows": [[values], ...]}
+    """
+    keys: Sequence[str] = list(fields.values())
+    return {
+        'columns': list(fields),
+        'rows': [[record[key] for key in keys] for record in records]
+    }
@@ -1,127 +1,372 @@
-from typing import Dict, List, Tuple, Optional
-import pandas as pd
+from typing import Dict, Iterator, List, Tuple, Optional
+import time
+import numpy as np
+from .dataset import DatasetSnapshot
+from .index import RankIntervals
+from .models import PredictionInput
+from .table import JosaaTable
+from .years import UnknownYearError
+from .cache import prediction_key
 from .utils import (
-    load_data, 
-    calculate_admission_probability, 
-    get_admission_chances,
+    prediction_cache,
+    get_index,
+    get_view,
+    calculate_admission_probability_batch, 
+    get_admission_chances_batch,
     create_probability_plot
 )
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on the number of ranks evaluated by one sweep
+SWEEP_MAX_POINTS = 5000
+
+# Columns the service compares (and returns) case-normalised
+NORMALISED_COLUMNS = ("Category", "Academic Program Name", "College Type")
+
+def _partition_intervals(
+    snapshot: DatasetSnapshot,
+    category: str,
+    college_type: str,
+    preferred_branch: str,
+    round_no: str
+) -> RankIntervals:
+    """Look up the rank-sorted partition for normalised filter values."""
+    category = category.lower()
+    preferred_branch = preferred_branch.lower()
+    college_type = college_type.upper()
+
+    return get_index(snapshot).select_intervals(
+        round_no=str(round_no),
+        category=None if category == "all" else category,
+        college_type=None if college_type == "ALL" else college_type,
+        program=None if preferred_branch == "all" else preferred_branch,
+        normalise=True
+    )
+
+def _band_rows(intervals: RankIntervals, table: JosaaTable, jee_rank: int) -> np.ndarray:
+    """
+    Select the top_10, next_20 and last_20 bands around a rank.
+
+    Bands are found by binary search on the rank-sorted rows and each keeps
+    the first rows in table order, like DataFrame.head(). Rows repeated
+    across bands (or with identical values) are kept once.
+    """
+    top_10 = intervals.first(intervals.opening_between(jee_rank - 200, jee_rank), 10)
+    next_20 = intervals.first(intervals.covering(table, jee_rank), 20)
+    last_20 = intervals.first(intervals.closing_between(jee_rank, jee_rank + 200), 20)
+    return table.drop_duplicate_rows(
+        np.concatenate([top_10, next_20, last_20]),
+        normalise=NORMALISED_COLUMNS
+    )
+
+def _sort_descending(values: np.ndarray) -> np.ndarray:
+    """Order of Series.sort_values(ascending=False) with pandas' default quicksort."""
+    order = np.argsort(values[::-1], kind='quicksort')
+    return (len(values) - 1 - order)[::-1]
+
+def _build_preferences(
+    table: JosaaTable,
+    rows: np.ndarray,
+    probabilities: np.ndarray,
+    min_probability: float
+) -> List[Dict]:
+    """Filter, rank and decode scored rows into preference records."""
+    # Filter by minimum probability
+    keep = probabilities >= min_probability
+    rows, probabilities = rows[keep], probabilities[keep]
+
+    # Sort by probability
+    order = _sort_descending(probabilities)
+    rows, probabilities = rows[order], probabilities[order]
+
+    columns = {
+        'Preference': range(1, len(rows) + 1),
+        'Institute': table['Institute'].decode(rows),
+        'College Type': table['College Type'].decode(rows, normalise=True),
+        'Location': table['Location'].decode(rows),
+        'Branch': table['Academic Program Name'].decode(rows, normalise=True),
+        'Opening Rank': table.opening_rank[rows].tolist(),
+        'Closing Rank': table.closing_rank[rows].tolist(),
+        'Admission Probability (%)': probabilities.tolist(),
+        'Admission Chances': get_admission_chances_batch(probabilities)
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
 def predict_preferences(
     jee_rank: int,
     category: str,
     college_type: str,
     preferred_branch: str,
     round_no: str,
-    min_probability: float = 0
+    min_probability: float = 0,
+    year: Optional[int] = None
 ) -> Tuple[List[Dict], Optional[dict]]:
-    """Generate college preferences based on input criteria."""
+    """Generate college preferences based on input criteria, for one counselling year."""
     try:
-        df = load_data()
-        if df.empty:
+        view = get_view(None if year is None else [year])
+        year, snapshot = view.years[0], view.snapshots[0]
+        if not len(snapshot):
             logger.error("No data available for prediction")
             return [], None
 
-        # Apply filters
-        df = df.copy()
-        df["Category"] = df["Category"].str.lower()
-        df["Academic Program Name"] = df["Academic Program Name"].str.lower()
-        df["College Type"] = df["College Type"].str.upper()
-        
-        category = category.lower()
-        preferred_branch = preferred_branch.lower()
-        college_type = college_type.upper()
-
-        # Apply category filter
-        if category != "all":
-            df = df[df["Category"] == category]
-        
-        # Apply college type filter
-        if college_type != "ALL":
-            df = df[df["College Type"] == college_type]
-        
-        # Apply branch filter
-        if preferred_branch != "all":
-            df = df[df["Academic Program Name"] == preferred_branch]
-        
-        # Apply round filter
-        df = df[df["Round"] == str(round_no)]
-
-        if df.empty:
+        # Inputs are case-normalised below, so case variants share an entry
+        key = ('preferences', year) + prediction_key(
+            jee_rank, category, college_type, preferred_branch, round_no, min_probability
+        )
+        cached = prediction_cache.get(key, view.generation)
+        if cached is not None:
+            return cached
+
+        table = snapshot.data
+        intervals = _partition_intervals(snapshot, category, college_type, preferred_branch, round_no)
+        if not len(intervals):
             logger.warning("No colleges found matching criteria")
             return [], None
 
         # Generate college lists
-        top_10 = df[
-            (df["Opening Rank"] >= jee_rank - 200) &
-            (df["Opening Rank"] <= jee_rank)
-        ].head(10)
-
-        next_20 = df[
-            (df["Opening Rank"] <= jee_rank) &
-            (df["Closing Rank"] >= jee_rank)
-        ].head(20)
-
-        last_20 = df[
-            (df["Closing Rank"] >= jee_rank) &
-            (df["Closing Rank"] <= jee_rank + 200)
-        ].head(20)
-
-        # Combine results
-        final_list = pd.concat([top_10, next_20, last_20]).drop_duplicates()
+        rows = _band_rows(intervals, table, jee_rank)
+        if not len(rows):
+            logger.warning("No colleges found near the given rank")
+            return [], None
 
         # Calculate probabilities
-        final_list['Admission Probability (%)'] = final_list.apply(
-            lambda x: calculate_admission_probability(
-                jee_rank, 
-                x['Opening Rank'], 
-                x['Closing Rank']
-            ),
-            axis=1
-        )
-
-        final_list['Admission Chances'] = final_list['Admission Probability (%)'].apply(
-            get_admission_chances
+        probabilities = calculate_admission_probability_batch(
+            jee_rank,
+            table.opening_rank[rows],
+            table.closing_rank[rows]
         )
-
-        # Filter by minimum probability
-        final_list = final_list[
-            final_list['Admission Probability (%)'] >= min_probability
-        ]
-        
-        # Sort by probability
-        final_list = final_list.sort_values(
-            'Admission Probability (%)', 
-            ascending=False
-        )
-        
-        # Add preference order
-        final_list['Preference'] = range(1, len(final_list) + 1)
-
-        # Prepare output
-        preferences = final_list[[
-            'Preference',
-            'Institute',
-            'College Type',
-            'Location',
-            'Academic Program Name',
-            'Opening Rank',
-            'Closing Rank',
-            'Admission Probability (%)',
-            'Admission Chances'
-        ]].rename(columns={
-            'Academic Program Name': 'Branch'
-        }).to_dict('records')
+        preferences = _build_preferences(table, rows, probabilities, min_probability)
 
         # Generate plot
-        plot_data = create_probability_plot(final_list)
+        plot_data = create_probability_plot(preferences, key='Admission Probability (%)')
 
         logger.info(f"Generated {len(preferences)} preferences")
+        prediction_cache.put(key, view.generation, (preferences, plot_data), size=len(preferences))
         return preferences, plot_data
 
+    except UnknownYearError:
+        raise
+
     except Exception as e:
         logger.error(f"Error in predict_preferences: {str(e)}", exc_info=True)
         return [], None
+
+def _to_college(preference: Dict) -> Dict:
+    """Rename a preference record to the College model's field names."""
+    return {
+        'Preference': preference['Preference'],
+        'Institute': preference['Institute'],
+        'College_Type': preference['College Type'],
+        'Location': preference['Location'],
+        'Branch': preference['Branch'],
+        'Opening_Rank': preference['Opening Rank'],
+        'Closing_Rank': preference['Closing Rank'],
+        'Admission_Probability': preference['Admission Probability (%)'],
+        'Admission_Chances': preference['Admission Chances']
+    }
+
+def predict_preferences_batch(inputs: List[PredictionInput]) -> Iterator[Dict]:
+    """
+    Generate preferences for many candidates, grouped by filter partition.
+
+    Inputs sharing a year, category, college type, branch and round are looked up
+    once and their bands are scored together in one vectorized call. One
+    PredictionOutput record (plus its input index) is yielded per input as
+    soon as its group is done, followed by a summary record with per-group
+    timings, each with the version of the year's data it was computed from.
+
+    Args:
+        inputs (List[PredictionInput]): Prediction requests
+
+    Yields:
+        Dict: {"index", "preferences", "plot_data"} per input, or
+            {"index", "error"} for an invalid input; then {"summary": {...}}
+    """
+    for records in predict_preferences_batch_groups(inputs):
+        yield from records
+
+def predict_preferences_batch_groups(inputs: List[PredictionInput]) -> Iterator[List[Dict]]:
+    """
+    Generate the records of predict_preferences_batch() one group at a time.
+
+    All the work of a group is done by the next() call that returns it, so
+    a caller can run each step on a worker thread.
+
+    Args:
+        inputs (List[PredictionInput]): Prediction requests
+
+    Yields:
+        List[Dict]: Records of one group, as for predict_preferences_batch();
+            the summary record comes last, alone
+    """
+    start = time.perf_counter()
+    generation = get_view().generation
+
+    groups: Dict[Tuple[Optional[int], str, str, str, str], List[int]] = {}
+    for i, item in enumerate(inputs):
+        key = (
+            item.year,
+            item.category.lower(),
+            item.college_type.upper(),
+            item.preferred_branch.lower(),
+            str(item.round_no)
+        )
+        groups.setdefault(key, []).append(i)
+
+    timings = []
+    for (year, category, college_type, preferred_branch, round_no), members in groups.items():
+        group_start = time.perf_counter()
+        try:
+            view = get_view(None if year is None else [year])
+        except UnknownYearError as e:
+            yield [{"index": i, "error": str(e)} for i in members]
+            continue
+        year, snapshot = view.years[0], view.snapshots[0]
+        table = snapshot.data
+        intervals = _partition_intervals(snapshot, category, college_type, preferred_branch, round_no)
+
+        records, valid = [], []
+        for i in members:
+            if inputs[i].jee_rank <= 0:
+                records.append({"index": i, "error": "JEE Rank must be a positive number"})
+            else:
+                valid.append(i)
+
+        # Select every member's bands, then score all of them at once
+        band_rows = [_band_rows(intervals, table, inputs[i].jee_rank) for i in valid]
+        sizes = [len(rows) for rows in band_rows]
+        rows = np.concatenate(band_rows) if band_rows else np.empty(0, dtype=np.int64)
+        ranks = np.repeat([inputs[i].jee_rank for i in valid], sizes)
+        probabilities = calculate_admission_probability_batch(
+            ranks,
+            table.opening_rank[rows],
+            table.closing_rank[rows]
+        )
+
+        offsets = np.cumsum([0] + sizes)
+        for n, i in enumerate(valid):
+            preferences = _build_preferences(
+                table,
+                rows[offsets[n]:offsets[n + 1]],
+                probabilities[offsets[n]:offsets[n + 1]],
+                inputs[i].min_probability
+            )
+            records.append({
+                "index": i,
+                "preferences": [_to_college(p) for p in preferences],
+                "plot_data": None
+            })
+
+        timings.append({
+            "year": year,
+            "dataset_version": snapshot.version,
+            "category": category,
+            "college_type": college_type,
+            "branch": preferred_branch,
+            "round_no": round_no,
+            "size": len(members),
+            "seconds": round(time.perf_counter() - group_start, 6)
+        })
+        yield records
+
+    yield [{
+        "summary": {
+            "inputs": len(inputs),
+            "groups": len(groups),
+            "generation": generation,
+            "seconds": round(time.perf_counter() - start, 6),
+            "batches": timings
+        }
+    }]
+
+def sweep_admission_probability(
+    institute: str,
+    preferred_branch: str,
+    category: str,
+    round_no: str,
+    rank_start: int,
+    rank_end: int,
+    step: int = 100,
+    year: Optional[int] = None
+) -> Dict:
+    """
+    Evaluate the admission probability of one program over a range of ranks.
+
+    All seats of the program (quota/gender variants) are scored against every
+    rank in a single vectorized call.
+
+    Args:
+        institute (str): Institute name
+        preferred_branch (str): Academic program name
+        category (str): Reservation category
+        round_no (str): Counseling round number
+        rank_start (int): First rank of the sweep
+        rank_end (int): Last rank of the sweep (inclusive)
+        step (int, optional): Distance between ranks. Defaults to 100.
+        year (int, optional): Counselling year. Defaults to the default year.
+
+    Returns:
+        Dict with the swept ranks and one probability curve per seat
+
+    Raises:
+        ValueError: If the rank range is invalid or too large
+        UnknownYearError: There is no data for the year
+    """
+    if rank_start <= 0 or rank_end < rank_start or step <= 0:
+        raise ValueError("Rank range must satisfy 0 < rank_start <= rank_end and step > 0")
+
+    # Checked before allocating: the ranks come straight from the query string
+    if (rank_end - rank_start) // step + 1 > SWEEP_MAX_POINTS:
+        raise ValueError(f"Rank range covers more than {SWEEP_MAX_POINTS} points; increase the step")
+    ranks = np.arange(rank_start, rank_end + 1, step)
+
+    view = get_view(None if year is None else [year])
+    year, snapshot = view.years[0], view.snapshots[0]
+    table = snapshot.data
+    rows = get_index(snapshot).select(
+        round_no=str(round_no),
+        category=category,
+        college_type=None,
+        program=preferred_branch,
+        normalise=True
+    )
+    code = table["Institute"].code(institute)
+    rows = rows[table["Institute"].codes[rows] == code] if code is not None else rows[:0]
+
+    opening_rank = table.opening_rank[rows]
+    closing_rank = table.closing_rank[rows]
+    probabilities = calculate_admission_probability_batch(
+        ranks[np.newaxis, :],
+        opening_rank[:, np.newaxis],
+        closing_rank[:, np.newaxis]
+    )
+
+    curves = [
+        {
+            "quota": quota,
+            "gender": gender,
+            "opening_rank": int(opening),
+            "closing_rank": int(closing),
+            "probabilities": curve.tolist()
+        }
+        for quota, gender, opening, closing, curve in zip(
+            table["Quota"].decode(rows, missing=None),
+            table["Gender"].decode(rows, missing=None),
+            opening_rank,
+            closing_rank,
+            probabilities
+        )
+    ]
+
+    logger.info(f"Swept {len(ranks)} ranks for {len(curves)} seats")
+    return {
+        "institute": institute,
+        "branch": preferred_branch,
+        "category": category,
+        "round_no": str(round_no),
+        "year": year,
+        "ranks": ranks.tolist(),
+        "curves": curves
+    }
@@ -0,0 +1,229 @@
+"""
+Synthetic JOSAA cutoff tables for benchmarks and local development.
+
+The generated table has the columns and value formats of the published
+cutoff file: institutes of the four college types with their quotas,
+programs, the six seat categories (PwD ranks carry the "P" suffix), both
+gender pools and six rounds. Closing ranks follow the institute's standing
+and the program's popularity, widen from round to round and are category
+ranks for the reserved categories, so rank bands and filters select
+realistic shares of the rows.
+
+At scale 1 the table has about 70,000 rows, roughly the size of one year's
+file; scale multiplies the number of institutes. The output is determined
+by scale and seed. Run from the service directory with:
+    python -m app.synthetic -o data/josaa_synthetic.csv --scale 10
+"""
+
+import argparse
+import math
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# College type: (full name, institutes at scale 1, quotas, closing rank range of the top program)
+COLLEGE_TYPES = {
+    'IIT': ('Indian Institute of Technology', 23, ['AI'], (60, 9000)),
+    'NIT': ('National Institute of Technology', 31, ['HS', 'OS'], (1500, 60000)),
+    'IIIT': ('Indian Institute of Information Technology', 26, ['HS', 'OS'], (4000, 90000)),
+    'GFTI': ('Institute of Engineering and Technology', 40, ['HS', 'OS'], (15000, 160000))
+}
+
+CITIES = [
+    'Agartala', 'Allahabad', 'Bhopal', 'Bhubaneswar', 'Calicut', 'Delhi', 'Dhanbad', 'Durgapur',
+    'Goa', 'Guwahati', 'Hamirpur', 'Hyderabad', 'Indore', 'Jaipur', 'Jalandhar', 'Jammu',
+    'Jodhpur', 'Kanpur', 'Kharagpur', 'Kota', 'Kurukshetra', 'Lucknow', 'Madras', 'Manipur',
+    'Meghalaya', 'Mizoram', 'Nagaland', 'Nagpur', 'Patna', 'Puducherry', 'Raipur', 'Ranchi',
+    'Roorkee', 'Rourkela', 'Silchar', 'Srinagar', 'Surat', 'Surathkal', 'Tiruchirappalli',
+    'Una', 'Uttarakhand', 'Warangal'
+]
+
+# Program names in order of popularity, with their relative weight
+PROGRAMS = [
+    ('Computer Science and Engineering (4 Years, Bachelor of Technology)', 10),
+    ('Electronics and Communication Engineering (4 Years, Bachelor of Technology)', 8),
+    ('Electrical Engineering (4 Years, Bachelor of Technology)', 7),
+    ('Information Technology (4 Years, Bachelor of Technology)', 5),
+    ('Artificial Intelligence and Data Science (4 Years, Bachelor of Technology)', 4),
+    ('Mechanical Engineering (4 Years, Bachelor of Technology)', 8),
+    ('Mathematics and Computing (4 Years, Bachelor of Technology)', 3),
+    ('Engineering Physics (4 Years, Bachelor of Technology)', 3),
+    ('Chemical Engineering (4 Years, Bachelor of Technology)', 5),
+    ('Civil Engineering (4 Years, Bachelor of Technology)', 7),
+    ('Metallurgical and Materials Engineering (4 Years, Bachelor of Technology)', 4),
+    ('Production and Industrial Engineering (4 Years, Bachelor of Technology)', 3),
+    ('Biotechnology (4 Years, Bachelor of Technology)', 3),
+    ('Architecture (5 Years, Bachelor of Architecture)', 3),
+    ('Computer Science and Engineering (5 Years, Bachelor and Master of Technology (Dual Degree))', 2),
+    ('Mining Engineering (4 Years, Bachelor of Technology)', 2),
+    ('Aerospace Engineering (4 Years, Bachelor of Technology)', 2),
+    ('Chemistry (5 Years, Bachelor of Science and Master of Science (Dual Degree))', 2)
+]
+
+# Category: closing rank relative to OPEN (reserved categories have their own rank lists)
+CATEGORIES = {
+    'OPEN': 1.0,
+    'EWS': 0.16,
+    'OBC-NCL': 0.3,
+    'SC': 0.15,
+    'ST': 0.07,
+    'OPEN (PwD)': 0.012
+}
+
+# Gender pool: closing rank relative to the gender-neutral pool
+GENDERS = {
+    'Gender-Neutral': 1.0,
+    'Female-only (including Supernumerary)': 1.45
+}
+
+ROUNDS = 6
+
+# Number of ranked candidates
+MAX_RANK = 1200000
+
+# Share of (program, quota, category, gender, round) combinations with allotted seats
+SEAT_SHARE = 0.6
+
+COLUMNS = [
+    'Institute', 'College Type', 'Location', 'Academic Program Name', 'Quota',
+    'Category', 'Gender', 'Opening Rank', 'Closing Rank', 'Round'
+]
+
+
+def _institutes(scale: float, rng: np.random.Generator) -> pd.DataFrame:
+    """One row per institute: name, type, location and the closing rank of its top program."""
+    rows = []
+    for college_type, (full_name, count, quotas, (best, worst)) in COLLEGE_TYPES.items():
+        count = max(1, round(count * scale))
+        # Standing within the type: closing ranks spread geometrically from best to worst
+        ranks = best * (worst / best) ** (np.arange(count) / max(1, count - 1))
+        for i in range(count):
+            city = CITIES[i % len(CITIES)]
+            suffix = '' if i < len(CITIES) else f' {i // len(CITIES) + 1}'
+            rows.append({
+                'Institute': f'{full_name} {city}{suffix}',
+                'College Type': college_type,
+                'Location': city,
+                'quotas': quotas,
+                'top_rank': ranks[i] * rng.lognormal(0, 0.1)
+            })
+    return pd.DataFrame(rows)
+
+
+def generate_cutoffs(scale: float = 1.0, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a synthetic JOSAA cutoff table.
+
+    Args:
+        scale (float, optional): Size relative to one year's file. Defaults to 1.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: Cutoff rows with the columns of the published file, ranks as text
+    """
+    rng = np.random.default_rng(seed)
+    institutes = _institutes(scale, rng)
+
+    names = [name for name, _ in PROGRAMS]
+    weights = np.array([weight for _, weight in PROGRAMS], dtype=float)
+
+    # One entry per (institute, program, quota) seat matrix
+    seat_institute, seat_program, seat_quota, seat_rank = [], [], [], []
+    for i, institute in enumerate(institutes.itertuples(index=False)):
+        count = int(rng.integers(4, 12))
+        programs = np.sort(rng.choice(len(names), size=count, replace=False, p=weights / weights.sum()))
+        for program in programs:
+            # Less popular programs close later
+            popularity = 1 + program * 0.2 * rng.lognormal(0, 0.2)
+            for quota in institute.quotas:
+                seat_institute.append(i)
+                seat_program.append(program)
+                seat_quota.append(quota)
+                # The home state quota closes later than the other state quota
+                seat_rank.append(institute.top_rank * popularity * (1.3 if quota == 'HS' else 1.0))
+
+    # Every seat matrix crossed with category, gender and round, then thinned out
+    categories = list(CATEGORIES)
+    genders = list(GENDERS)
+    per_seat = len(categories) * len(genders) * ROUNDS
+    seat = np.repeat(np.arange(len(seat_institute)), per_seat)
+    combination = np.tile(np.arange(per_seat), len(seat_institute))
+    keep = rng.random(len(seat)) < SEAT_SHARE
+    seat, combination = seat[keep], combination[keep]
+
+    category = combination // (len(genders) * ROUNDS)
+    gender = combination // ROUNDS % len(genders)
+    round_no = combination % ROUNDS + 1
+
+    closing = (
+        np.asarray(seat_rank)[seat]
+        * np.array(list(CATEGORIES.values()))[category]
+        * np.array(list(GENDERS.values()))[gender]
+        * (1 + 0.05 * (round_no - 1))
+        * rng.lognormal(0, 0.15, len(seat))
+    )
+    closing = np.clip(closing, 1, MAX_RANK).astype(np.int64)
+    opening = np.maximum(1, (closing * rng.uniform(0.3, 0.9, len(seat))).astype(np.int64))
+
+    opening_text = opening.astype(str).astype(object)
+    closing_text = closing.astype(str).astype(object)
+    # PwD ranks are published with a "P" suffix
+    pwd = np.array(['PwD' in name for name in categories])[category]
+    opening_text[pwd] = opening_text[pwd] + 'P'
+    closing_text[pwd] = closing_text[pwd] + 'P'
+
+    institute = np.asarray(seat_institute)[seat]
+    df = pd.DataFrame({
+        'Institute': institutes['Institute'].to_numpy()[institute],
+        'College Type': institutes['College Type'].to_numpy()[institute],
+        'Location': institutes['Location'].to_numpy()[institute],
+        'Academic Program Name': np.asarray(names, dtype=object)[np.asarray(seat_program)[seat]],
+        'Quota': np.asarray(seat_quota, dtype=object)[seat],
+        'Category': np.asarray(categories, dtype=object)[category],
+        'Gender': np.asarray(genders, dtype=object)[gender],
+        'Opening Rank': opening_text,
+        'Closing Rank': closing_text,
+        'Round': round_no
+    }, columns=COLUMNS)
+
+    # The published file lists one round after the other
+    return df.sort_values('Round', kind='stable').reset_index(drop=True)
+
+
+def write_cutoffs(path: Path, scale: float = 1.0, seed: int = 0) -> int:
+    """
+    Write a synthetic cutoff table as CSV.
+
+    Args:
+        path (Path): Output CSV file
+        scale (float, optional): Size relative to one year's file. Defaults to 1.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        int: Number of rows written
+    """
+    df = generate_cutoffs(scale, seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
+    return len(df)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic JOSAA cutoff CSV")
+    parser.add_argument('-o', '--output', type=Path, required=True, help="Output CSV file")
+    parser.add_argument('--scale', type=float, default=1.0, help="Size relative to one year's file (default 1)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default 0)")
+    args = parser.parse_args(argv)
+
+    if not math.isfinite(args.scale) or args.scale <= 0:
+        parser.error("--scale must be a positive number")
+    rows = write_cutoffs(args.output, args.scale, args.seed)
+    print(f"Wrote {rows} rows to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
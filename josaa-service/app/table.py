@@ -0,0 +1,312 @@
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from nextstep_common.compiled import code_dtype
+
+logger = logging.getLogger(__name__)
+
+# String columns stored as integer codes
+ENCODED_COLUMNS = [
+    'Institute', 'College Type', 'Location',
+    'Academic Program Name', 'Quota', 'Category',
+    'Gender', 'Round'
+]
+RANK_COLUMNS = ['Opening Rank', 'Closing Rank']
+
+# Rank used for rows without a numeric rank (e.g. preparatory "123P" ranks).
+# The probability model is defined against this value, so it is kept.
+MISSING_RANK = 9999999
+
+# Case normalisation applied before comparing user input with a column
+NORMALISERS: Dict[str, Callable[[str], str]] = {
+    'Category': str.lower,
+    'Academic Program Name': str.lower,
+    'College Type': str.upper
+}
+
+
+class EncodedColumn:
+    """
+    A string column stored as integer codes into a sorted dictionary.
+
+    Code -1 marks a missing value. Lookups from user input to codes are
+    precomputed both for exact values and for case-normalised values, so
+    filters become integer comparisons.
+    """
+
+    __slots__ = (
+        'name', 'codes', 'dictionary', '_exact', '_normalised', '_normaliser',
+        '_normalised_dictionary', '_normalised_ids'
+    )
+
+    def __init__(self, name: str, codes: np.ndarray, dictionary: Sequence[str]):
+        self.name = name
+        self.codes = codes
+        self.dictionary = np.empty(len(dictionary) + 1, dtype=object)
+        self.dictionary[:-1] = list(dictionary)
+        # Trailing slot so that code -1 decodes to NaN
+        self.dictionary[-1] = np.nan
+
+        self._exact = {value: code for code, value in enumerate(dictionary)}
+        self._normaliser = NORMALISERS.get(name)
+        self._normalised: Dict[str, np.ndarray] = {}
+        self._normalised_dictionary = self.dictionary
+        if self._normaliser:
+            self._normalised_dictionary = self.dictionary.copy()
+            self._normalised_dictionary[:-1] = [self._normaliser(str(v)) for v in dictionary]
+            grouped: Dict[str, List[int]] = {}
+            for code, value in enumerate(dictionary):
+                grouped.setdefault(self._normaliser(str(value)), []).append(code)
+            self._normalised = {
+                key: np.array(codes, dtype=self.codes.dtype) for key, codes in grouped.items()
+            }
+
+        # Code -> id of its case-normalised value; the trailing slot maps -1 to -1
+        self._normalised_ids = np.append(np.arange(len(dictionary)), -1)
+        if self._normaliser:
+            ids = {key: i for i, key in enumerate(self._normalised)}
+            self._normalised_ids[:-1] = [ids[self._normaliser(str(v))] for v in dictionary]
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> 'EncodedColumn':
+        """Encode a column of strings."""
+        codes, uniques = pd.factorize(series, sort=True)
+        return cls(series.name, codes.astype(code_dtype(len(uniques))), list(uniques))
+
+    @property
+    def values(self) -> List[str]:
+        """Distinct values in sorted order."""
+        return list(self.dictionary[:-1])
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+    def code(self, value: str) -> Optional[int]:
+        """Return the code of an exact value, or None if it does not occur."""
+        return self._exact.get(value)
+
+    def lookup(self, value: str, normalise: bool = False) -> np.ndarray:
+        """
+        Return the codes matching a filter value.
+
+        Args:
+            value (str): Filter value
+            normalise (bool, optional): Compare case-normalised values
+
+        Returns:
+            np.ndarray: Matching codes (empty if the value does not occur)
+        """
+        if normalise and self._normaliser:
+            return self._normalised.get(self._normaliser(value), self.codes[:0])
+        code = self.code(value)
+        return np.array([] if code is None else [code], dtype=self.codes.dtype)
+
+    def mask(self, value: str, normalise: bool = False) -> np.ndarray:
+        """Boolean mask of the rows equal to value."""
+        codes = self.lookup(value, normalise)
+        if len(codes) == 1:
+            return self.codes == codes[0]
+        return np.isin(self.codes, codes)
+
+    def keys(self, rows: np.ndarray, normalise: bool = False) -> np.ndarray:
+        """Codes of rows, optionally merged by case-normalised value, for equality tests."""
+        codes = self.codes[rows]
+        return self._normalised_ids[codes] if normalise else codes
+
+    def decode(
+        self,
+        rows: Optional[np.ndarray] = None,
+        normalise: bool = False,
+        missing: object = np.nan
+    ) -> np.ndarray:
+        """
+        Decode codes back to strings.
+
+        Args:
+            rows (np.ndarray, optional): Row ids to decode. Defaults to all rows.
+            normalise (bool, optional): Return case-normalised strings
+            missing (object, optional): Value for missing entries. Defaults to NaN.
+
+        Returns:
+            np.ndarray: Object array of strings
+        """
+        dictionary = self._normalised_dictionary if normalise else self.dictionary
+        if missing is not np.nan:
+            dictionary = dictionary.copy()
+            dictionary[-1] = missing
+        codes = self.codes if rows is None else self.codes[rows]
+        return dictionary[codes]
+
+
+class JosaaTable:
+    """
+    Compact in-memory JOSAA cutoff table.
+
+    String columns are dictionary-encoded (EncodedColumn) and ranks are int32
+    arrays. Rows can be decoded back into a DataFrame on demand.
+    """
+
+    def __init__(self, columns: Dict[str, EncodedColumn], numeric: Dict[str, np.ndarray], order: List[str]):
+        missing = [c for c in ENCODED_COLUMNS if c not in columns] + [c for c in RANK_COLUMNS if c not in numeric]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+
+        self.columns = columns
+        self.numeric = numeric
+        self.order = order
+        self.opening_rank = numeric['Opening Rank']
+        self.closing_rank = numeric['Closing Rank']
+
+    def __len__(self) -> int:
+        return len(self.opening_rank)
+
+    def __getitem__(self, name: str) -> EncodedColumn:
+        return self.columns[name]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the code and numeric arrays."""
+        return sum(c.nbytes for c in self.columns.values()) + sum(v.nbytes for v in self.numeric.values())
+
+    def arrays(self) -> List[np.ndarray]:
+        """The code and numeric arrays holding the rows."""
+        return [c.codes for c in self.columns.values()] + list(self.numeric.values())
+
+    @staticmethod
+    def _compact_ranks(values: np.ndarray) -> np.ndarray:
+        """Store ranks as int32 unless they carry fractional values."""
+        if values.dtype == np.int32:
+            # Already compact, e.g. memory-mapped from a compiled snapshot; keep sharing it
+            return values
+        values = np.asarray(values, dtype=np.float64)
+        values = np.where(np.isnan(values), MISSING_RANK, values)
+        if np.all(values == np.floor(values)) and (values.size == 0 or values.max() <= np.iinfo(np.int32).max):
+            return values.astype(np.int32)
+        logger.warning("Fractional ranks found; keeping float64 rank columns")
+        return values
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'JosaaTable':
+        """
+        Encode a preprocessed DataFrame.
+
+        Args:
+            df (pd.DataFrame): Output of preprocess_dataframe
+
+        Returns:
+            JosaaTable: Encoded table
+        """
+        if df.empty:
+            return cls.empty()
+
+        columns = {}
+        numeric = {}
+        for name in df.columns:
+            if name in RANK_COLUMNS:
+                numeric[name] = cls._compact_ranks(df[name].to_numpy())
+            elif pd.api.types.is_numeric_dtype(df[name].dtype):
+                numeric[name] = df[name].to_numpy()
+            else:
+                columns[name] = EncodedColumn.from_series(df[name].astype(object))
+        return cls(columns, numeric, list(df.columns))
+
+    @classmethod
+    def from_compiled(cls, compiled: Dict[str, dict]) -> 'JosaaTable':
+        """
+        Build the table from compiled snapshot columns without decoding strings.
+
+        Args:
+            compiled (Dict[str, dict]): Output of compiled.load_compiled_columns
+
+        Returns:
+            JosaaTable: Encoded table sharing the snapshot's code arrays
+        """
+        columns = {}
+        numeric = {}
+        for name, column in compiled.items():
+            if 'codes' in column:
+                columns[name] = EncodedColumn(name, column['codes'], column['dictionary'])
+            elif name in RANK_COLUMNS:
+                numeric[name] = cls._compact_ranks(column['values'])
+            else:
+                numeric[name] = column['values']
+        return cls(columns, numeric, list(compiled))
+
+    @classmethod
+    def empty(cls) -> 'JosaaTable':
+        """An empty table with all columns."""
+        columns = {name: EncodedColumn(name, np.empty(0, dtype=np.int8), []) for name in ENCODED_COLUMNS}
+        numeric = {name: np.empty(0, dtype=np.int32) for name in RANK_COLUMNS}
+        return cls(columns, numeric, ENCODED_COLUMNS + RANK_COLUMNS)
+
+    def drop_duplicate_rows(self, rows: np.ndarray, normalise: Iterable[str] = ()) -> np.ndarray:
+        """
+        Remove rows whose decoded values repeat an earlier row.
+
+        Matches DataFrame.drop_duplicates() on frame(rows, normalise) without
+        decoding anything.
+
+        Args:
+            rows (np.ndarray): Row ids, possibly repeated
+            normalise (Iterable[str], optional): Columns compared case-normalised
+
+        Returns:
+            np.ndarray: The first occurrence of each distinct row, in input order
+        """
+        if len(rows) < 2:
+            return rows
+
+        normalise = set(normalise)
+        keys = np.empty((len(rows), len(self.order)), dtype=np.float64)
+        for i, name in enumerate(self.order):
+            if name in self.columns:
+                keys[:, i] = self.columns[name].keys(rows, normalise=name in normalise)
+            else:
+                # drop_duplicates treats NaN as equal to NaN
+                values = self.numeric[name][rows].astype(np.float64)
+                keys[:, i] = np.where(np.isnan(values), np.inf, values)
+
+        _, first = np.unique(keys, axis=0, return_index=True)
+        return rows[np.sort(first)]
+
+    def frame(
+        self,
+        rows: Optional[np.ndarray] = None,
+        normalise: Iterable[str] = ()
+    ) -> pd.DataFrame:
+        """
+        Decode rows into a DataFrame with the original column names.
+
+        Args:
+            rows (np.ndarray, optional): Row ids to decode. Defaults to all rows.
+            normalise (Iterable[str], optional): Columns to return case-normalised
+
+        Returns:
+            pd.DataFrame: Decoded rows, indexed by row id
+        """
+        normalise = set(normalise)
+        data = {}
+        for name in self.order:
+            if name in self.columns:
+                data[name] = self.columns[name].decode(rows, normalise=name in normalise)
+            else:
+                values = self.numeric[name]
+                data[name] = values if rows is None else values[rows]
+        index = pd.RangeIndex(len(self)) if rows is None else pd.Index(rows)
+        return pd.DataFrame(data, columns=self.order, index=index)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Decode the whole table into the layout returned by preprocess_dataframe.
+
+        Returns:
+            pd.DataFrame: String columns as objects and ranks as float64
+        """
+        df = self.frame()
+        for name in RANK_COLUMNS:
+            df[name] = df[name].astype(np.float64)
+        return df
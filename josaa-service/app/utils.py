@@ -2,12 +2,25 @@
 import pandas as pd
 import numpy as np
 import math
+import numbers
 import logging
-import plotly.express as px
-import requests
+import os
 from io import StringIO
 from pathlib import Path
-from typing import Dict, List, Union, Optional
+from typing import Dict, Iterable, List, Sequence, Union, Optional
+
+from nextstep_common.compiled import load_compiled_columns, load_or_compile, mapped_nbytes
+from nextstep_common.metrics import timed_stage
+from nextstep_common.pages import OptionList
+
+from .cache import PredictionCache, prediction_key
+from .dataset import DatasetSnapshot
+from .index import PartitionIndex
+from .models import PredictionInput
+from .plots import histogram_figure, plotly_histogram_figure
+from .ranking import CursorError, ScoredSet, decode_cursor, encode_cursor
+from .table import JosaaTable
+from .years import DatasetView, UnknownYearError, YearRegistry, parse_years, year_files
 
 # Configure logging
 logging.basicConfig(
@@ -16,36 +29,199 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def load_data(force_reload: bool = False) -> pd.DataFrame:
+# One cutoff file per counselling year
+DATA_DIR = Path(__file__).parent.parent / 'data'
+DATA_FILE_PATTERN = 'josaa{year}_cutoff.csv'
+# Missing cutoff files are fetched from here by file name
+DATA_URL = "https://raw.githubusercontent.com/YOUR_USERNAME/NextStep/main/josaa-service/data/"
+
+# Year used when a request names none: JOSAA_DEFAULT_YEAR, else the latest on disk
+DEFAULT_YEAR = int(os.getenv("JOSAA_DEFAULT_YEAR") or max(year_files(DATA_DIR, DATA_FILE_PATTERN), default=2024))
+DATA_PATH = DATA_DIR / DATA_FILE_PATTERN.format(year=DEFAULT_YEAR)
+
+# Memory the loaded years may hold before the least recently used are unloaded
+DATA_MEMORY_BUDGET = int(float(os.getenv("JOSAA_DATA_MEMORY_MB", "0")) * 1e6)
+
+# Bump when preprocess_dataframe changes so compiled snapshots are rebuilt
+PREPROCESS_REVISION = "1"
+
+def parse_dataset(data_path: Path) -> pd.DataFrame:
     """
-    Load and preprocess the JOSAA data from local or remote source.
+    Parse and preprocess the JOSAA CSV file.
     
     Args:
-        force_reload (bool, optional): Force reloading of data. Defaults to False.
+        data_path (Path): Local CSV file
     
     Returns:
         pd.DataFrame: Preprocessed JOSAA counseling data
     """
+    logger.info(f"Loading data from local file: {data_path}")
+    return preprocess_dataframe(pd.read_csv(data_path))
+
+def read_dataset(data_path: Path) -> JosaaTable:
+    """
+    Read the JOSAA data from its compiled snapshot, local CSV or remote source.
+    
+    Args:
+        data_path (Path): Local CSV file
+    
+    Returns:
+        JosaaTable: Dictionary-encoded JOSAA counseling data
+    """
     try:
-        # Attempt to load from local file
-        data_path = Path(__file__).parent.parent / 'data' / 'josaa2024_cutoff.csv'
+        # One worker compiles; the others wait and map what it wrote
+        loaded = load_or_compile(
+            data_path, parse_dataset, PREPROCESS_REVISION, load=load_compiled_columns, narrow=True
+        )
         
-        if data_path.exists():
-            logger.info(f"Loading data from local file: {data_path}")
-            df = pd.read_csv(data_path)
+        if isinstance(loaded, pd.DataFrame):
+            # The snapshot could not be written; keep the parsed data private
+            table = JosaaTable.from_frame(loaded)
+        elif loaded is not None:
+            table = JosaaTable.from_compiled(loaded)
         else:
             # Fallback to GitHub raw file
             logger.info("Local file not found, attempting to load from GitHub")
-            url = "https://raw.githubusercontent.com/YOUR_USERNAME/NextStep/main/josaa-service/data/josaa2024_cutoff.csv"
-            response = requests.get(url)
+            import requests
+            response = requests.get(DATA_URL + data_path.name)
             response.raise_for_status()
-            df = pd.read_csv(StringIO(response.text))
-        
-        # Data preprocessing and validation
-        df = preprocess_dataframe(df)
+            table = JosaaTable.from_frame(preprocess_dataframe(pd.read_csv(StringIO(response.text))))
         
-        logger.info(f"Successfully loaded {len(df)} records")
-        return df
+        logger.info(
+            f"Successfully loaded {len(table)} records ({table.nbytes / 1e6:.1f} MB encoded, "
+            f"{mapped_nbytes(table.arrays()) / 1e6:.1f} MB memory-mapped)"
+        )
+        return table
+    
+    except Exception as e:
+        logger.error(f"Error loading data: {str(e)}", exc_info=True)
+        return JosaaTable.empty()
+
+def prepare_snapshot(snapshot: DatasetSnapshot) -> None:
+    """
+    Build the per-snapshot indexes before the snapshot is published.
+    
+    Args:
+        snapshot (DatasetSnapshot): Newly loaded snapshot
+    """
+    snapshot.derive('index', PartitionIndex)
+
+def snapshot_nbytes(snapshot: DatasetSnapshot) -> int:
+    """Memory held by a snapshot: the encoded table and its index."""
+    if not len(snapshot):
+        return 0
+    return snapshot.data.nbytes + get_index(snapshot).nbytes
+
+def create_registry(
+    data_dir: Path = DATA_DIR,
+    default_year: Optional[int] = None,
+    poll_interval: Optional[float] = None
+) -> YearRegistry:
+    """
+    Build the registry of the cutoff files in a directory.
+    
+    Args:
+        data_dir (Path, optional): Directory of the josaa<year>_cutoff.csv files
+        default_year (int, optional): Defaults to DEFAULT_YEAR if it has a
+            file in data_dir, else the latest year there
+        poll_interval (float, optional): Seconds between change checks.
+            Defaults to JOSAA_DATA_POLL_INTERVAL.
+    
+    Returns:
+        YearRegistry: One lazily loaded dataset per year
+    """
+    paths = year_files(data_dir, DATA_FILE_PATTERN)
+    if default_year is None:
+        default_year = DEFAULT_YEAR if DEFAULT_YEAR in paths or not paths else max(paths)
+    # Without a local file the default year is fetched by read_dataset
+    paths.setdefault(default_year, data_dir / DATA_FILE_PATTERN.format(year=default_year))
+    if poll_interval is None:
+        poll_interval = float(os.getenv("JOSAA_DATA_POLL_INTERVAL", "30"))
+    
+    return YearRegistry(
+        paths,
+        default_year,
+        read_dataset,
+        poll_interval=poll_interval,
+        prepare=prepare_snapshot,
+        measure=snapshot_nbytes,
+        memory_budget=DATA_MEMORY_BUDGET
+    )
+
+# One dataset per year and process, shared by every request; a year is
+# loaded on first use. data_store is the default year's.
+registry = create_registry()
+data_store = registry.store()
+
+# Recent prediction results for the current dataset generation
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv("JOSAA_CACHE_MAX_ENTRIES", "1024")),
+    max_rows=int(os.getenv("JOSAA_CACHE_MAX_ROWS", "200000")),
+    ttl=float(os.getenv("JOSAA_CACHE_TTL", "600"))
+)
+
+def get_dataset(year: Optional[int] = None) -> DatasetSnapshot:
+    """
+    Return the current dataset snapshot of a year, loading it on first use.
+    
+    Args:
+        year (int, optional): Counselling year. Defaults to the default year.
+    
+    Returns:
+        DatasetSnapshot: Shared, read-only snapshot of the JOSAA data
+    
+    Raises:
+        UnknownYearError: There is no data for the year
+    """
+    return registry.get(year)
+
+def get_view(years: Optional[Iterable[int]] = None) -> DatasetView:
+    """
+    Return the current snapshots of several years, loading them on first use.
+    
+    Args:
+        years (Iterable[int], optional): Counselling years; None for the
+            default year, empty for every year
+    
+    Returns:
+        DatasetView: Snapshots in ascending year order
+    
+    Raises:
+        UnknownYearError: There is no data for a year
+    """
+    return registry.view(years)
+
+def get_index(snapshot: Optional[DatasetSnapshot] = None) -> PartitionIndex:
+    """
+    Return the partition index of a dataset snapshot.
+    
+    Args:
+        snapshot (DatasetSnapshot, optional): Snapshot to use. Defaults to the current one.
+    
+    Returns:
+        PartitionIndex: Index over (Round, Category, College Type, Program)
+    """
+    snapshot = snapshot or get_dataset()
+    return snapshot.derive('index', PartitionIndex)
+
+def load_data(force_reload: bool = False) -> pd.DataFrame:
+    """
+    Return the JOSAA data from the current dataset snapshot.
+    
+    The CSV is parsed once per process and re-parsed only when the file
+    changes. The DataFrame is decoded from the encoded table on first use; it
+    is shared and must not be modified in place.
+    
+    Args:
+        force_reload (bool, optional): Force reloading of data. Defaults to False.
+    
+    Returns:
+        pd.DataFrame: Preprocessed JOSAA counseling data
+    """
+    try:
+        if force_reload:
+            data_store.refresh(force=True)
+        return data_store.get().derive('frame', JosaaTable.to_frame)
     
     except Exception as e:
         logger.error(f"Error loading data: {str(e)}", exc_info=True)
@@ -100,9 +276,9 @@ def get_unique_branches() -> List[str]:
         List[str]: List of unique branches
     """
     try:
-        df = load_data()
-        if not df.empty:
-            unique_branches = sorted(df["Academic Program Name"].dropna().unique().tolist())
+        table = get_dataset().data
+        if len(table):
+            unique_branches = table["Academic Program Name"].values
             logger.info(f"Found {len(unique_branches)} unique branches")
             return ["All"] + unique_branches
         
@@ -113,6 +289,45 @@ def get_unique_branches() -> List[str]:
         logger.error(f"Error getting unique branches: {str(e)}", exc_info=True)
         return ["All"]
 
+# Fixed choices of the prediction form
+CATEGORIES = ["OPEN", "OBC-NCL", "SC", "ST", "EWS"]
+COLLEGE_TYPES = ["ALL", "IIT", "NIT", "IIIT", "GFTI"]
+ROUNDS = ["1", "2", "3", "4", "5", "6"]
+
+# round_no that scores every round at once, one result per seat
+ALL_ROUNDS = "ALL"
+
+# Columns that identify one seat across the rounds
+SEAT_COLUMNS = ["Institute", "Academic Program Name", "Quota", "Category", "Gender"]
+
+def _year_choices() -> List[str]:
+    """The default year first, then the others from the latest, then "All"."""
+    others = [str(year) for year in reversed(registry.years) if year != registry.default_year]
+    return [str(registry.default_year)] + others + (["All"] if others else [])
+
+def _build_dropdowns(table: JosaaTable) -> Dict[str, OptionList]:
+    branches = ["All"] + table["Academic Program Name"].values if len(table) else ["All"]
+    return {
+        "category": OptionList(CATEGORIES),
+        "college_type": OptionList(COLLEGE_TYPES),
+        "preferred_branch": OptionList(branches),
+        "round_no": OptionList(ROUNDS + [ALL_ROUNDS]),
+        "years": OptionList(_year_choices())
+    }
+
+def get_dropdowns(snapshot: Optional[DatasetSnapshot] = None) -> Dict[str, OptionList]:
+    """
+    Return the prediction form's dropdown options, prerendered once per snapshot.
+    
+    Args:
+        snapshot (DatasetSnapshot, optional): Snapshot to use. Defaults to the current one.
+    
+    Returns:
+        Dict[str, OptionList]: Option lists by form field name
+    """
+    snapshot = snapshot or get_dataset()
+    return snapshot.derive('dropdowns', _build_dropdowns)
+
 def calculate_admission_probability(
     rank: int, 
     opening_rank: float, 
@@ -131,7 +346,7 @@ def calculate_admission_probability(
     """
     try:
         # Handle edge cases
-        if not all(isinstance(x, (int, float)) for x in [rank, opening_rank, closing_rank]):
+        if not all(isinstance(x, numbers.Real) for x in [rank, opening_rank, closing_rank]):
             logger.warning(f"Invalid input types: {type(rank)}, {type(opening_rank)}, {type(closing_rank)}")
             return 0.0
         
@@ -186,6 +401,104 @@ def calculate_admission_probability(
         logger.error(f"Probability calculation error: {str(e)}", exc_info=True)
         return 0.0
 
+def calculate_admission_probability_batch(
+    rank: Union[int, np.ndarray],
+    opening_rank: np.ndarray,
+    closing_rank: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorized calculate_admission_probability over arrays of ranks.
+    
+    Inputs are broadcast against each other, so one rank can be scored
+    against many programs or many ranks against one program. Results are
+    identical to the scalar function, including its rounding.
+    
+    Args:
+        rank (int or np.ndarray): Candidate's JEE rank(s)
+        opening_rank (np.ndarray): Opening ranks for the programs
+        closing_rank (np.ndarray): Closing ranks for the programs
+    
+    Returns:
+        np.ndarray: Admission probability percentages
+    """
+    rank, opening_rank, closing_rank = np.broadcast_arrays(
+        np.asarray(rank, dtype=np.float64),
+        np.asarray(opening_rank, dtype=np.float64),
+        np.asarray(closing_rank, dtype=np.float64)
+    )
+    
+    with np.errstate(all='ignore'):
+        # Logistic function calculation (overflow only happens far beyond
+        # the closing rank, where the result is 0 either way)
+        midpoint = (opening_rank + closing_rank) / 2
+        scale = np.maximum((closing_rank - opening_rank) / 10, 1)
+        logistic_prob = 1 / (1 + np.exp((rank - midpoint) / scale)) * 100
+        
+        # Piece-wise probability calculation
+        improvement = (opening_rank - rank) / opening_rank
+        position = (rank - opening_rank) / (closing_rank - opening_rank)
+        within_range = np.select(
+            [position <= 0.2, position <= 0.5, position <= 0.8],
+            [
+                94 - (position * 70),
+                80 - ((position - 0.2) / 0.3 * 20),
+                60 - ((position - 0.5) / 0.3 * 20)
+            ],
+            40 - ((position - 0.8) / 0.2 * 20)
+        )
+        piece_wise_prob = np.select(
+            [
+                rank < opening_rank,
+                rank == opening_rank,
+                rank < closing_rank,
+                rank == closing_rank,
+                rank <= closing_rank + 10
+            ],
+            [
+                np.where(improvement >= 0.5, 99.0, 96 + (improvement * 6)),
+                95.0,
+                within_range,
+                15.0,
+                5.0
+            ],
+            0.0
+        )
+        
+        # Combine probabilities
+        final_prob = np.select(
+            [rank < opening_rank, rank <= closing_rank],
+            [
+                np.where(
+                    improvement > 0.5,
+                    np.maximum(logistic_prob, 95),
+                    logistic_prob * 0.4 + piece_wise_prob * 0.6
+                ),
+                logistic_prob * 0.7 + piece_wise_prob * 0.3
+            ],
+            np.where(rank > closing_rank + 100, 0.0, np.minimum(logistic_prob, 5))
+        )
+        final_prob = np.clip(final_prob, 0, 100)
+        
+        # np.round scales by 100 first, which can differ from round() right
+        # at a tie; those few values are rounded by the scalar function
+        scaled = final_prob * 100
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+        probabilities = np.round(final_prob, 2)
+    
+    # Equal opening and closing ranks short-circuit before rounding
+    equal = opening_rank == closing_rank
+    probabilities = np.where(equal, np.where(rank <= opening_rank, 50.0, 0.0), probabilities)
+    
+    # The scalar function fails (and returns 0) on a zero opening rank
+    probabilities = np.where(~equal & (rank < opening_rank) & (opening_rank == 0), 0.0, probabilities)
+    
+    for i in zip(*np.nonzero(near_tie & ~equal)):
+        probabilities[i] = calculate_admission_probability(
+            float(rank[i]), float(opening_rank[i]), float(closing_rank[i])
+        )
+    
+    return probabilities
+
 def get_admission_chances(probability: float) -> str:
     """
     Convert probability to text interpretation.
@@ -216,13 +529,250 @@ def get_admission_chances(probability: float) -> str:
         logger.error(f"Admission chances error: {str(e)}", exc_info=True)
         return "Error"
 
+def get_admission_chances_batch(probabilities: np.ndarray) -> np.ndarray:
+    """
+    Vectorized get_admission_chances.
+    
+    Args:
+        probabilities (np.ndarray): Admission probability percentages
+    
+    Returns:
+        np.ndarray: Admission chance descriptions
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    return np.select(
+        [
+            probabilities >= 95,
+            probabilities >= 80,
+            probabilities >= 60,
+            probabilities >= 40,
+            probabilities > 0
+        ],
+        [
+            "Very High Chance",
+            "High Chance",
+            "Moderate Chance",
+            "Low Chance",
+            "Very Low Chance"
+        ],
+        "No Chance"
+    ).astype(object)
+
+def _round_order(label: str):
+    """Sort rounds numerically, other labels after them."""
+    return (0, int(label), label) if label.isdigit() else (1, 0, label)
+
+def _group_rounds(
+    tables: Sequence[JosaaTable],
+    rows: np.ndarray,
+    sources: Optional[np.ndarray],
+    probabilities: np.ndarray
+):
+    """
+    Put the probabilities of each seat in every round side by side.
+    
+    Rows are grouped by seat (SEAT_COLUMNS and year) with one integer key
+    per row, and each probability is scattered into its seat's round column.
+    
+    Args:
+        tables (Sequence[JosaaTable]): Table per year
+        rows (np.ndarray): Scored rows of every round, year after year
+        sources (np.ndarray, optional): Position in tables of each row's year;
+            None for a single year
+        probabilities (np.ndarray): Probability of each row
+    
+    Returns:
+        Tuple: (representatives, best, by_round, rounds): per seat the
+            position in rows of its first row in its best round, its best
+            probability and its probabilities per round (NaN without a
+            cutoff), in order of the seats' first rows; and the round labels
+    """
+    rounds = tuple(sorted({label for table in tables for label in table["Round"].values}, key=_round_order))
+    if not len(rows):
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty((0, len(rounds))), rounds
+    
+    position = {label: i for i, label in enumerate(rounds)}
+    radix = [max(len(table[name].dictionary) for table in tables) for name in SEAT_COLUMNS]
+    keys = np.empty(len(rows), dtype=np.int64)
+    round_positions = np.empty(len(rows), dtype=np.int64)
+    segments = [np.arange(len(rows))] if sources is None else [np.flatnonzero(sources == i) for i in range(len(tables))]
+    for i, (table, selected) in enumerate(zip(tables, segments)):
+        segment = rows[selected]
+        key = np.full(len(segment), i, dtype=np.int64)
+        for name, size in zip(SEAT_COLUMNS, radix):
+            # Shift codes by one so a missing value (-1) gets its own key
+            key = key * size + table[name].codes[segment].astype(np.int64) + 1
+        keys[selected] = key
+        # Code -1 (missing round) maps to the trailing -1
+        to_position = np.array([position[label] for label in table["Round"].values] + [-1])
+        round_positions[selected] = to_position[table["Round"].codes[segment]]
+    
+    # Number the seats in order of their first row, so ties keep table order
+    _, first, seats = np.unique(keys, return_index=True, return_inverse=True)
+    by_first = np.argsort(first, kind='stable')
+    renumber = np.empty_like(by_first)
+    renumber[by_first] = np.arange(len(by_first))
+    seats = renumber[seats]
+    
+    ranked = round_positions >= 0
+    by_round = np.full((len(first), len(rounds)), np.nan)
+    np.fmax.at(by_round, (seats[ranked], round_positions[ranked]), probabilities[ranked])
+    best = np.where(np.isnan(by_round), -np.inf, by_round).max(axis=1)
+    best_round = np.argmax(by_round == best[:, np.newaxis], axis=1)
+    
+    candidates = np.flatnonzero(ranked & (round_positions == best_round[seats]) & (probabilities == best[seats]))
+    representatives = np.full(len(first), len(rows), dtype=np.int64)
+    np.minimum.at(representatives, seats[candidates], candidates)
+    return representatives, best, by_round, rounds
+
+def score_predictions(
+    jee_rank: int,
+    category: str,
+    college_type: str,
+    preferred_branch: str,
+    round_no: str,
+    min_probability: float = 30.0,
+    years: Optional[Iterable[int]] = None
+) -> ScoredSet:
+    """
+    Score every matching college and keep those above the minimum probability.
+    
+    With several years, the matching partition of each year is looked up
+    and all of them are scored together in one vectorized call. With
+    round_no "ALL" the rows of every round are scored in that same call and
+    grouped by seat, keeping seats whose best round reaches the minimum
+    probability (see _group_rounds). The scored
+    set is cached for the dataset generation, so further pages of the same
+    request are cut from it without scoring again.
+    
+    Args:
+        As for predict_preferences()
+    
+    Returns:
+        ScoredSet: Matching rows in year and table order with their probabilities
+    """
+    with timed_stage("data_access"):
+        view = get_view(years)
+    all_rounds = round_no == ALL_ROUNDS
+    
+    # The filters below compare exact values, so the key keeps their case
+    key = ('scored', view.years) + prediction_key(
+        jee_rank, category, college_type, preferred_branch, round_no, min_probability,
+        fold_case=False
+    )
+    cached = prediction_cache.get(key, view.generation)
+    if cached is not None:
+        return cached
+    
+    # Filtering logic: look up the matching partition of every year
+    with timed_stage("filtering"):
+        partitions = [
+            get_index(snapshot).select(
+                round_no=None if all_rounds else round_no,
+                category=None if category == "ALL" else category,
+                college_type=None if college_type == "ALL" else college_type,
+                program=None if preferred_branch == "All" else preferred_branch
+            )
+            for snapshot in view.snapshots
+        ]
+    
+    # Calculate admission probabilities for all partitions at once
+    with timed_stage("scoring"):
+        if len(partitions) == 1:
+            rows, sources = partitions[0], None
+            table = view.snapshots[0].data
+            opening_rank, closing_rank = table.opening_rank[rows], table.closing_rank[rows]
+        else:
+            rows = np.concatenate(partitions)
+            sources = np.repeat(np.arange(len(partitions), dtype=np.int8), [len(p) for p in partitions])
+            opening_rank = np.concatenate([s.data.opening_rank[p] for s, p in zip(view.snapshots, partitions)])
+            closing_rank = np.concatenate([s.data.closing_rank[p] for s, p in zip(view.snapshots, partitions)])
+        probabilities = calculate_admission_probability_batch(jee_rank, opening_rank, closing_rank)
+        if all_rounds:
+            tables = [snapshot.data for snapshot in view.snapshots]
+            representatives, best, by_round, rounds = _group_rounds(tables, rows, sources, probabilities)
+            keep = best >= min_probability
+            selected = representatives[keep]
+            scored = ScoredSet(
+                view.generation, rows[selected], best[keep],
+                years=view.years, sources=None if sources is None else sources[selected],
+                rounds=rounds, by_round=by_round[keep]
+            )
+        else:
+            keep = probabilities >= min_probability
+            scored = ScoredSet(
+                view.generation, rows[keep], probabilities[keep],
+                years=view.years, sources=None if sources is None else sources[keep]
+            )
+    
+    prediction_cache.put(key, view.generation, scored, size=len(scored))
+    return scored
+
+def _prediction_records(
+    table: JosaaTable,
+    rows: np.ndarray,
+    probabilities: np.ndarray,
+    year: Optional[int] = None
+) -> List[Dict]:
+    """Decode ranked rows into prediction dictionaries."""
+    columns = {
+        "institute": table["Institute"].decode(rows),
+        "college_type": table["College Type"].decode(rows),
+        "location": table["Location"].decode(rows),
+        "academic_program": table["Academic Program Name"].decode(rows),
+        "quota": table["Quota"].decode(rows),
+        "category": table["Category"].decode(rows),
+        "gender": table["Gender"].decode(rows),
+        "admission_probability": probabilities.tolist(),
+        "admission_chances": get_admission_chances_batch(probabilities),
+        "opening_rank": table.opening_rank[rows].tolist(),
+        "closing_rank": table.closing_rank[rows].tolist(),
+        "year": [year] * len(rows)
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+def _scored_records(scored: ScoredSet, order: np.ndarray) -> List[Dict]:
+    """
+    Decode positions of a scored set, whose rows may come from several years.
+    
+    With every round scored, each record also has its best "round" and its
+    "round_probabilities" in the order of scored.rounds (None without a cutoff).
+    """
+    rows, probabilities = scored.rows[order], scored.probabilities[order]
+    if scored.sources is None:
+        year = scored.years[0]
+        records = _prediction_records(get_dataset(year).data, rows, probabilities, year)
+    else:
+        # Decode each year's rows from its own table, then restore the order
+        sources = scored.sources[order]
+        records: List[Dict] = [None] * len(order)
+        for i, year in enumerate(scored.years):
+            selected = np.flatnonzero(sources == i)
+            if not len(selected):
+                continue
+            decoded = _prediction_records(
+                get_dataset(year).data, rows[selected], probabilities[selected], year
+            )
+            for n, record in zip(selected.tolist(), decoded):
+                records[n] = record
+    
+    if scored.by_round is not None:
+        by_round = scored.by_round[order]
+        best_round = np.argmax(by_round == probabilities[:, np.newaxis], axis=1)
+        for record, values, best in zip(records, by_round.tolist(), best_round.tolist()):
+            record["round"] = scored.rounds[best]
+            record["round_probabilities"] = [None if math.isnan(v) else v for v in values]
+    return records
+
 def predict_preferences(
     jee_rank: int,
     category: str,
     college_type: str,
     preferred_branch: str,
     round_no: str,
-    min_probability: float = 30.0
+    min_probability: float = 30.0,
+    max_results: Optional[int] = None,
+    years: Optional[Iterable[int]] = None
 ) -> Dict[str, Union[List[Dict], Dict]]:
     """
     Predict college preferences based on input parameters.
@@ -232,78 +782,163 @@ def predict_preferences(
         category (str): Reservation category
         college_type (str): Type of college
         preferred_branch (str): Preferred academic program
-        round_no (str): Counseling round number
+        round_no (str): Counseling round number, or "ALL" to score every round
+            and return each seat once with its probability per round
         min_probability (float, optional): Minimum admission probability. Defaults to 30.0.
+        max_results (int, optional): Return only the most likely colleges. Defaults to all.
+        years (Iterable[int], optional): Counselling years to score against;
+            None for the default year, empty for every year
     
     Returns:
-        Dict containing predictions and plot data
+        Dict containing predictions and plot data, and the "rounds" of the
+            round probabilities when every round was scored
+    
+    Raises:
+        UnknownYearError: There is no data for a year
     """
     try:
-        # Load data
-        df = load_data()
-        
-        # Create a copy of the DataFrame
-        filtered_df = df.copy()
-        
-        # Filtering logic
-        if category != "ALL":
-            filtered_df = filtered_df[filtered_df["Category"] == category]
-        
-        if college_type != "ALL":
-            filtered_df = filtered_df[filtered_df["College Type"] == college_type]
-        
-        if preferred_branch != "All":
-            filtered_df = filtered_df[filtered_df["Academic Program Name"] == preferred_branch]
-        
-        # Round filtering
-        filtered_df = filtered_df[filtered_df["Round"] == round_no]
-        
-        # Calculate admission probabilities
-        predictions = []
-        for _, row in filtered_df.iterrows():
-            prob = calculate_admission_probability(
-                jee_rank, 
-                row["Opening Rank"], 
-                row["Closing Rank"]
-            )
-            
-            if prob >= min_probability:
-                prediction = {
-                    "institute": row["Institute"],
-                    "college_type": row["College Type"],
-                    "location": row["Location"],
-                    "academic_program": row["Academic Program Name"],
-                    "quota": row["Quota"],
-                    "category": row["Category"],
-                    "gender": row["Gender"],
-                    "admission_probability": prob,
-                    "admission_chances": get_admission_chances(prob),
-                    "opening_rank": row["Opening Rank"],
-                    "closing_rank": row["Closing Rank"]
-                }
-                predictions.append(prediction)
+        scored = score_predictions(
+            jee_rank, category, college_type, preferred_branch, round_no, min_probability, years
+        )
         
-        # Sort predictions by admission probability in descending order
-        predictions.sort(key=lambda x: x["admission_probability"], reverse=True)
+        # Predictions by admission probability in descending order; ties keep
+        # year and table order. Only max_results rows are selected and decoded.
+        order = scored.order(max_results)
+        predictions = _scored_records(scored, order)
         
-        # Create plot data
-        plot_data = create_probability_plot(predictions)
+        # Create plot data from every scored college
+        plot_data = scored.plot(plot_probabilities)
         
-        return {
+        results = {
             "predictions": predictions,
             "plot_data": plot_data
         }
+        if scored.rounds is not None:
+            results["rounds"] = list(scored.rounds)
+        return results
+    
+    except UnknownYearError:
+        raise
     
     except Exception as e:
         logger.error(f"Comprehensive prediction error: {str(e)}", exc_info=True)
         return {"predictions": [], "plot_data": {}}
 
-def create_probability_plot(predictions: List[Dict]) -> Dict:
+# Parameters a pagination cursor carries, as passed to score_predictions()
+CURSOR_QUERY_FIELDS = (
+    "jee_rank", "category", "college_type", "preferred_branch", "round_no", "min_probability", "years"
+)
+
+def _cursor_query(query: Dict) -> Dict:
+    """
+    Validate the parameters carried by a cursor, which the client can edit.
+    
+    Args:
+        query (Dict): Decoded query of the cursor
+    
+    Returns:
+        Dict: Keyword arguments for score_predictions()
+    
+    Raises:
+        CursorError: The parameters are not those of a prediction
+    """
+    if set(query) != set(CURSOR_QUERY_FIELDS):
+        raise CursorError("Invalid cursor")
+    try:
+        fields = PredictionInput(**{name: query[name] for name in CURSOR_QUERY_FIELDS[:-1]})
+        years = parse_years(query["years"])
+        if years is not None:
+            years = list(registry.resolve(years))
+    except (ValueError, TypeError):
+        raise CursorError("Invalid cursor")
+    if fields.jee_rank <= 0:
+        raise CursorError("Invalid cursor")
+    return {**fields.dict(exclude={"year"}), "years": years}
+
+def predict_preferences_page(
+    jee_rank: Optional[int] = None,
+    category: Optional[str] = None,
+    college_type: Optional[str] = None,
+    preferred_branch: Optional[str] = None,
+    round_no: Optional[str] = None,
+    min_probability: float = 30.0,
+    page_size: int = 100,
+    cursor: Optional[str] = None,
+    years: Optional[Iterable[int]] = None
+) -> Dict:
+    """
+    Return one page of predictions, most likely first.
+    
+    The first page is requested with the prediction parameters; later pages
+    with the cursor returned by the previous page alone.
+    
+    Args:
+        jee_rank, category, college_type, preferred_branch, round_no,
+            min_probability, years: As for predict_preferences(); ignored with a cursor
+        page_size (int, optional): Rows per page. Defaults to 100.
+        cursor (str, optional): next_cursor of the previous page
+    
+    Returns:
+        Dict: {"predictions", "offset", "total", "next_cursor", "plot_data"};
+            plot_data is only included on the first page, "rounds" only when
+            every round was scored
+    
+    Raises:
+        CursorError: The cursor is invalid
+        StaleCursorError: The data was reloaded since the cursor was issued
+        UnknownYearError: There is no data for a year
+    """
+    if cursor:
+        state = decode_cursor(cursor, registry.generation)
+        query = _cursor_query(state['query'])
+        served, after = state['served'], state['after']
+    else:
+        query = {
+            "jee_rank": jee_rank,
+            "category": category,
+            "college_type": college_type,
+            "preferred_branch": preferred_branch,
+            "round_no": round_no,
+            "min_probability": min_probability,
+            "years": None if years is None else list(registry.resolve(years))
+        }
+        served, after = 0, None
+    
+    scored = score_predictions(**query)
+    order = scored.order(page_size, after=after)
+    
+    next_cursor = None
+    if served + len(order) < len(scored):
+        next_cursor = encode_cursor(
+            query, scored.version, served + len(order),
+            float(scored.probabilities[order[-1]]), int(order[-1])
+        )
+    
+    page = {
+        "predictions": _scored_records(scored, order),
+        "offset": served,
+        "total": len(scored),
+        "next_cursor": next_cursor
+    }
+    if scored.rounds is not None:
+        page["rounds"] = list(scored.rounds)
+    if not cursor:
+        page["plot_data"] = scored.plot(plot_probabilities)
+    return page
+
+def create_probability_plot(
+    predictions: List[Dict],
+    key: str = 'admission_probability',
+    engine: str = 'numpy'
+) -> Dict:
     """
     Create probability distribution visualization.
     
     Args:
         predictions (List[Dict]): List of prediction dictionaries
+        key (str, optional): Field holding the admission probability
+        engine (str, optional): 'numpy' bins on the server and returns a
+            single bar trace; 'plotly' returns the full plotly.express figure
     
     Returns:
         Dict: Plotly figure configuration
@@ -312,42 +947,31 @@ def create_probability_plot(predictions: List[Dict]) -> Dict:
         if not predictions:
             return {}
         
-        # Convert predictions to DataFrame
-        plot_df = pd.DataFrame(predictions)
-        
-        # Create histogram
-        fig = px.histogram(
-            plot_df, 
-            x='admission_probability', 
-            title='Distribution of Admission Probabilities',
-            labels={'admission_probability': 'Admission Probability (%)'},
-            color_discrete_sequence=['#3366cc']
-        )
-        
-        fig.update_layout(
-            xaxis_title="Admission Probability (%)",
-            yaxis_title="Number of Colleges",
-            showlegend=False,
-            title_x=0.5
-        )
-        
-        return fig.to_dict()
+        return plot_probabilities([p[key] for p in predictions], engine)
     
     except Exception as e:
         logger.error(f"Plot creation error: {str(e)}", exc_info=True)
         return {}
 
-# Optional: Add caching mechanism for expensive computations
-def cache_data(func):
-    """
-    Simple caching decorator to store and reuse expensive computation results.
+def plot_probabilities(probabilities: Sequence[float], engine: str = 'numpy') -> Dict:
     """
-    cache = {}
+    Create the probability distribution figure from the probabilities alone.
     
-    def wrapper(*args, **kwargs):
-        key = str(args) + str(kwargs)
-        if key not in cache:
-            cache[key] = func(*args, **kwargs)
-        return cache[key]
+    Args:
+        probabilities (Sequence[float]): Admission probabilities
+        engine (str, optional): As for create_probability_plot()
     
-    return wrapper
+    Returns:
+        Dict: Plotly figure configuration, or {} when there is nothing to plot
+    """
+    if not len(probabilities):
+        return {}
+    figure = plotly_histogram_figure if engine == 'plotly' else histogram_figure
+    with timed_stage("plot"):
+        return figure(
+            probabilities,
+            title='Distribution of Admission Probabilities',
+            x_title='Admission Probability (%)',
+            y_title='Number of Colleges',
+            color='#3366cc'
+        )
@@ -0,0 +1,387 @@
+"""
+Year-partitioned cutoff data.
+
+Each counselling year is a separate cutoff file with its own DatasetStore.
+A year is loaded on first use, not at start-up, so memory grows with the
+years that requests actually ask for. With a memory budget the least
+recently used years are unloaded again once the loaded years exceed it;
+the default year and the years of the request that triggered the check
+are never unloaded. An unloaded year keeps its store, so it is loaded
+again on its next use and its versions keep counting up.
+
+Results computed from several years are cached and paginated under the
+registry's generation, which only moves when the data of a year that was
+already loaded is replaced (a reload of a changed file). Loading a year for
+the first time, or again after it was unloaded with the same contents,
+leaves every earlier result valid.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .dataset import DatasetSnapshot, DatasetStore
+
+logger = logging.getLogger(__name__)
+
+# Written with Python's "{year}" placeholder, e.g. 'josaa{year}_cutoff.csv'
+YEAR_PLACEHOLDER = '{year}'
+
+
+class UnknownYearError(ValueError):
+    """A request asked for a year without a data file."""
+
+
+def year_files(data_dir: Path, pattern: str) -> Dict[int, Path]:
+    """
+    Find the data files of every year in a directory.
+
+    Args:
+        data_dir (Path): Directory to search
+        pattern (str): File name with a {year} placeholder
+
+    Returns:
+        Dict[int, Path]: File per year, in ascending year order
+    """
+    prefix, _, suffix = pattern.partition(YEAR_PLACEHOLDER)
+    name = re.compile(f"{re.escape(prefix)}(\\d{{4}}){re.escape(suffix)}")
+    found = {}
+    if data_dir.is_dir():
+        for path in data_dir.iterdir():
+            match = name.fullmatch(path.name)
+            if match:
+                found[int(match.group(1))] = path
+    return dict(sorted(found.items()))
+
+
+def parse_years(value: Union[None, int, str, Iterable]) -> Optional[List[int]]:
+    """
+    Read the years of a request.
+
+    Args:
+        value: None or "" for the default year, "all" for every year, a year,
+            a comma-separated list of years or an iterable of years
+
+    Returns:
+        Optional[List[int]]: Years in ascending order, [] for every year,
+            or None for the default year
+
+    Raises:
+        ValueError: A value is not a year
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        if value.lower() == 'all':
+            return []
+        value = value.split(',')
+    elif isinstance(value, int):
+        value = [value]
+
+    years = set()
+    for item in value:
+        try:
+            years.add(int(str(item).strip()))
+        except ValueError:
+            raise ValueError(f"Invalid year: {item!r}")
+    return sorted(years)
+
+
+class DatasetView:
+    """
+    Snapshots of the years one request uses, read together.
+
+    `generation` is the registry generation read before the snapshots, to be
+    used as the version of anything computed from them.
+    """
+
+    __slots__ = ('years', 'snapshots', 'generation')
+
+    def __init__(self, years: Tuple[int, ...], snapshots: Tuple[DatasetSnapshot, ...], generation: int):
+        self.years = years
+        self.snapshots = snapshots
+        self.generation = generation
+
+    def __len__(self) -> int:
+        return sum(len(snapshot) for snapshot in self.snapshots)
+
+
+class YearRegistry:
+    """
+    One lazily loaded DatasetStore per year, within a memory budget.
+    """
+
+    def __init__(
+        self,
+        paths: Dict[int, Path],
+        default_year: int,
+        loader: Callable[[Path], Any],
+        poll_interval: float = 30.0,
+        prepare: Optional[Callable[[DatasetSnapshot], None]] = None,
+        measure: Optional[Callable[[DatasetSnapshot], int]] = None,
+        memory_budget: int = 0
+    ):
+        """
+        Args:
+            paths (Dict[int, Path]): Data file per year. The default year's
+                file is used even if it does not exist (the loader may fetch it).
+            default_year (int): Year used when a request names none; never unloaded
+            loader, poll_interval, prepare: As for DatasetStore
+            measure (Callable, optional): Memory held by a snapshot, in bytes;
+                the budget only applies with it
+            memory_budget (int, optional): Bytes the loaded years may hold
+                before the least recently used ones are unloaded. 0 means no limit.
+        """
+        self.paths = dict(sorted(paths.items()))
+        self.default_year = default_year
+        self.loader = loader
+        self.poll_interval = poll_interval
+        self.prepare = prepare
+        self.measure = measure
+        self.memory_budget = memory_budget
+        self.generation = 0
+        self.evictions = 0
+
+        self._stores: Dict[int, DatasetStore] = {}
+        # Loaded years, least recently used first
+        self._used: 'OrderedDict[int, None]' = OrderedDict()
+        # Digest of the last snapshot seen per year, kept across unloads
+        self._digests: Dict[int, Optional[str]] = {}
+        self._watching = False
+        self._lock = threading.RLock()
+
+    @property
+    def years(self) -> List[int]:
+        """Every year with a data file, ascending."""
+        return list(self.paths)
+
+    def loaded_years(self) -> List[int]:
+        """Years whose data is currently in memory, ascending."""
+        with self._lock:
+            return sorted(year for year, store in self._stores.items() if store.loaded)
+
+    def resolve(self, years: Optional[Iterable[int]] = None) -> Tuple[int, ...]:
+        """
+        Validate the years of a request.
+
+        Args:
+            years (Iterable[int], optional): Years as returned by parse_years();
+                None for the default year, empty for every year
+
+        Returns:
+            Tuple[int, ...]: Distinct years in ascending order
+
+        Raises:
+            UnknownYearError: A year has no data file
+        """
+        if years is None:
+            return (self.default_year,)
+        years = tuple(sorted(set(years))) or tuple(self.paths)
+        unknown = [year for year in years if year not in self.paths]
+        if unknown:
+            available = ', '.join(str(year) for year in self.paths)
+            raise UnknownYearError(f"No data for {', '.join(map(str, unknown))}; available years: {available}")
+        return years
+
+    def store(self, year: Optional[int] = None) -> DatasetStore:
+        """
+        Return the store of a year without loading it.
+
+        Args:
+            year (int, optional): Year. Defaults to the default year.
+
+        Returns:
+            DatasetStore: Store of the year
+
+        Raises:
+            UnknownYearError: The year has no data file
+        """
+        year = self.default_year if year is None else year
+        store = self._stores.get(year)
+        if store is not None:
+            return store
+
+        self.resolve([year])
+        with self._lock:
+            if year not in self._stores:
+                self._stores[year] = DatasetStore(
+                    self.paths[year],
+                    self.loader,
+                    poll_interval=self.poll_interval,
+                    prepare=self.prepare,
+                    on_swap=lambda snapshot, previous: self._swapped(year, snapshot, previous)
+                )
+            return self._stores[year]
+
+    def get(self, year: Optional[int] = None, keep: Iterable[int] = ()) -> DatasetSnapshot:
+        """
+        Return the current snapshot of a year, loading it on first use.
+
+        Args:
+            year (int, optional): Year. Defaults to the default year.
+            keep (Iterable[int], optional): Other years in use by the caller,
+                which the memory budget must not unload
+
+        Returns:
+            DatasetSnapshot: Current snapshot of the year
+
+        Raises:
+            UnknownYearError: The year has no data file
+        """
+        year = self.default_year if year is None else year
+        store = self.store(year)
+        snapshot = store.peek()
+        if snapshot is None:
+            snapshot = store.get()
+            with self._lock:
+                if self._watching:
+                    store.start_watcher()
+                self._used[year] = None
+                evicted = []
+                for victim, nbytes in self._over_budget({year, *keep}):
+                    victim_store = self._detach(victim)
+                    if victim_store is not None:
+                        self.evictions += 1
+                        evicted.append((victim, nbytes, victim_store))
+            for victim, nbytes, victim_store in evicted:
+                self._release(victim_store)
+                logger.info(f"Unloaded {victim} data ({nbytes / 1e6:.1f} MB) to stay within the memory budget")
+        elif year != self.default_year:
+            with self._lock:
+                if year in self._used:
+                    self._used.move_to_end(year)
+        return snapshot
+
+    def view(self, years: Optional[Iterable[int]] = None) -> DatasetView:
+        """
+        Return the snapshots of a request's years.
+
+        Args:
+            years (Iterable[int], optional): As for resolve()
+
+        Returns:
+            DatasetView: Snapshots in ascending year order
+
+        Raises:
+            UnknownYearError: A year has no data file
+        """
+        years = self.resolve(years)
+        # Read first: results are then never cached under a newer generation
+        # than the data they were computed from
+        generation = self.generation
+        snapshots = tuple(self.get(year, keep=years) for year in years)
+        return DatasetView(years, snapshots, generation)
+
+    def unload(self, year: int) -> bool:
+        """
+        Drop a year's data from memory; it is loaded again on its next use.
+
+        Args:
+            year (int): Year to unload
+
+        Returns:
+            bool: True if the year was loaded
+        """
+        with self._lock:
+            store = self._detach(year)
+        if store is None:
+            return False
+        self._release(store)
+        return True
+
+    def _detach(self, year: int) -> Optional[DatasetStore]:
+        """Mark a year as no longer loaded and return its store, if it was. Must hold the lock."""
+        store = self._stores.get(year)
+        # A year detached by another thread stays loaded until that thread
+        # releases it; it must not be detached (and counted) twice
+        if store is None or not store.loaded or (year not in self._used and year != self.default_year):
+            return None
+        self._used.pop(year, None)
+        return store
+
+    @staticmethod
+    def _release(store: DatasetStore) -> None:
+        """Drop a detached store's data. Must not hold the lock: a watcher finishing a reload reports its swap."""
+        store.stop_watcher()
+        store.unload()
+
+    def memory(self) -> Dict[int, int]:
+        """Bytes held per loaded year, as reported by `measure`."""
+        result = {}
+        for year in self.loaded_years():
+            snapshot = self._stores[year].peek()
+            if snapshot is not None:
+                result[year] = self.measure(snapshot) if self.measure else 0
+        return result
+
+    def _over_budget(self, keep: set) -> List[Tuple[int, int]]:
+        """Pick least recently used years to unload to meet the budget. Must hold the lock."""
+        if self.memory_budget <= 0 or self.measure is None:
+            return []
+
+        memory = self.memory()
+        total = sum(memory.values())
+        victims = []
+        for year in self._used:
+            if total <= self.memory_budget:
+                break
+            if year != self.default_year and year not in keep:
+                victims.append((year, memory.get(year, 0)))
+                total -= memory.get(year, 0)
+
+        if total > self.memory_budget:
+            logger.warning(
+                f"Years in use hold {total / 1e6:.1f} MB, more than the "
+                f"{self.memory_budget / 1e6:.1f} MB memory budget"
+            )
+        return victims
+
+    def _swapped(self, year: int, snapshot: DatasetSnapshot, previous: Optional[DatasetSnapshot]) -> None:
+        """Advance the generation when a year's data was replaced."""
+        with self._lock:
+            missing = object()
+            seen = self._digests.get(year, missing)
+            replaced = previous is not None or (
+                seen is not missing and (seen is None or seen != snapshot.digest)
+            )
+            self._digests[year] = snapshot.digest
+            if replaced:
+                self.generation += 1
+
+    def start_watchers(self) -> None:
+        """Watch the files of loaded years for changes, and of years loaded later."""
+        with self._lock:
+            self._watching = True
+            for year in self.loaded_years():
+                self._stores[year].start_watcher()
+
+    def stop_watchers(self) -> None:
+        """Stop every watcher."""
+        with self._lock:
+            self._watching = False
+            stores = list(self._stores.values())
+        for store in stores:
+            store.stop_watcher()
+
+    def describe(self) -> dict:
+        """Return a JSON-serialisable summary of the years and their memory."""
+        memory = self.memory()
+        return {
+            'default_year': self.default_year,
+            'available': self.years,
+            'loaded': {
+                str(year): {'version': self._stores[year].peek().version, 'bytes': nbytes}
+                for year, nbytes in memory.items()
+                if self._stores[year].peek() is not None
+            },
+            'memory_bytes': sum(memory.values()),
+            'memory_budget': self.memory_budget or None,
+            'generation': self.generation,
+            'evictions': self.evictions
+        }
@@ -28,28 +28,24 @@ function setupFormHandling() {
             
             try {
                 const formData = new FormData(this);
-                const response = await fetch('/predict', {
+                const response = await fetch('/api/predict', {
                     method: 'POST',
                     body: formData
                 });
 
+                const payload = await response.json();
                 if (!response.ok) {
-                    throw new Error('Prediction failed');
+                    throw new Error(payload.error || 'Prediction failed');
                 }
 
-                const html = await response.text();
-                document.documentElement.innerHTML = html;
-                
-                // Reinitialize components after HTML update
-                initializeApp();
-                
-                // Scroll to results if they exist
-                const results = document.querySelector('.results-section');
+                // Patch only the results instead of replacing the document
+                const results = renderResults(payload);
                 if (results) {
                     results.scrollIntoView({ behavior: 'smooth' });
+                    showToast('Preferences generated successfully', 'success');
+                } else {
+                    showToast('No colleges match these criteria', 'info');
                 }
-
-                showToast('Preferences generated successfully', 'success');
             } catch (error) {
                 console.error('Prediction error:', error);
                 showToast('Failed to generate preferences. Please try again.', 'error');
@@ -60,6 +56,165 @@ function setupFormHandling() {
     }
 }
 
+// Results Rendering
+const RESULT_COLUMNS = [
+    ['institute', 'Institute'],
+    ['college_type', 'College Type'],
+    ['location', 'Location'],
+    ['branch', 'Branch'],
+    ['opening_rank', 'Opening Rank'],
+    ['closing_rank', 'Closing Rank'],
+    ['probability', 'Probability (%)'],
+    ['chances', 'Chances'],
+    ['year', 'Year']
+];
+
+// With round_no "ALL" the probability column becomes one column per round
+function resultColumns(payload) {
+    if (!payload.rounds) return RESULT_COLUMNS;
+    return RESULT_COLUMNS.flatMap(column => column[0] !== 'probability' ? [column] :
+        payload.rounds.map((round, i) => [`round:${i}`, `Round ${round} (%)`]));
+}
+
+function createResultsSection() {
+    const section = document.createElement('section');
+    section.className = 'results-section';
+    section.innerHTML = `
+        <div class="results-header">
+            <h2>College Preferences</h2>
+            <button onclick="exportToCSV()" class="btn secondary">
+                <i class="fas fa-download"></i> Export to CSV
+            </button>
+        </div>
+        <div class="results-table-container">
+            <table class="results-table">
+                <thead><tr></tr></thead>
+                <tbody></tbody>
+            </table>
+        </div>`;
+
+    const helpSection = document.querySelector('.help-section');
+    helpSection.parentNode.insertBefore(section, helpSection);
+    return section;
+}
+
+// Render a page of /api/predict output ({columns, rows, offset, total,
+// next_cursor, plot}); later pages are appended. Returns the results section.
+function renderResults(payload) {
+    let section = document.querySelector('.results-section');
+    const firstPage = !payload.offset;
+    if (firstPage && !payload.rows.length) {
+        if (section) section.remove();
+        return null;
+    }
+    if (!section) {
+        section = createResultsSection();
+    }
+
+    const columns = resultColumns(payload);
+    if (firstPage) {
+        const headerRow = section.querySelector('thead tr');
+        headerRow.replaceChildren();
+        ['Preference'].concat(columns.map(([, label]) => label)).forEach(label => {
+            const th = document.createElement('th');
+            th.textContent = label;
+            headerRow.appendChild(th);
+        });
+    }
+
+    const position = {};
+    payload.columns.forEach((name, i) => { position[name] = i; });
+
+    const fragment = document.createDocumentFragment();
+    payload.rows.forEach((row, i) => {
+        const tr = document.createElement('tr');
+        const cells = [payload.offset + i + 1].concat(columns.map(([name]) => {
+            if (name.startsWith('round:')) {
+                const value = row[position.round_probabilities][Number(name.slice(6))];
+                return value === null ? '-' : value.toFixed(2);
+            }
+            const value = row[position[name]];
+            return name === 'probability' ? value.toFixed(2) : value;
+        }));
+        cells.forEach(value => {
+            const td = document.createElement('td');
+            td.textContent = value;
+            tr.appendChild(td);
+        });
+        fragment.appendChild(tr);
+    });
+
+    const table = section.querySelector('.results-table');
+    const tbody = table.querySelector('tbody');
+    if (firstPage) {
+        tbody.replaceChildren(fragment);
+    } else {
+        tbody.appendChild(fragment);
+    }
+    makeTableResponsive(table);
+    updateLoadMore(section, payload);
+
+    if (firstPage) {
+        let plot = document.getElementById('probability-plot');
+        if (payload.plot && payload.plot.data && window.Plotly) {
+            if (!plot) {
+                plot = document.createElement('div');
+                plot.id = 'probability-plot';
+                plot.className = 'plot-container';
+                section.appendChild(plot);
+            }
+            Plotly.react(plot, payload.plot.data, payload.plot.layout);
+        } else if (plot) {
+            plot.remove();
+        }
+    }
+
+    return section;
+}
+
+// "Load more" button fetching the next page with the opaque cursor
+function updateLoadMore(section, payload) {
+    let button = section.querySelector('.load-more');
+    if (!payload.next_cursor) {
+        if (button) button.remove();
+        return;
+    }
+    if (!button) {
+        button = document.createElement('button');
+        button.type = 'button';
+        button.className = 'btn secondary load-more';
+        button.addEventListener('click', loadMoreResults);
+        section.querySelector('.results-table-container').after(button);
+    }
+    button.dataset.cursor = payload.next_cursor;
+    const shown = payload.offset + payload.rows.length;
+    button.textContent = `Show more (${shown} of ${payload.total})`;
+}
+
+async function loadMoreResults() {
+    const button = this;
+    const formData = new FormData();
+    formData.append('cursor', button.dataset.cursor);
+    button.disabled = true;
+
+    try {
+        const response = await fetch('/api/predict', {
+            method: 'POST',
+            body: formData
+        });
+        const payload = await response.json();
+        if (!response.ok) {
+            throw new Error(payload.error || 'Loading more results failed');
+        }
+        renderResults(payload);
+    } catch (error) {
+        console.error('Pagination error:', error);
+        showToast(error.message, 'error');
+    } finally {
+        button.disabled = false;
+    }
+}
+
 // Form Validation
 function validateForm(form) {
     const rank = form.querySelector('#jee_rank').value;
@@ -0,0 +1,55 @@
+"""
+Shared fixtures for the JOSAA service tests.
+
+Run from the service directory with:
+    python -m pytest
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_DIR))
+
+# app.auth opens its user database on import; keep it out of data/
+os.environ.setdefault("JOSAA_USERS_DB", str(Path(tempfile.mkdtemp()) / "users.db"))
+
+from app import utils  # noqa: E402
+from app.synthetic import generate_cutoffs, write_cutoffs  # noqa: E402
+from app.table import JosaaTable  # noqa: E402
+from app.utils import preprocess_dataframe  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def cutoffs():
+    """A small preprocessed cutoff table, as the service reads it."""
+    return preprocess_dataframe(generate_cutoffs(scale=0.1, seed=7))
+
+
+@pytest.fixture(scope="session")
+def table(cutoffs):
+    """The encoded form of `cutoffs`."""
+    return JosaaTable.from_frame(cutoffs)
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    """A data directory with cutoff files for 2022 to 2024."""
+    path = tmp_path_factory.mktemp("data")
+    for seed, year in enumerate((2022, 2023, 2024)):
+        write_cutoffs(path / f"josaa{year}_cutoff.csv", scale=0.05, seed=seed)
+    return path
+
+
+@pytest.fixture
+def registry(data_dir, monkeypatch):
+    """The service's year registry, over `data_dir` and with an empty result cache."""
+    registry = utils.create_registry(data_dir, default_year=2024, poll_interval=0)
+    monkeypatch.setattr(utils, "registry", registry)
+    utils.prediction_cache.clear()
+    yield registry
+    utils.prediction_cache.clear()
@@ -0,0 +1,109 @@
+"""
+UserStorage: the SQLite user store and its one-time migration from users.json.
+"""
+
+import json
+import threading
+
+import pytest
+
+from app.auth import User, UserStorage
+
+
+def _user(number):
+    return User(email=f"user{number}@example.com", full_name=f"User {number}", hashed_password=f"hash{number}")
+
+
+def _write_users(path, users):
+    path.write_text(json.dumps({user.email: user.dict() for user in users}))
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return UserStorage(db_path=tmp_path / "users.db", legacy_path=None)
+
+
+def test_migrate_json_copies_users_and_renames_the_file(storage, tmp_path):
+    legacy = tmp_path / "users.json"
+    _write_users(legacy, [_user(1), _user(2), _user(3)])
+
+    assert storage.migrate_json(legacy) == 3
+
+    assert not legacy.exists()
+    assert (tmp_path / "users.json.migrated").exists()
+    assert storage.count() == 3
+    assert storage.get_user("user2@example.com") == _user(2)
+
+
+def test_migrate_json_runs_once(storage, tmp_path):
+    legacy = tmp_path / "users.json"
+    _write_users(legacy, [_user(1), _user(2)])
+    storage.migrate_json(legacy)
+
+    # The file is gone: another worker migrated it first
+    assert storage.migrate_json(legacy) == 0
+    assert storage.count() == 2
+
+
+def test_migrate_json_keeps_users_already_in_the_database(storage, tmp_path):
+    registered = User(email="user1@example.com", full_name="Registered", hashed_password="new")
+    assert storage.add_user(registered)
+    legacy = tmp_path / "users.json"
+    _write_users(legacy, [_user(1), _user(2)])
+
+    assert storage.migrate_json(legacy) == 1
+
+    assert storage.get_user("user1@example.com") == registered
+    assert storage.count() == 2
+
+
+def test_migrate_json_of_the_same_users_again_adds_none(storage, tmp_path):
+    legacy = tmp_path / "users.json"
+    _write_users(legacy, [_user(1), _user(2)])
+    storage.migrate_json(legacy)
+    _write_users(legacy, [_user(1), _user(2)])
+
+    assert storage.migrate_json(legacy) == 0
+    assert storage.count() == 2
+
+
+def test_unreadable_json_is_left_in_place(storage, tmp_path):
+    legacy = tmp_path / "users.json"
+    legacy.write_text("{not json")
+
+    assert storage.migrate_json(legacy) == 0
+
+    assert legacy.exists()
+    assert storage.count() == 0
+
+
+def test_new_storage_migrates_its_legacy_file(tmp_path):
+    legacy = tmp_path / "users.json"
+    _write_users(legacy, [_user(1)])
+
+    storage = UserStorage(db_path=tmp_path / "users.db", legacy_path=legacy)
+
+    assert storage.get_user("user1@example.com") == _user(1)
+    assert not legacy.exists()
+    # A second worker starting later finds nothing to migrate
+    assert UserStorage(db_path=tmp_path / "users.db", legacy_path=legacy).count() == 1
+
+
+def test_one_registration_per_email_across_threads(storage):
+    barrier = threading.Barrier(8)
+    results = []
+
+    def register(number):
+        barrier.wait()
+        results.append(storage.add_user(User(
+            email="same@example.com", full_name=f"User {number}", hashed_password="hash"
+        )))
+
+    threads = [threading.Thread(target=register, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [False] * 7 + [True]
+    assert storage.count() == 1
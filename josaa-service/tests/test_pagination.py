@@ -0,0 +1,92 @@
+"""
+Cursor pagination: pages add up to the whole result, and cursors that were
+edited, garbled or issued before a reload are refused.
+"""
+
+import pytest
+
+from app import utils
+from app.ranking import CursorError, StaleCursorError, decode_cursor, encode_cursor
+
+QUERY = {
+    "jee_rank": 20000,
+    "category": "OPEN",
+    "college_type": "ALL",
+    "preferred_branch": "All",
+    "round_no": "1",
+    "min_probability": 0.0,
+}
+
+
+def _all_pages(page_size, **query):
+    page = utils.predict_preferences_page(page_size=page_size, **query)
+    pages = [page]
+    while page["next_cursor"]:
+        page = utils.predict_preferences_page(page_size=page_size, cursor=page["next_cursor"])
+        pages.append(page)
+    return pages
+
+
+@pytest.mark.parametrize("years", [None, [2022, 2024]])
+def test_pages_add_up_to_the_whole_result(registry, years):
+    whole = utils.predict_preferences_page(page_size=100000, years=years, **QUERY)
+    assert whole["next_cursor"] is None
+    assert whole["total"] > 20
+
+    pages = _all_pages(7, years=years, **QUERY)
+
+    assert [page["offset"] for page in pages] == list(range(0, whole["total"], 7))
+    assert all(page["total"] == whole["total"] for page in pages)
+    assert [row for page in pages for row in page["predictions"]] == whole["predictions"]
+
+
+def test_cursor_carries_the_query(registry):
+    page = utils.predict_preferences_page(page_size=5, years=[2023], **QUERY)
+
+    state = decode_cursor(page["next_cursor"], registry.generation)
+
+    assert state["query"] == {**QUERY, "years": [2023]}
+    assert state["served"] == 5
+
+
+def _cursor(registry, **changes):
+    query = {**QUERY, "years": None, **changes}
+    return encode_cursor(query, registry.generation, 5, 50.0, 3)
+
+
+@pytest.mark.parametrize("changes", [
+    {"jee_rank": -5},
+    {"jee_rank": 0},
+    {"jee_rank": "many"},
+    {"min_probability": "high"},
+    {"category": ["OPEN"]},
+    {"years": [1999]},
+    {"years": "twenty"},
+    {"unexpected": 1},
+])
+def test_edited_cursor_is_refused(registry, changes):
+    with pytest.raises(CursorError):
+        utils.predict_preferences_page(cursor=_cursor(registry, **changes))
+
+
+def test_cursor_without_a_field_is_refused(registry):
+    query = {**QUERY, "years": None}
+    del query["round_no"]
+    cursor = encode_cursor(query, registry.generation, 5, 50.0, 3)
+
+    with pytest.raises(CursorError):
+        utils.predict_preferences_page(cursor=cursor)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", encode_cursor(QUERY, 0, -1, 50.0, 3)])
+def test_malformed_cursor_is_refused(registry, cursor):
+    with pytest.raises(CursorError):
+        utils.predict_preferences_page(cursor=cursor)
+
+
+def test_cursor_from_before_a_reload_is_stale(registry):
+    page = utils.predict_preferences_page(page_size=5, **QUERY)
+    registry.generation += 1
+
+    with pytest.raises(StaleCursorError):
+        utils.predict_preferences_page(cursor=page["next_cursor"])
@@ -0,0 +1,82 @@
+"""
+Round "ALL": every round is scored in one pass and grouped by seat, with the
+same result as grouping the scored rows with pandas.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import utils
+
+SEAT = utils.SEAT_COLUMNS + ["year"]
+
+
+def _grouped_by_seat(registry, years, jee_rank, category, college_type, preferred_branch, min_probability):
+    """Score every row of the years and keep each seat's best round, with pandas."""
+    frames = []
+    for year in registry.resolve(years):
+        df = registry.get(year).data.to_frame()
+        df["year"] = year
+        df["row"] = np.arange(len(df))
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+
+    df = df[df["Category"] == category]
+    if college_type != "ALL":
+        df = df[df["College Type"] == college_type]
+    if preferred_branch != "All":
+        df = df[df["Academic Program Name"] == preferred_branch]
+    df = df.assign(probability=utils.calculate_admission_probability_batch(
+        jee_rank, df["Opening Rank"].to_numpy(), df["Closing Rank"].to_numpy()
+    ))
+
+    # One line per seat in order of its first row, one column per round
+    seats = pd.MultiIndex.from_frame(df[SEAT].drop_duplicates())
+    by_round = df.pivot_table(index=SEAT, columns="Round", values="probability", aggfunc="max")
+    by_round = by_round.reindex(index=seats, columns=sorted(by_round.columns, key=int))
+    best = by_round.max(axis=1)
+    # The row of each seat's best round; its first such row on ties
+    best_rows = (
+        df.join(best.rename("best"), on=SEAT)
+        .query("probability == best")
+        .assign(round_number=lambda rows: rows["Round"].astype(int))
+        .sort_values(["round_number"], kind="stable")
+        .groupby(SEAT, sort=False)[["year", "row"]]
+        .first()
+    )
+    keep = best >= min_probability
+    return by_round[keep], best[keep], best_rows.loc[best[keep].index]
+
+
+@pytest.mark.parametrize("years", [None, [2022, 2023]])
+@pytest.mark.parametrize("jee_rank, category, college_type, preferred_branch, min_probability", [
+    (5000, "OPEN", "ALL", "All", 30.0),
+    (30000, "OBC-NCL", "NIT", "All", 0.0),
+    (15000, "SC", "ALL", "Electrical Engineering (4 Years, Bachelor of Technology)", 10.0),
+])
+def test_all_rounds_match_pandas_grouping(registry, years, jee_rank, category, college_type, preferred_branch, min_probability):
+    scored = utils.score_predictions(
+        jee_rank, category, college_type, preferred_branch, utils.ALL_ROUNDS, min_probability, years=years
+    )
+    by_round, best, best_rows = _grouped_by_seat(
+        registry, years, jee_rank, category, college_type, preferred_branch, min_probability
+    )
+
+    assert len(scored) == len(best) > 0
+    assert scored.rounds == tuple(by_round.columns)
+    np.testing.assert_array_equal(scored.by_round, by_round.to_numpy())
+    np.testing.assert_array_equal(scored.probabilities, best.to_numpy())
+    year_of = np.array(scored.years)[scored.sources] if scored.sources is not None else np.full(len(scored), scored.years[0])
+    assert year_of.tolist() == best_rows["year"].tolist()
+    assert scored.rows.tolist() == best_rows["row"].tolist()
+
+
+def test_all_rounds_page_lists_the_rounds(registry):
+    page = utils.predict_preferences_page(
+        jee_rank=5000, category="OPEN", college_type="ALL", preferred_branch="All",
+        round_no=utils.ALL_ROUNDS, min_probability=30.0, page_size=10
+    )
+
+    assert page["rounds"] == ["1", "2", "3", "4", "5", "6"]
+    assert len(page["predictions"]) == 10
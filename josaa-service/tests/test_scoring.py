@@ -0,0 +1,91 @@
+"""
+The vectorised scorer and the index-based band selection give the same
+results as the per-row code they replaced.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.index import PartitionIndex
+from app.services import _band_rows
+from app.utils import calculate_admission_probability, calculate_admission_probability_batch
+
+
+def _scalar(ranks, opening, closing):
+    return np.array([
+        calculate_admission_probability(int(r), float(o), float(c))
+        for r, o, c in zip(ranks, opening, closing)
+    ])
+
+
+def test_batch_matches_scalar_on_random_programs():
+    rng = np.random.default_rng(0)
+    opening = rng.integers(1, 200000, 5000).astype(float)
+    closing = opening + rng.integers(0, 50000, 5000)
+    ranks = rng.integers(1, 260000, 5000)
+
+    batch = calculate_admission_probability_batch(ranks, opening, closing)
+
+    np.testing.assert_array_equal(batch, _scalar(ranks, opening, closing))
+
+
+@pytest.mark.parametrize("opening, closing", [(1000.0, 1000.0), (1000.0, 5000.0), (1.0, 2.0), (400.0, 405.0)])
+def test_batch_matches_scalar_at_band_edges(opening, closing):
+    ranks = np.array([
+        1, int(opening) // 2, int(opening) // 2 + 1, int(opening) - 1, int(opening), int(opening) + 1,
+        int(closing) - 1, int(closing), int(closing) + 1, int(closing) + 10, int(closing) + 11,
+        int(closing) + 100, int(closing) + 101
+    ])
+    ranks = ranks[ranks > 0]
+    opening_ranks = np.full(len(ranks), opening)
+    closing_ranks = np.full(len(ranks), closing)
+
+    batch = calculate_admission_probability_batch(ranks, opening_ranks, closing_ranks)
+
+    np.testing.assert_array_equal(batch, _scalar(ranks, opening_ranks, closing_ranks))
+
+
+def _dataframe_bands(df, jee_rank, category, college_type, preferred_branch, round_no):
+    """The band selection of predict_preferences before the partition index."""
+    df = df.copy()
+    df["Category"] = df["Category"].str.lower()
+    df["Academic Program Name"] = df["Academic Program Name"].str.lower()
+    df["College Type"] = df["College Type"].str.upper()
+
+    if category != "all":
+        df = df[df["Category"] == category]
+    if college_type != "ALL":
+        df = df[df["College Type"] == college_type]
+    if preferred_branch != "all":
+        df = df[df["Academic Program Name"] == preferred_branch]
+    df = df[df["Round"] == str(round_no)]
+
+    top_10 = df[(df["Opening Rank"] >= jee_rank - 200) & (df["Opening Rank"] <= jee_rank)].head(10)
+    next_20 = df[(df["Opening Rank"] <= jee_rank) & (df["Closing Rank"] >= jee_rank)].head(20)
+    last_20 = df[(df["Closing Rank"] >= jee_rank) & (df["Closing Rank"] <= jee_rank + 200)].head(20)
+    return pd.concat([top_10, next_20, last_20]).drop_duplicates()
+
+
+@pytest.mark.parametrize("category, college_type, preferred_branch, round_no", [
+    ("all", "ALL", "all", "1"),
+    ("open", "ALL", "all", "6"),
+    ("obc-ncl", "NIT", "all", "2"),
+    ("all", "IIT", "computer science and engineering (4 years, bachelor of technology)", "1"),
+    ("sc", "ALL", "electrical engineering (4 years, bachelor of technology)", "3"),
+    ("open", "GFTI", "all", "9"),
+])
+@pytest.mark.parametrize("jee_rank", [1, 150, 2500, 12000, 60000, 400000])
+def test_band_rows_match_dataframe_filter(cutoffs, table, jee_rank, category, college_type, preferred_branch, round_no):
+    index = PartitionIndex(table)
+    intervals = index.select_intervals(
+        round_no=round_no,
+        category=None if category == "all" else category,
+        college_type=None if college_type == "ALL" else college_type,
+        program=None if preferred_branch == "all" else preferred_branch,
+        normalise=True
+    )
+
+    expected = _dataframe_bands(cutoffs, jee_rank, category, college_type, preferred_branch, round_no)
+
+    assert _band_rows(intervals, table, jee_rank).tolist() == expected.index.tolist()
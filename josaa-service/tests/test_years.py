@@ -0,0 +1,190 @@
+"""
+YearRegistry: lazy loading of each year and unloading within the memory budget.
+"""
+
+import threading
+
+import pytest
+
+from app.years import UnknownYearError, YearRegistry, parse_years
+
+YEARS = (2021, 2022, 2023, 2024)
+# Bytes measure() reports for every loaded year
+YEAR_BYTES = 100
+
+
+@pytest.fixture
+def paths(tmp_path):
+    paths = {}
+    for year in YEARS:
+        paths[year] = tmp_path / f"josaa{year}_cutoff.csv"
+        paths[year].write_text(f"rows of {year}\n")
+    return paths
+
+
+def _registry(paths, memory_budget=0, loads=None):
+    def loader(path):
+        if loads is not None:
+            loads.append(path.name)
+        return [path.read_text()]
+
+    return YearRegistry(
+        paths, 2024, loader, poll_interval=0,
+        measure=lambda snapshot: YEAR_BYTES, memory_budget=memory_budget
+    )
+
+
+def test_years_are_loaded_on_first_use(paths):
+    loads = []
+    registry = _registry(paths, loads=loads)
+    assert registry.loaded_years() == []
+
+    registry.get(2022)
+    registry.get(2022)
+
+    assert registry.loaded_years() == [2022]
+    assert loads == ["josaa2022_cutoff.csv"]
+
+
+def test_least_recently_used_year_is_unloaded_over_budget(paths):
+    registry = _registry(paths, memory_budget=2 * YEAR_BYTES + YEAR_BYTES // 2)
+    registry.get()
+    registry.get(2021)
+    registry.get(2022)
+
+    assert registry.loaded_years() == [2022, 2024]
+    assert registry.evictions == 1
+
+    registry.get(2021)
+    assert registry.loaded_years() == [2021, 2024]
+    assert registry.evictions == 2
+
+
+def test_recent_use_protects_a_year(paths):
+    registry = _registry(paths, memory_budget=3 * YEAR_BYTES)
+    registry.get(2021)
+    registry.get(2022)
+    registry.get(2021)
+    registry.get()
+
+    assert registry.loaded_years() == [2021, 2022, 2024]
+
+    registry.get(2023)
+
+    assert registry.loaded_years() == [2021, 2023, 2024]
+    assert registry.evictions == 1
+
+
+def test_default_year_is_never_unloaded(paths):
+    registry = _registry(paths, memory_budget=1)
+    registry.get()
+    for year in (2021, 2022, 2023):
+        registry.get(year)
+        assert registry.loaded_years() == [year, 2024]
+
+    assert registry.evictions == 2
+
+
+def test_years_of_one_request_are_kept_together(paths):
+    registry = _registry(paths, memory_budget=1)
+
+    view = registry.view([2021, 2022, 2023])
+
+    assert view.years == (2021, 2022, 2023)
+    assert [snapshot.data for snapshot in view.snapshots] == [[f"rows of {year}\n"] for year in view.years]
+    assert registry.loaded_years() == [2021, 2022, 2023]
+    assert registry.evictions == 0
+
+
+def test_no_budget_keeps_every_year(paths):
+    registry = _registry(paths)
+    registry.view([])
+
+    assert registry.loaded_years() == list(YEARS)
+    assert registry.evictions == 0
+
+
+def test_reloading_an_unloaded_year_keeps_the_generation(paths):
+    registry = _registry(paths)
+    first = registry.get(2022)
+    generation = registry.generation
+
+    assert registry.unload(2022)
+    assert not registry.unload(2022)
+    assert registry.loaded_years() == []
+
+    second = registry.get(2022)
+    assert second.version == first.version + 1
+    assert registry.generation == generation
+
+
+def test_reloading_a_changed_year_advances_the_generation(paths):
+    registry = _registry(paths)
+    registry.get(2022)
+    registry.unload(2022)
+    paths[2022].write_text("new rows\n")
+
+    registry.get(2022)
+
+    assert registry.generation == 1
+
+
+def test_concurrent_loads_count_every_eviction(paths):
+    loads = []
+    registry = _registry(paths, memory_budget=1, loads=loads)
+    registry.get()
+    barrier = threading.Barrier(3)
+    unloaded = []
+
+    def use(year):
+        barrier.wait()
+        count = 0
+        for _ in range(200):
+            registry.get(year)
+            count += registry.unload(year)
+        unloaded.append(count)
+
+    threads = [threading.Thread(target=use, args=(year,)) for year in (2021, 2022, 2023)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every load after the default year's ended in exactly one eviction or unload
+    assert registry.evictions + sum(unloaded) == len(loads) - 1
+    assert registry.loaded_years() == [2024]
+
+
+def test_year_being_evicted_is_not_unloaded_again(paths):
+    registry = _registry(paths)
+    registry.get(2022)
+    # What get() does with a victim: detach under the lock, release after it
+    with registry._lock:
+        store = registry._detach(2022)
+
+    assert not registry.unload(2022)
+
+    registry._release(store)
+    assert registry.loaded_years() == []
+
+
+def test_unknown_year_is_refused(paths):
+    registry = _registry(paths)
+
+    with pytest.raises(UnknownYearError):
+        registry.view([2019])
+    with pytest.raises(UnknownYearError):
+        registry.get(2030)
+
+
+@pytest.mark.parametrize("value, years", [
+    (None, None), ("", None), ("all", []), ("ALL", []), (2023, [2023]),
+    ("2024, 2022,2024", [2022, 2024]), ([2023, "2021"], [2021, 2023]),
+])
+def test_parse_years(value, years):
+    assert parse_years(value) == years
+
+
+def test_parse_years_refuses_other_values():
+    with pytest.raises(ValueError):
+        parse_years("2024,latest")
@@ -0,0 +1,45 @@
+"""
+Build step: compile the MHTCET cutoff CSV into a memory-mapped snapshot.
+
+The snapshot format lives in nextstep_common.compiled; the service loads it
+as a DataFrame of categoricals over the mapped codes (load_compiled).
+
+Compile from the service directory with:
+    python -m app.compiled [path/to/cutoff.csv ...]
+"""
+
+import logging
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from nextstep_common.compiled import compile_frame
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Compile the given CSV files, or the service's cutoff file by default."""
+    from .services import DATA_FILE
+    from .utils import DataManager, PREPROCESS_REVISION
+
+    paths = [Path(p) for p in (argv if argv is not None else sys.argv[1:])] or [DATA_FILE]
+    status = 0
+    for path in paths:
+        if not path.exists():
+            # Not an error: the service compiles the snapshot on its first
+            # load once the file is there
+            logger.warning(f"File not found, not compiled: {path}")
+            continue
+
+        df = DataManager.parse_csv(path)
+        if df.empty:
+            logger.error(f"No data parsed from {path}")
+            status = 1
+            continue
+        compile_frame(df, path, PREPROCESS_REVISION)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
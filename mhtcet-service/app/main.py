@@ -1,13 +1,25 @@
+# Imported first so the startup profile measures from the start of the import
+from nextstep_common.startup import startup_state
 from fastapi import FastAPI, Request, Form, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import io
 import logging
+import os
+import threading
 from pathlib import Path
+from typing import Optional
+
+from nextstep_common.metrics import CONTENT_TYPE, MetricsMiddleware, registry, timed_stage
+from nextstep_common.offload import PoolSaturated, WorkPool
+from nextstep_common.pages import PageCache, page_response, warming_up_response
+from nextstep_common.profiling import ServerTimingMiddleware
+
 from .models import SearchFilters, SearchResponse
 from .services import MHTCETService
+from .streaming import stream_template
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +40,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts and latencies for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Server-Timing headers on every response; with a token set, single requests
+# can be profiled with ?profile=tree|folded and the X-Profile-Token header
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or None
+app.add_middleware(ServerTimingMiddleware, profile_paths=("/search", "/export"), profile_token=PROFILE_TOKEN)
+
 # Setup static files and templates
 static_path = Path(__file__).parent.parent / "static"
 templates_path = Path(__file__).parent.parent / "templates"
@@ -35,21 +55,125 @@ templates_path = Path(__file__).parent.parent / "templates"
 app.mount("/static", StaticFiles(directory=static_path), name="static")
 templates = Jinja2Templates(directory=templates_path)
 
-# Initialize service
-mhtcet_service = MHTCETService()
+# "background" binds the port first and loads the data in a warm-up thread;
+# "blocking" loads everything before the server accepts requests
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background")
+
+# Threads running searches off the event loop, requests allowed to wait for
+# one, and seconds a request may wait before it is turned away with 503
+COMPUTE_THREADS = int(os.getenv("MHTCET_COMPUTE_THREADS", str(min(4, os.cpu_count() or 1))))
+COMPUTE_QUEUE = int(os.getenv("MHTCET_COMPUTE_QUEUE", "32"))
+COMPUTE_QUEUE_TIMEOUT = float(os.getenv("MHTCET_COMPUTE_QUEUE_TIMEOUT", "10"))
+
+# Bounded pool for search work, so one slow request does not stall the others
+compute_pool = WorkPool(COMPUTE_THREADS, COMPUTE_QUEUE, COMPUTE_QUEUE_TIMEOUT, name="search")
+
+# Service instance, created on first use so that importing the app is cheap
+_service: Optional[MHTCETService] = None
+_service_lock = threading.Lock()
+
+def get_service() -> MHTCETService:
+    """Return the service, loading the data on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = MHTCETService()
+    return _service
+
+def warm_up():
+    """Load the data and prepare the dropdowns."""
+    try:
+        with startup_state.phase("load_data"):
+            service = get_service()
+        if service.data_manager.df.empty:
+            logger.warning("Warm-up finished without data")
+        logger.info(f"Warm-up completed: {startup_state.phases}")
+    except Exception as e:
+        logger.error(f"Warm-up error: {str(e)}", exc_info=True)
+        raise
+
+@app.on_event("startup")
+async def startup_event():
+    """Load the data in the background, or before serving in blocking mode."""
+    if STARTUP_MODE == "blocking":
+        startup_state.run(warm_up)
+    else:
+        startup_state.start(warm_up)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the compute pool."""
+    compute_pool.shutdown()
+
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request: Request, exc: PoolSaturated):
+    """Answer requests turned away by the compute pool with 503 and Retry-After."""
+    logger.warning(f"Request rejected by the compute pool: {request.url.path}")
+    return exc.response()
+
+# Rendered home page per data version and base URL
+home_pages = PageCache()
+
+def _data_metric(read):
+    """Read a property of the loaded data, None before it is loaded."""
+    if _service is None:
+        return None
+    return read(_service.data_manager)
+
+# Read when /metrics is scraped
+registry.gauge_callback("dataset_version", "Version of the loaded dataset", lambda: _data_metric(lambda d: d.version))
+registry.gauge_callback("dataset_rows", "Rows in the loaded dataset", lambda: _data_metric(lambda d: len(d.df)))
+registry.counter_callback("cache_hits_total", "Cache lookups answered from the cache", lambda: [({"cache": "home_page"}, home_pages.hits)])
+registry.counter_callback("cache_misses_total", "Cache lookups that missed", lambda: [({"cache": "home_page"}, home_pages.misses)])
+registry.gauge_callback(
+    "cache_hit_ratio",
+    "Share of cache lookups answered from the cache since the worker started",
+    lambda: [({"cache": "home_page"}, home_pages.hits / (home_pages.hits + home_pages.misses) if home_pages.hits + home_pages.misses else None)]
+)
+registry.gauge_callback("compute_pool_running", "Calls running on the compute pool", lambda: compute_pool.stats()["running"])
+registry.gauge_callback("compute_pool_queued", "Calls waiting for a compute pool thread", lambda: compute_pool.stats()["queued"])
+registry.counter_callback(
+    "compute_pool_rejected_total",
+    "Requests turned away because the compute pool was saturated",
+    lambda: compute_pool.stats()["rejected"] + compute_pool.stats()["timed_out"]
+)
+
+def render_home(request: Request, key: str):
+    """Render the home page of the loaded data; runs on the compute pool."""
+    service = get_service()
+    version = service.data_manager.version
+    # home() already counted the lookup; the page may have been rendered since
+    page = home_pages.peek(key, version)
+    if page is None:
+        context = {
+            "request": request,
+            **service.get_dropdown_options(),
+            **service.get_dropdown_html()
+        }
+        with timed_stage("template_render"):
+            body = templates.get_template("index.html").render(context).encode("utf-8")
+        page = home_pages.put(key, version, body)
+    return page
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    """Home page route."""
+    """Home page route; a 503 loading page while warm-up is loading the data."""
     try:
-        options = mhtcet_service.get_dropdown_options()
-        return templates.TemplateResponse(
-            "index.html",
-            {
-                "request": request,
-                **options
-            }
-        )
+        if _service is None and startup_state.warming:
+            return warming_up_response()
+
+        # The page only changes with the data, so it is rendered once per
+        # version. Its static links are paths, so apart from that it only
+        # depends on the mount path, not on the client's Host header.
+        key = request.scope.get("root_path", "")
+        page = home_pages.get(key, _service.data_manager.version) if _service is not None else None
+        if page is None:
+            page = await compute_pool.run(render_home, request, key)
+
+        return page_response(request, page)
+    except PoolSaturated:
+        raise
     except Exception as e:
         logger.error(f"Error in home route: {str(e)}")
         return templates.TemplateResponse(
@@ -57,6 +181,35 @@ async def home(request: Request):
             {"request": request, "error": "Application is not properly initialized"}
         )
 
+def render_search(request: Request, rank: int, category: str, quota: str, branch: str):
+    """Search and start streaming the results page; runs on the compute pool."""
+    with timed_stage("data_access"):
+        service = get_service()
+    search_results = service.search_colleges(
+        rank=rank,
+        category=category,
+        quota=quota,
+        branch=branch,
+        rank_range=1000
+    )
+    
+    options = service.get_dropdown_options()
+    # Large result tables are sent while they are rendered
+    return stream_template(
+        templates,
+        "index.html",
+        {
+            "request": request,
+            **options,
+            **service.get_dropdown_html(category=category, quota=quota, branch=branch),
+            "rank": rank,
+            "category": category,
+            "quota": quota,
+            "branch": branch,
+            **search_results
+        }
+    )
+
 @app.post("/search")
 async def search_colleges(
     request: Request,
@@ -67,27 +220,9 @@ async def search_colleges(
 ):
     """Search colleges endpoint."""
     try:
-        search_results = mhtcet_service.search_colleges(
-            rank=rank,
-            category=category,
-            quota=quota,
-            branch=branch,
-            rank_range=1000
-        )
-        
-        options = mhtcet_service.get_dropdown_options()
-        return templates.TemplateResponse(
-            "index.html",
-            {
-                "request": request,
-                **options,
-                "rank": rank,
-                "category": category,
-                "quota": quota,
-                "branch": branch,
-                **search_results
-            }
-        )
+        return await compute_pool.run(render_search, request, rank, category, quota, branch)
+    except PoolSaturated:
+        raise
     except Exception as e:
         logger.error(f"Search error: {str(e)}")
         return templates.TemplateResponse(
@@ -95,6 +230,28 @@ async def search_colleges(
             {"request": request, "error": str(e)}
         )
 
+def export_csv(rank: int, category: str, quota: str, branch: str) -> Optional[str]:
+    """Search and write the results as CSV, or None without results; runs on the compute pool."""
+    with timed_stage("data_access"):
+        service = get_service()
+    search_results = service.search_colleges(
+        rank=rank,
+        category=category,
+        quota=quota,
+        branch=branch,
+        rank_range=1000
+    )
+    
+    if not search_results['results']:
+        return None
+
+    with timed_stage("csv_export"):
+        df = service.export_results(search_results['results'])
+        
+        output = io.StringIO()
+        df.to_csv(output, index=False)
+        return output.getvalue()
+
 @app.post("/export")
 async def export_results(
     rank: int = Form(...),
@@ -104,24 +261,13 @@ async def export_results(
 ):
     """Export search results to CSV."""
     try:
-        search_results = mhtcet_service.search_colleges(
-            rank=rank,
-            category=category,
-            quota=quota,
-            branch=branch,
-            rank_range=1000
-        )
+        csv = await compute_pool.run(export_csv, rank, category, quota, branch)
         
-        if not search_results['results']:
+        if csv is None:
             raise HTTPException(status_code=404, detail="No results to export")
-
-        df = mhtcet_service.export_results(search_results['results'])
-        
-        output = io.StringIO()
-        df.to_csv(output, index=False)
         
         response = StreamingResponse(
-            iter([output.getvalue()]),
+            iter([csv]),
             media_type="text/csv",
             headers={
                 "Content-Disposition": "attachment; filename=college_results.csv"
@@ -129,19 +275,40 @@ async def export_results(
         )
         return response
 
+    except (PoolSaturated, HTTPException):
+        raise
     except Exception as e:
         logger.error(f"Export error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Liveness check; answers immediately, also while the data is still loading."""
+    df = _service.data_manager.df if _service is not None else None
     return {
         "status": "healthy",
-        "data_loaded": bool(mhtcet_service.data_manager.df is not None),
-        "data_size": len(mhtcet_service.data_manager.df)
+        "startup": startup_state.state,
+        "data_loaded": df is not None and not df.empty,
+        "data_size": len(df) if df is not None else 0,
+        "compute_pool": compute_pool.stats()
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of the worker process that answers the scrape."""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check; 200 once the data is loaded, 503 before."""
+    ready = startup_state.ready and _service is not None and not _service.data_manager.df.empty
+    return JSONResponse(
+        content={"ready": ready, **startup_state.describe()},
+        status_code=200 if ready else 503
+    )
+
+startup_state.mark_imported()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
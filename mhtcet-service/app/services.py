@@ -1,10 +1,12 @@
-from .utils import DataManager
+from nextstep_common.pages import dropdown_context
+from .utils import DataManager, ResultRows
 from pathlib import Path
 import pandas as pd
 
+DATA_FILE = Path(__file__).parent.parent / 'data' / 'Structured_MHTCET_Cutoffs_with_validation.csv'
+
 class MHTCETService:
-    def __init__(self):
-        data_file = Path(__file__).parent.parent / 'data' / 'Structured_MHTCET_Cutoffs_with_validation.csv'
+    def __init__(self, data_file: Path = DATA_FILE):
         self.data_manager = DataManager(str(data_file))
 
     def get_dropdown_options(self):
@@ -15,6 +17,10 @@ class MHTCETService:
             'branches': self.data_manager.branches
         }
 
+    def get_dropdown_html(self, **selected):
+        """Get the prerendered dropdown <option> lists, with optional selected values."""
+        return dropdown_context(self.data_manager.dropdowns, **selected)
+
     def search_colleges(self, rank: int, category: str, quota: str, branch: str, rank_range: int):
         """Search colleges based on criteria."""
         return self.data_manager.search_colleges(
@@ -25,6 +31,8 @@ class MHTCETService:
             rank_range=rank_range
         )
 
-    def export_results(self, results: list) -> pd.DataFrame:
+    def export_results(self, results) -> pd.DataFrame:
         """Convert results to DataFrame for export."""
+        if isinstance(results, ResultRows):
+            return results.frame
         return pd.DataFrame(results)
@@ -0,0 +1,109 @@
+"""
+Streaming template rendering for large result pages.
+
+A broad search can match thousands of rows. Rendering the page with
+Template.render() builds the whole document in memory before the first
+byte is sent; render_chunks() instead drives Jinja's generate() and hands
+out the output in chunks of roughly chunk_size characters, so the page is
+sent while it is being rendered and memory per request stays bounded.
+Combined with rows produced lazily (utils.ResultRows), only one chunk of
+rows and one chunk of HTML exist at a time.
+"""
+
+import itertools
+import logging
+import time
+from typing import Any, Dict, Iterator
+
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import Template
+
+from nextstep_common.metrics import record_request_timing, stage_seconds
+
+logger = logging.getLogger(__name__)
+
+# Characters of rendered HTML collected before a chunk is sent
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def render_chunks(template: Template, context: Dict[str, Any], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Render a template incrementally.
+
+    Args:
+        template (Template): Template to render
+        context (Dict[str, Any]): Template variables
+        chunk_size (int, optional): Minimum characters per chunk, except the last
+
+    Yields:
+        str: Consecutive pieces of the rendered page
+    """
+    buffer = []
+    size = 0
+    for piece in template.generate(context):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _logged(chunks: Iterator[str], name: str, elapsed: float) -> Iterator[str]:
+    """
+    Pass chunks through, logging an error that ends the stream early.
+
+    The time spent rendering (not waiting for the client) is added to
+    elapsed and recorded as the template_render stage.
+    """
+    first = elapsed
+    try:
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            elapsed += time.perf_counter() - start
+            if chunk is None:
+                break
+            yield chunk
+    except Exception as e:
+        # The status line has been sent; the client sees a truncated page
+        logger.error(f"Error while streaming {name}: {str(e)}", exc_info=True)
+    finally:
+        stage_seconds.observe(elapsed, stage="template_render")
+        # Only seen by a profiled request; Server-Timing was sent with the first chunk
+        record_request_timing("template_render", elapsed - first)
+
+
+def stream_template(
+    templates: Jinja2Templates,
+    name: str,
+    context: Dict[str, Any],
+    chunk_size: int = STREAM_CHUNK_SIZE
+) -> StreamingResponse:
+    """
+    Render a template as a streaming HTML response.
+
+    The first chunk is rendered before the response is returned, so errors
+    in the top of the page still reach the caller's error handling.
+
+    Args:
+        templates (Jinja2Templates): Template environment
+        name (str): Template name
+        context (Dict[str, Any]): Template variables, including "request"
+        chunk_size (int, optional): Minimum characters per chunk
+
+    Returns:
+        StreamingResponse: text/html response sent chunk by chunk
+    """
+    start = time.perf_counter()
+    chunks = render_chunks(templates.get_template(name), context, chunk_size)
+    first = next(chunks, '')
+    elapsed = time.perf_counter() - start
+    record_request_timing("template_render", elapsed)
+    return StreamingResponse(
+        _logged(itertools.chain([first], chunks), name, elapsed),
+        media_type='text/html'
+    )
@@ -0,0 +1,174 @@
+"""
+Synthetic MHTCET cutoff tables for benchmarks and local development.
+
+The generated table has the columns and encoding (cp1252) of the
+structured cutoff file: colleges with their branches and choice codes,
+seat categories with their codes, quota types and three CAP rounds.
+Ranks follow the college's standing and the branch's popularity, and the
+percentile falls with the rank. As in the source data, a few ranks are
+missing ("NA") and some college names use characters outside ASCII.
+
+At scale 1 the table has about 50,000 rows, roughly the size of one year's
+file; scale multiplies the number of colleges. The output is determined
+by scale and seed. Run from the service directory with:
+    python -m app.synthetic -o data/mhtcet_synthetic.csv --scale 10
+"""
+
+import argparse
+import math
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+COLLEGES = 350
+
+CITIES = [
+    'Pune', 'Mumbai', 'Nagpur', 'Nashik', 'Aurangabad', 'Kolhapur', 'Amravati', 'Solapur',
+    'Sangli', 'Satara', 'Jalgaon', 'Nanded', 'Latur', 'Ahmednagar', 'Navi Mumbai', 'Thane',
+    'Lonere', 'Karad', 'Baramati', 'Akola'
+]
+
+COLLEGE_KINDS = [
+    'College of Engineering', 'Institute of Technology', 'Institute of Engineering and Technology',
+    'Vidyapeeth College of Engineering', 'Polytechnic Institute of Technology'
+]
+
+# Branch names in order of popularity, with their relative weight
+BRANCHES = [
+    ('Computer Engineering', 10),
+    ('Information Technology', 8),
+    ('Computer Science and Engineering', 8),
+    ('Artificial Intelligence and Data Science', 6),
+    ('Electronics and Telecommunication Engineering', 8),
+    ('Electrical Engineering', 6),
+    ('Mechanical Engineering', 8),
+    ('Civil Engineering', 7),
+    ('Chemical Engineering', 3),
+    ('Instrumentation Engineering', 2),
+    ('Production Engineering', 2),
+    ('Automobile Engineering', 2),
+    ('Biotechnology', 1),
+    ('Textile Technology', 1)
+]
+
+# Seat category: rank relative to the general open seats
+CATEGORIES = {
+    'GOPENS': 1.0, 'GOBCS': 1.25, 'GSCS': 1.8, 'GSTS': 2.6, 'GVJS': 1.6, 'GNT1S': 1.5,
+    'GNT2S': 1.4, 'GNT3S': 1.3, 'LOPENS': 1.3, 'LOBCS': 1.6, 'LSCS': 2.2, 'TFWS': 0.6,
+    'EWS': 1.35, 'DEFOPENS': 1.9, 'PWDOPENS': 2.4
+}
+
+QUOTAS = ['State Level', 'Home University', 'Other Than Home University', 'Not Specified']
+
+ROUNDS = ['CAP Round I', 'CAP Round II', 'CAP Round III']
+
+# Categories with seats for one (branch, quota, round)
+CATEGORIES_PER_SEAT = (4, 9)
+
+# Number of ranked candidates
+MAX_RANK = 200000
+
+# Share of ranks published without a value
+MISSING_RANK_SHARE = 0.005
+
+COLUMNS = [
+    'college_code', 'college_name', 'branch_code', 'branch_name', 'category_code',
+    'category', 'quota_type', 'allocation_type', 'rank', 'percentile'
+]
+
+
+def generate_cutoffs(scale: float = 1.0, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a synthetic MHTCET cutoff table.
+
+    Args:
+        scale (float, optional): Size relative to one year's file. Defaults to 1.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: Cutoff rows with the columns of the structured file
+    """
+    rng = np.random.default_rng(seed)
+    colleges = max(1, round(COLLEGES * scale))
+    branch_names = [name for name, _ in BRANCHES]
+    weights = np.array([weight for _, weight in BRANCHES], dtype=float)
+    categories = list(CATEGORIES)
+    factors = np.array(list(CATEGORIES.values()))
+
+    columns = {name: [] for name in COLUMNS}
+    for c in range(colleges):
+        code = 1000 + c
+        city = CITIES[c % len(CITIES)]
+        name = f"{COLLEGE_KINDS[c // len(CITIES) % len(COLLEGE_KINDS)]}, {city}"
+        if c >= len(CITIES) * len(COLLEGE_KINDS):
+            name = f"{name} {c // (len(CITIES) * len(COLLEGE_KINDS)) + 1}"
+        if c % 97 == 5:
+            name = f"Collège d'Ingénierie {c}, {city}"
+        # Standing of the college: rank of its top branch's open seats
+        top_rank = 500 * (MAX_RANK / 2000) ** (c / max(1, colleges - 1)) * rng.lognormal(0, 0.3)
+
+        count = int(rng.integers(2, 9))
+        branches = np.sort(rng.choice(len(branch_names), size=count, replace=False, p=weights / weights.sum()))
+        for b in branches:
+            branch_rank = top_rank * (1 + b * 0.15)
+            quotas = ['State Level'] if rng.random() < 0.5 else list(rng.choice(QUOTAS[1:], size=2, replace=False))
+            for quota in quotas:
+                for r, allocation in enumerate(ROUNDS):
+                    seats = np.sort(rng.choice(len(categories), size=int(rng.integers(*CATEGORIES_PER_SEAT)), replace=False))
+                    ranks = branch_rank * factors[seats] * (1 + 0.08 * r) * rng.lognormal(0, 0.15, len(seats))
+                    columns['college_code'].extend([code] * len(seats))
+                    columns['college_name'].extend([name] * len(seats))
+                    columns['branch_code'].extend([f'{code}{b:02d}{0 if quota == "State Level" else 1}0'] * len(seats))
+                    columns['branch_name'].extend([branch_names[b]] * len(seats))
+                    columns['category_code'].extend(seats.tolist())
+                    columns['category'].extend(categories[s] for s in seats)
+                    columns['quota_type'].extend([quota] * len(seats))
+                    columns['allocation_type'].extend([allocation] * len(seats))
+                    columns['rank'].extend(np.clip(ranks, 1, MAX_RANK).astype(np.int64).tolist())
+
+    df = pd.DataFrame({name: values for name, values in columns.items() if values}, columns=COLUMNS)
+    df['percentile'] = np.round(100 * (1 - df['rank'] / (MAX_RANK * 1.5)), 7)
+
+    ranks = df['rank'].astype(object)
+    ranks[rng.random(len(df)) < MISSING_RANK_SHARE] = 'NA'
+    df['rank'] = ranks
+    return df
+
+
+def write_cutoffs(path: Path, scale: float = 1.0, seed: int = 0) -> int:
+    """
+    Write a synthetic cutoff table as cp1252-encoded CSV.
+
+    Args:
+        path (Path): Output CSV file
+        scale (float, optional): Size relative to one year's file. Defaults to 1.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        int: Number of rows written
+    """
+    df = generate_cutoffs(scale, seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False, encoding='cp1252')
+    return len(df)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic MHTCET cutoff CSV")
+    parser.add_argument('-o', '--output', type=Path, required=True, help="Output CSV file")
+    parser.add_argument('--scale', type=float, default=1.0, help="Size relative to one year's file (default 1)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default 0)")
+    args = parser.parse_args(argv)
+
+    if not math.isfinite(args.scale) or args.scale <= 0:
+        parser.error("--scale must be a positive number")
+    rows = write_cutoffs(args.output, args.scale, args.seed)
+    print(f"Wrote {rows} rows to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,13 @@
+import numpy as np
 import pandas as pd
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, Optional
+
+from nextstep_common.compiled import load_or_compile
+from nextstep_common.metrics import timed_stage
+from nextstep_common.pages import OptionList
+
 
 # Configure logging
 logging.basicConfig(
@@ -10,23 +16,74 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bump when DataManager.parse_csv changes so compiled snapshots are rebuilt
+PREPROCESS_REVISION = "1"
+
+# Rows converted from the DataFrame to dicts at a time when results are iterated
+RESULT_CHUNK_SIZE = 500
+
+class ResultRows:
+    """
+    Matching rows of a search, converted to dicts lazily.
+
+    Iterating converts RESULT_CHUNK_SIZE rows at a time, so a template that
+    streams the results never holds every row as a dict. len() and truth
+    testing work without converting anything.
+    """
+
+    __slots__ = ('frame', 'chunk_size')
+
+    def __init__(self, frame: pd.DataFrame, chunk_size: int = RESULT_CHUNK_SIZE):
+        self.frame = frame
+        self.chunk_size = chunk_size
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for start in range(0, len(self.frame), self.chunk_size):
+            yield from self.frame.iloc[start:start + self.chunk_size].to_dict('records')
+
+def select_rows(df: pd.DataFrame, mask: pd.Series) -> pd.DataFrame:
+    """
+    Rows of df where mask is True, like df[mask].
+
+    Built column by column so that df keeps sharing its memory-mapped
+    columns; df[mask] would first consolidate (copy) them.
+    """
+    rows = np.flatnonzero(mask.to_numpy())
+    return pd.DataFrame({name: df[name].take(rows) for name in df.columns}, columns=df.columns)
+
 class DataManager:
     def __init__(self, file_path: str):
         """Initialize the DataManager with the CSV file path."""
         logger.info(f"Initializing DataManager with file path: {file_path}")
         self.file_path = file_path
+        # Incremented whenever the data (and so the dropdowns) change
+        self.version = 0
+        # Never modified, so one frame (mapped from the compiled snapshot) serves both
         self.original_df = self.load_data()
-        self.df = self.original_df.copy() if not self.original_df.empty else pd.DataFrame()
+        self.df = self.original_df
         self.initialize_dropdowns()
 
     def load_data(self) -> pd.DataFrame:
-        """Load and validate the CSV data."""
+        """Load the data from its compiled snapshot, falling back to the CSV."""
         try:
-            if not Path(self.file_path).exists():
+            df = load_or_compile(Path(self.file_path), self.parse_csv, PREPROCESS_REVISION)
+            if df is None:
                 logger.error(f"File not found: {self.file_path}")
                 return pd.DataFrame()
+            return df
+
+        except Exception as e:
+            logger.error(f"Error loading data: {str(e)}", exc_info=True)
+            return pd.DataFrame()
 
-            df = pd.read_csv(self.file_path, encoding='cp1252')
+    @staticmethod
+    def parse_csv(file_path: Path) -> pd.DataFrame:
+        """Parse and validate the CSV data."""
+        try:
+            df = pd.read_csv(file_path, encoding='cp1252')
             
             required_columns = [
                 'college_code', 'college_name', 'branch_code', 'branch_name',
@@ -57,11 +114,18 @@ class DataManager:
             self.categories = ["All"]
             self.quotas = ["All"]
             self.branches = ["All"]
-            return
-
-        self.categories = self.prepare_dropdown('category')
-        self.quotas = self.prepare_dropdown('quota_type')
-        self.branches = self.prepare_dropdown('branch_name')
+        else:
+            self.categories = self.prepare_dropdown('category')
+            self.quotas = self.prepare_dropdown('quota_type')
+            self.branches = self.prepare_dropdown('branch_name')
+
+        # Prerendered <option> lists by form field name
+        self.dropdowns = {
+            'category': OptionList(self.categories),
+            'quota': OptionList(self.quotas),
+            'branch': OptionList(self.branches)
+        }
+        self.version += 1
 
     def prepare_dropdown(self, column: str) -> list:
         """Prepare dropdown options for a given column."""
@@ -92,24 +156,25 @@ class DataManager:
             logger.info(f"Searching with parameters: rank={rank}, category={category}, "
                        f"quota={quota}, branch={branch}")
 
-            # Create base mask for rank range
-            mask = (self.df['rank'] >= rank - 1000) & (self.df['rank'] <= rank + 3000)
+            with timed_stage("filtering"):
+                # Create base mask for rank range
+                mask = (self.df['rank'] >= rank - 1000) & (self.df['rank'] <= rank + 3000)
 
-            # Apply additional filters
-            if category != "All":
-                mask &= self.df['category'] == category
-            if quota != "All":
-                mask &= self.df['quota_type'] == quota
-            if branch != "All":
-                mask &= self.df['branch_name'] == branch
+                # Apply additional filters
+                if category != "All":
+                    mask &= self.df['category'] == category
+                if quota != "All":
+                    mask &= self.df['quota_type'] == quota
+                if branch != "All":
+                    mask &= self.df['branch_name'] == branch
 
-            # Apply mask and sort results
-            results = self.df[mask].sort_values('rank')
+                # Apply mask and sort results
+                results = select_rows(self.df, mask).sort_values('rank')
             
             logger.info(f"Found {len(results)} matching results")
 
             return {
-                'results': results.to_dict('records'),
+                'results': ResultRows(results),
                 'total_matches': len(results),
                 'rank_min': results['rank'].min() if not results.empty else 0,
                 'rank_max': results['rank'].max() if not results.empty else 0,
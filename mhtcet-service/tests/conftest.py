@@ -0,0 +1,48 @@
+"""
+Shared fixtures for the MHTCET service tests.
+
+Run from the service directory with:
+    python -m pytest
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_DIR))
+
+from app import main, utils  # noqa: E402
+from app.services import MHTCETService  # noqa: E402
+from app.synthetic import write_cutoffs  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def cutoff_file(tmp_path_factory):
+    """A synthetic cutoff CSV, written once per session."""
+    path = tmp_path_factory.mktemp("data") / "mhtcet_cutoffs.csv"
+    write_cutoffs(path, scale=0.1, seed=3)
+    return path
+
+
+@pytest.fixture(params=["compiled", "csv"])
+def service(request, cutoff_file, monkeypatch):
+    """
+    The service over `cutoff_file`, installed in app.main.
+
+    "compiled" loads the memory-mapped snapshot (compiled on first use),
+    "csv" the frame parsed from the CSV without a snapshot.
+    """
+    if request.param == "csv":
+        monkeypatch.setattr(utils, "load_or_compile", lambda path, parse, revision: parse(path))
+    service = MHTCETService(cutoff_file)
+    assert not service.data_manager.df.empty
+    monkeypatch.setattr(main, "_service", service)
+    return service
+
+
+@pytest.fixture
+def compiled_service(cutoff_file):
+    """The service over the compiled snapshot of `cutoff_file`."""
+    return MHTCETService(cutoff_file)
@@ -0,0 +1,77 @@
+"""
+Selecting and iterating search results: select_rows() matches df[mask]
+without copying the frame's memory-mapped columns, and ResultRows hands
+out the same rows as converting the whole frame at once.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nextstep_common.compiled import mapped_nbytes
+
+from app.utils import ResultRows, select_rows
+
+
+def _column_arrays(df):
+    """The arrays backing each column: codes for categoricals, values otherwise."""
+    return [
+        df[name].array.codes if isinstance(df[name].dtype, pd.CategoricalDtype) else df[name].to_numpy()
+        for name in df.columns
+    ]
+
+
+def _mask(df):
+    return (df["rank"] >= 4000) & (df["rank"] <= 8000) & (df["quota_type"] == "State Level")
+
+
+def test_select_rows_matches_boolean_indexing(service):
+    df = service.data_manager.df
+    mask = _mask(df)
+
+    selected = select_rows(df, mask)
+
+    assert len(selected) > 0
+    pd.testing.assert_frame_equal(selected, df[mask])
+
+
+def test_select_rows_keeps_the_snapshot_mapped(compiled_service):
+    df = compiled_service.data_manager.df
+    mapped = mapped_nbytes(_column_arrays(df))
+    categorical = [name for name in df.columns if isinstance(df[name].dtype, pd.CategoricalDtype)]
+    assert mapped > 0 and categorical
+
+    selected = select_rows(df, _mask(df))
+
+    # The source columns are still views of the mapped files...
+    assert mapped_nbytes(_column_arrays(df)) == mapped
+    # ...and the selection keeps their categorical dtypes
+    assert (selected.dtypes == df.dtypes).all()
+
+
+def test_select_rows_without_matches(service):
+    df = service.data_manager.df
+
+    selected = select_rows(df, pd.Series(False, index=df.index))
+
+    assert selected.empty
+    assert list(selected.columns) == list(df.columns)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 500])
+def test_result_rows_iterate_in_chunks(service, chunk_size):
+    df = service.data_manager.df
+    frame = select_rows(df, _mask(df)).sort_values("rank")
+
+    rows = ResultRows(frame, chunk_size=chunk_size)
+
+    assert len(rows) == len(frame)
+    assert list(rows) == frame.to_dict("records")
+
+
+def test_empty_result_rows_are_false():
+    rows = ResultRows(pd.DataFrame({"rank": np.array([], dtype=float)}))
+
+    assert not rows
+    assert len(rows) == 0
+    assert list(rows) == []
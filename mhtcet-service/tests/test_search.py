@@ -0,0 +1,84 @@
+"""
+/search and /export return the rows of a plain pandas selection,
+df[mask].sort_values('rank'), with and without a compiled snapshot.
+"""
+
+import html
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+QUERIES = [
+    {"rank": 5000},
+    {"rank": 20000, "category": "GOPENS"},
+    {"rank": 12000, "quota": "Home University", "branch": "Computer Engineering"},
+    {"rank": 60000, "category": "GOBCS", "quota": "State Level"},
+]
+
+# The main line of each cell of a results row
+CELL = re.compile(r'<div class="cell-main">(.*?)</div>')
+
+
+@pytest.fixture
+def client(service):
+    return TestClient(app)
+
+
+def _expected(df, rank, category="All", quota="All", branch="All"):
+    """The search results, selected and sorted with plain pandas."""
+    mask = (df["rank"] >= rank - 1000) & (df["rank"] <= rank + 3000)
+    if category != "All":
+        mask &= df["category"] == category
+    if quota != "All":
+        mask &= df["quota_type"] == quota
+    if branch != "All":
+        mask &= df["branch_name"] == branch
+    return df[mask].sort_values("rank")
+
+
+def _table_rows(page):
+    """(college, branch, category, quota, rank) of each row of the results table."""
+    cells = [html.unescape(cell) for cell in CELL.findall(page)]
+    return [tuple(cells[i:i + 5]) for i in range(0, len(cells), 5)]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_lists_the_pandas_selection(service, client, query):
+    expected = _expected(service.data_manager.df, **query)
+    assert len(expected) > 0
+
+    response = client.post("/search", data=query)
+
+    assert response.status_code == 200
+    assert _table_rows(response.text) == [
+        (row["college_name"], row["branch_name"], row["category"], row["quota_type"], f"Rank: {row['rank']}")
+        for row in expected.to_dict("records")
+    ]
+    assert f'<div class="stat-value">{len(expected)}</div>' in response.text
+
+
+def test_search_without_matches(service, client):
+    response = client.post("/search", data={"rank": 5000, "branch": "No Such Branch"})
+
+    assert response.status_code == 200
+    assert _table_rows(response.text) == []
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_export_matches_the_pandas_selection(service, client, query):
+    expected = _expected(service.data_manager.df, **query)
+
+    response = client.post("/export", data=query)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text == expected.to_csv(index=False)
+
+
+def test_export_without_matches_is_not_found(service, client):
+    response = client.post("/export", data={"rank": 5000, "branch": "No Such Branch"})
+
+    assert response.status_code == 404
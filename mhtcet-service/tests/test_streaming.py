@@ -0,0 +1,69 @@
+"""
+Streaming template rendering: the chunks add up to the rendered page, and
+an error at the top of the page is raised before the response is returned.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.templating import Jinja2Templates
+
+from app.streaming import render_chunks, stream_template
+
+ROWS = """<table>
+{% for row in rows %}<tr><td>{{ row.name }}</td><td>{{ row.rank }}</td></tr>
+{% endfor %}</table>
+"""
+
+
+@pytest.fixture
+def templates(tmp_path):
+    (tmp_path / "rows.html").write_text(ROWS)
+    (tmp_path / "broken_top.html").write_text("{{ missing.value }}" + ROWS)
+    (tmp_path / "broken_rows.html").write_text(ROWS + "{{ missing.value }}")
+    return Jinja2Templates(directory=str(tmp_path))
+
+
+def _rows(count):
+    return [{"name": f"College <{i}>", "rank": i * 10} for i in range(count)]
+
+
+def _body(response):
+    async def read():
+        return "".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(read())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100, 1 << 20])
+def test_chunks_add_up_to_the_page(templates, chunk_size):
+    template = templates.get_template("rows.html")
+    context = {"rows": _rows(50)}
+
+    chunks = list(render_chunks(template, context, chunk_size))
+
+    assert "".join(chunks) == template.render(context)
+    assert all(len(chunk) >= chunk_size for chunk in chunks[:-1])
+
+
+def test_stream_template_sends_the_page(templates):
+    context = {"rows": _rows(200)}
+
+    response = stream_template(templates, "rows.html", context, chunk_size=256)
+
+    assert response.media_type == "text/html"
+    assert _body(response) == templates.get_template("rows.html").render(context)
+
+
+def test_error_at_the_top_is_raised(templates):
+    with pytest.raises(Exception):
+        stream_template(templates, "broken_top.html", {"rows": _rows(5)})
+
+
+def test_error_while_streaming_truncates_the_page(templates):
+    context = {"rows": _rows(200)}
+
+    response = stream_template(templates, "broken_rows.html", context, chunk_size=256)
+    body = _body(response)
+
+    # Everything before the error was sent; the client sees the page end there
+    assert body.rstrip("\n") == templates.get_template("rows.html").render(context)